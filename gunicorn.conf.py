@@ -0,0 +1,14 @@
+# Konfiguracja gunicorn dla wdrożenia ASGI (widoki asynchroniczne w sejm_app.views):
+#   gunicorn sejm_project.asgi:application -c gunicorn.conf.py
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+# Pętla zdarzeń uvicorn zamiast wątków WSGI - jeden worker obsługuje wiele żądań naraz
+worker_class = 'uvicorn.workers.UvicornWorker'
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
@@ -0,0 +1,173 @@
+from dataclasses import dataclass
+
+from django.db import connection, transaction
+
+from sejm_app.api_cache import bump_generation
+from sejm_app.models import AnalyzedVoting, ClubCohesion, MemberStats, MemberTimeline, Vote, VoteChoice, Voting
+
+# Głosy oddane - tylko one liczą się do większości klubu i zgodności z nią
+CAST_CHOICES = (VoteChoice.YES, VoteChoice.NO, VoteChoice.ABSTAIN)
+
+
+@dataclass
+class AnalysisResult:
+    term: int
+    votings_added: int = 0
+    full_rebuild: bool = False
+    members_updated: int = 0
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def refresh_analysis(term, full=False):
+    """Dolicza do agregatów w schemacie ``analysis`` głosowania kadencji, których jeszcze w nich nie ma.
+
+    Spójność klubów liczona jest tylko dla nowych głosowań, a ich wkład
+    do statystyk posłów dodawany do istniejących liczników, więc koszt zależy
+    od liczby nowych głosów, a nie od rozmiaru ``individual_votes``. Jeśli
+    zmieniło się głosowanie już wliczone (inny ``summary_hash``) albo podano
+    ``full``, agregaty kadencji są liczone od nowa. Każda zmiana agregatów
+    dodaje generację danych, bo profil i historia posła w API są z cache.
+    """
+    result = AnalysisResult(term=term, full_rebuild=full)
+    with transaction.atomic():
+        votings = dict(Voting.objects.filter(term=term).values_list('id', 'summary_hash'))
+        analyzed = dict(AnalyzedVoting.objects.filter(voting__term=term).values_list('voting_id', 'summary_hash'))
+        if any(votings.get(voting_id, summary_hash) != summary_hash for voting_id, summary_hash in analyzed.items()):
+            result.full_rebuild = True
+
+        if result.full_rebuild:
+            ClubCohesion.objects.filter(voting__term=term).delete()
+            MemberStats.objects.filter(term=term).delete()
+            MemberTimeline.objects.filter(term=term).delete()
+            AnalyzedVoting.objects.filter(voting__term=term).delete()
+            pending = sorted(votings)
+        else:
+            pending = sorted(voting_id for voting_id in votings if voting_id not in analyzed)
+        if not pending:
+            if result.full_rebuild:
+                bump_generation(term, 'analysis')
+            return result
+
+        with connection.cursor() as cursor:
+            _insert_club_cohesion(cursor, term, pending)
+            result.members_updated = _add_member_stats(cursor, term, pending)
+            _merge_member_timelines(cursor, term, pending)
+        AnalyzedVoting.objects.bulk_create([
+            AnalyzedVoting(voting_id=voting_id, summary_hash=votings[voting_id]) for voting_id in pending
+        ])
+        result.votings_added = len(pending)
+        bump_generation(term, 'analysis')
+    return result
+
+
+def _insert_club_cohesion(cursor, term, voting_ids):
+    yes, no, abstain = int(VoteChoice.YES), int(VoteChoice.NO), int(VoteChoice.ABSTAIN)
+    cursor.execute(
+        f'''
+        INSERT INTO {_table(ClubCohesion)}
+            (voting_id, club_id, members, yes, no, abstain, not_voting, rice_index, majority_choice)
+        SELECT voting_id, club_id, members, yes, no, abstain, members - yes - no - abstain,
+               abs(yes - no)::float8 / NULLIF(yes + no, 0),
+               CASE
+                   WHEN yes > no AND yes > abstain THEN {yes}
+                   WHEN no > yes AND no > abstain THEN {no}
+                   WHEN abstain > yes AND abstain > no THEN {abstain}
+               END
+        FROM (
+            SELECT voting_id, club_id, count(*) AS members,
+                   count(*) FILTER (WHERE vote_choice = {yes}) AS yes,
+                   count(*) FILTER (WHERE vote_choice = {no}) AS no,
+                   count(*) FILTER (WHERE vote_choice = {abstain}) AS abstain
+            FROM {_table(Vote)}
+            WHERE term = %s AND voting_id = ANY(%s) AND club_id IS NOT NULL
+            GROUP BY voting_id, club_id
+        ) AS counts
+        ''',
+        [term, voting_ids],
+    )
+
+
+def _add_member_stats(cursor, term, voting_ids):
+    """Dodaje wkład ``voting_ids`` do liczników posłów i przelicza ich wskaźniki; zwraca liczbę posłów."""
+    cast_choices = ', '.join(str(int(choice)) for choice in CAST_CHOICES)
+    stats_table = _table(MemberStats)
+    counters = ['votings', 'absent', 'votes_with_club_majority_known', 'votes_with_club_majority']
+    cursor.execute(
+        f'''
+        INSERT INTO {stats_table} AS s (member_id, term, {', '.join(counters)}, updated_at)
+        SELECT v.member_id, %s, count(*),
+               count(*) FILTER (WHERE v.vote_choice = {int(VoteChoice.ABSENT)}),
+               count(*) FILTER (WHERE c.majority_choice IS NOT NULL AND v.vote_choice IN ({cast_choices})),
+               count(*) FILTER (WHERE v.vote_choice = c.majority_choice),
+               now()
+        FROM {_table(Vote)} AS v
+        LEFT JOIN {_table(ClubCohesion)} AS c ON c.voting_id = v.voting_id AND c.club_id = v.club_id
+        WHERE v.term = %s AND v.voting_id = ANY(%s) AND v.member_id IS NOT NULL
+        GROUP BY v.member_id
+        ON CONFLICT (member_id, term) DO UPDATE SET
+            {', '.join(f'{name} = s.{name} + EXCLUDED.{name}' for name in counters)},
+            updated_at = EXCLUDED.updated_at
+        RETURNING s.member_id
+        ''',
+        [term, term, voting_ids],
+    )
+    member_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        f'''
+        UPDATE {stats_table} SET
+            attendance_rate = (votings - absent)::float8 / NULLIF(votings, 0),
+            loyalty_rate = votes_with_club_majority::float8 / NULLIF(votes_with_club_majority_known, 0)
+        WHERE term = %s AND member_id = ANY(%s)
+        ''',
+        [term, member_ids],
+    )
+    return len(member_ids)
+
+
+def _merge_member_timelines(cursor, term, voting_ids):
+    """Dopisuje głosy z ``voting_ids`` do historii posłów (``MemberTimeline``) w kolejności dat.
+
+    Nowe wpisy posła są grupowane w jedną tablicę i łączone z istniejącą;
+    sortowane jest tylko to połączenie, bez czytania starych głosów.
+    """
+    cast_choices = ', '.join(str(int(choice)) for choice in CAST_CHOICES)
+    arrays = ['voting_ids', 'dates', 'choices', 'against_club']
+    counters = ['yes', 'no', 'abstain', 'absent', 'rebellions']
+    order = 'ORDER BY date, voting_id'
+    cursor.execute(
+        f'''
+        INSERT INTO {_table(MemberTimeline)} AS t (member_id, term, {', '.join(arrays + counters)}, updated_at)
+        SELECT member_id, %s,
+               array_agg(voting_id {order}), array_agg(date {order}),
+               array_agg(vote_choice {order}), array_agg(against_club {order}),
+               count(*) FILTER (WHERE vote_choice = {int(VoteChoice.YES)}),
+               count(*) FILTER (WHERE vote_choice = {int(VoteChoice.NO)}),
+               count(*) FILTER (WHERE vote_choice = {int(VoteChoice.ABSTAIN)}),
+               count(*) FILTER (WHERE vote_choice = {int(VoteChoice.ABSENT)}),
+               count(*) FILTER (WHERE against_club),
+               now()
+        FROM (
+            SELECT v.member_id, v.voting_id, g.date, v.vote_choice,
+                   coalesce(v.vote_choice IN ({cast_choices}) AND v.vote_choice <> c.majority_choice, false) AS against_club
+            FROM {_table(Vote)} AS v
+            JOIN {_table(Voting)} AS g ON g.id = v.voting_id AND g.term = v.term
+            LEFT JOIN {_table(ClubCohesion)} AS c ON c.voting_id = v.voting_id AND c.club_id = v.club_id
+            WHERE v.term = %s AND v.voting_id = ANY(%s) AND v.member_id IS NOT NULL
+        ) AS entries
+        GROUP BY member_id
+        ON CONFLICT (member_id, term) DO UPDATE SET
+            ({', '.join(arrays)}) = (
+                SELECT array_agg(voting_id {order}), array_agg(date {order}),
+                       array_agg(choice {order}), array_agg(against_club {order})
+                FROM unnest(
+                    {', '.join(f't.{name} || EXCLUDED.{name}' for name in arrays)}
+                ) AS merged (voting_id, date, choice, against_club)
+            ),
+            {', '.join(f'{name} = t.{name} + EXCLUDED.{name}' for name in counters)},
+            updated_at = EXCLUDED.updated_at
+        ''',
+        [term, term, voting_ids],
+    )
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from sejm_app.models import DataGeneration
+
+Generation = namedtuple('Generation', ['number', 'modified'])
+
+# Generacja przed pierwszym importem
+NO_GENERATION = Generation(0, None)
+
+_generation_lock = threading.Lock()
+# (sygnatura pliku z os.stat, Generation) z ostatniego odczytu
+_generation_state = [None, NO_GENERATION]
+
+
+def bump_generation(term=None, source=''):
+    """Zapisuje nową generację danych w bieżącej transakcji.
+
+    Plik generacji (``SEJM_DATA_GENERATION_FILE``) jest nadpisywany dopiero
+    po zatwierdzeniu transakcji, więc API nie zobaczy nowego numeru przed
+    danymi, które go wywołały.
+    """
+    generation = DataGeneration.objects.create(term=term, source=source)
+    transaction.on_commit(lambda: write_generation_file(Generation(generation.pk, generation.created_at)))
+    return generation
+
+
+def write_generation_file(generation):
+    path = settings.SEJM_DATA_GENERATION_FILE
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    payload = {
+        'generation': generation.number,
+        'modified': generation.modified.isoformat() if generation.modified else None,
+    }
+    # Zapis przez plik tymczasowy + rename - czytelnik widzi stary albo nowy plik
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as tmp_file:
+            json.dump(payload, tmp_file)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def current_generation():
+    """Zwraca bieżącą ``Generation`` bez zapytań do bazy.
+
+    Numer pochodzi z pliku generacji, czytanego ponownie tylko wtedy, gdy
+    zmieniła się jego sygnatura (inode, mtime, rozmiar). Gdy pliku brakuje,
+    numer jest raz odczytywany z ``DataGeneration`` i plik jest odtwarzany.
+    """
+    path = settings.SEJM_DATA_GENERATION_FILE
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return restore_generation_file()
+    signature = (path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _generation_lock:
+        if _generation_state[0] == signature:
+            return _generation_state[1]
+    try:
+        with open(path, encoding='utf-8') as generation_file:
+            payload = json.load(generation_file)
+        modified = parse_datetime(payload['modified']) if payload.get('modified') else None
+        generation = Generation(int(payload['generation']), modified)
+    except (OSError, ValueError, KeyError, TypeError):
+        return restore_generation_file()
+    with _generation_lock:
+        _generation_state[:] = [signature, generation]
+    return generation
+
+
+def restore_generation_file():
+    """Zapisuje w pliku generacji najnowszą generację z bazy (np. po imporcie z kilku procesów naraz)."""
+    latest = DataGeneration.objects.order_by('-pk').values_list('pk', 'created_at').first()
+    generation = Generation(*latest) if latest else NO_GENERATION
+    write_generation_file(generation)
+    return generation
+
+
+class CachedResponseMixin:
+    """Cache odpowiedzi JSON widoków DRF wersjonowany numerem generacji danych.
+
+    Klucz to ścieżka z parametrami, a wersja klucza to numer generacji, więc
+    po imporcie stare wpisy przestają być trafiane i wygasają same. Trafienie
+    nie dotyka bazy. Odpowiedzi mają silny ``ETag`` (skrót treści)
+    i ``Last-Modified`` (czas generacji), a warunkowe GET-y dostają 304.
+    """
+
+    cache_alias = 'api'
+
+    def get(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != 'json':
+            return super().get(request, *args, **kwargs)
+        generation = current_generation()
+        cache_key = self._cache_key(request)
+        entry = caches[self.cache_alias].get(cache_key, version=generation.number)
+        if entry is None:
+            # Zapis do cache po wyrenderowaniu, w finalize_response
+            request.api_cache_pending = (cache_key, generation)
+            return super().get(request, *args, **kwargs)
+        return _cached_response(request, entry, generation)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        pending = getattr(request, 'api_cache_pending', None)
+        if pending is None or not isinstance(response, Response) or response.status_code != 200:
+            return response
+        cache_key, generation = pending
+        response.render()
+        entry = _cache_entry(response.content, response['Content-Type'])
+        caches[self.cache_alias].set(cache_key, entry, version=generation.number)
+        response['ETag'] = entry['etag']
+        return _finish(request, response, generation)
+
+    @staticmethod
+    def _cache_key(request):
+        # Typ mediów rozróżnia np. 'application/json; indent=4'
+        return _cache_key(f'{request.accepted_media_type}|{request.get_full_path()}')
+
+
+async def cached_json_response(request, build, cache_alias='api'):
+    """Odpowiedź JSON widoku asynchronicznego z tym samym cache co ``CachedResponseMixin``.
+
+    ``build`` to korutyna zwracająca dane do serializacji; wywoływana jest
+    tylko przy chybieniu. Trafienie nie dotyka bazy ani wątku ORM.
+    """
+    generation = await sync_to_async(current_generation)()
+    cache_key = _cache_key(f'async|{request.get_full_path()}')
+    cache = caches[cache_alias]
+    entry = await cache.aget(cache_key, version=generation.number)
+    if entry is None:
+        content = json.dumps(await build(), cls=DjangoJSONEncoder).encode('utf-8')
+        entry = _cache_entry(content, 'application/json')
+        await cache.aset(cache_key, entry, version=generation.number)
+    return _cached_response(request, entry, generation)
+
+
+def _cache_key(variant):
+    return 'api:' + hashlib.sha256(variant.encode('utf-8')).hexdigest()
+
+
+def _cache_entry(content, content_type):
+    return {
+        'content': content,
+        'content_type': content_type,
+        'etag': '"%s"' % hashlib.sha256(content).hexdigest(),
+    }
+
+
+def _cached_response(request, entry, generation):
+    response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    response['ETag'] = entry['etag']
+    return _finish(request, response, generation)
+
+
+def _finish(request, response, generation):
+    last_modified = None
+    if generation.modified is not None:
+        last_modified = int(generation.modified.timestamp())
+        response['Last-Modified'] = http_date(last_modified)
+    # Klient może trzymać odpowiedź, ale przed użyciem musi ją zwalidować
+    patch_cache_control(response, no_cache=True)
+    return get_conditional_response(
+        request, etag=response['ETag'], last_modified=last_modified, response=response,
+    )
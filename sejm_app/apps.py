@@ -1,6 +1,25 @@
 from django.apps import AppConfig
+from django.db.models.signals import pre_migrate
+
+# Schematy PostgreSQL, w których leżą tabele aplikacji (patrz create_schemas.py)
+APP_SCHEMAS = ('parliament', 'analysis')
+
+
+def create_app_schemas(using, **kwargs):
+    """Tworzy schematy przed migracjami, np. dla testowej bazy danych."""
+    from django.db import connections
+
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for schema_name in APP_SCHEMAS:
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {schema_name}')
 
 
 class SejmAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sejm_app'
+
+    def ready(self):
+        pre_migrate.connect(create_app_schemas, sender=self)
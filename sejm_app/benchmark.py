@@ -0,0 +1,254 @@
+import json
+import multiprocessing
+import os
+import random
+import re
+import resource
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+
+from sejm_app.parallel_import import init_worker
+
+CLUBS = ('PiS', 'KO', 'Lewica', 'PSL-TD', 'Polska2050-TD', 'Konfederacja')
+# Rozkład głosów zbliżony do prawdziwych głosowań
+VOTE_WEIGHTS = (('YES', 45), ('NO', 35), ('ABSTAIN', 8), ('ABSENT', 7), ('NOT_PARTICIPATING', 5))
+VOTINGS_PER_SITTING_DAY = 50
+
+
+@dataclass
+class FakeTerm:
+    """Parametry syntetycznej kadencji serwowanej przez ``FakeSejmApi``."""
+    term: int = 10
+    members: int = 460
+    votings: int = 500
+    # Ile posłów ma głos w każdym głosowaniu (domyślnie wszyscy)
+    votes_per_voting: int = None
+    # Opóźnienie każdej odpowiedzi i losowy dodatek do niego (sekundy)
+    latency: float = 0.0
+    jitter: float = 0.0
+    seed: int = 0
+
+    def __post_init__(self):
+        if self.votes_per_voting is None:
+            self.votes_per_voting = self.members
+        self.votes_per_voting = min(self.votes_per_voting, self.members)
+
+    def voting_key(self, index):
+        return index // VOTINGS_PER_SITTING_DAY + 1, index % VOTINGS_PER_SITTING_DAY + 1
+
+    def members_payload(self):
+        return [
+            {'id': mp_id, 'firstName': f'Imię{mp_id}', 'lastName': f'Nazwisko{mp_id}',
+             'club': CLUBS[mp_id % len(CLUBS)], 'districtName': f'Okręg {mp_id % 41 + 1}',
+             'districtNum': mp_id % 41 + 1, 'voivodeship': 'mazowieckie', 'active': True}
+            for mp_id in range(1, self.members + 1)
+        ]
+
+    def votings_payload(self):
+        return [self._summary(index) for index in range(self.votings)]
+
+    def _summary(self, index):
+        sitting_day, voting_number = self.voting_key(index)
+        return {
+            'sitting': (sitting_day + 1) // 2, 'sittingDay': sitting_day, 'votingNumber': voting_number,
+            'date': f'2024-{(sitting_day - 1) // 28 % 12 + 1:02d}-{(sitting_day - 1) % 28 + 1:02d}T10:{voting_number % 60:02d}:00',
+            'title': f'Głosowanie nad projektem ustawy nr {index + 1}', 'kind': 'ELECTRONIC',
+        }
+
+    def voting_payload(self, sitting_day, voting_number):
+        index = (sitting_day - 1) * VOTINGS_PER_SITTING_DAY + voting_number - 1
+        if not 0 <= index < self.votings or voting_number > VOTINGS_PER_SITTING_DAY:
+            return None
+        rng = random.Random(self.seed * 1_000_003 + index)
+        choices, weights = zip(*VOTE_WEIGHTS)
+        votes = [
+            {'MP': mp_id, 'firstName': f'Imię{mp_id}', 'lastName': f'Nazwisko{mp_id}',
+             'club': CLUBS[mp_id % len(CLUBS)], 'vote': vote}
+            for mp_id, vote in zip(range(1, self.votes_per_voting + 1), rng.choices(choices, weights, k=self.votes_per_voting))
+        ]
+        payload = self._summary(index)
+        payload.update({
+            'topic': f'Sprawozdanie komisji nr {index % 30 + 1}', 'majorityType': 'SIMPLE_MAJORITY',
+            'yes': sum(vote['vote'] == 'YES' for vote in votes),
+            'no': sum(vote['vote'] == 'NO' for vote in votes),
+            'abstain': sum(vote['vote'] == 'ABSTAIN' for vote in votes),
+            'totalVoted': len(votes), 'votes': votes,
+        })
+        return payload
+
+
+class _FakeApiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    detail_path = re.compile(r'^/sejm/term(\d+)/votings/(\d+)/(\d+)$')
+
+    def do_GET(self):
+        fake_term = self.server.fake_term
+        if fake_term.latency or fake_term.jitter:
+            time.sleep(fake_term.latency + random.uniform(0, fake_term.jitter))
+        prefix = f'/sejm/term{fake_term.term}'
+        payload = None
+        if self.path == f'{prefix}/MP':
+            payload = fake_term.members_payload()
+        elif self.path == f'{prefix}/votings':
+            payload = fake_term.votings_payload()
+        else:
+            match = self.detail_path.match(self.path)
+            if match and int(match.group(1)) == fake_term.term:
+                payload = fake_term.voting_payload(int(match.group(2)), int(match.group(3)))
+        status = 200 if payload is not None else 404
+        body = json.dumps(payload if payload is not None else {'error': 'not found'}, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _build_server(fake_term):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FakeApiHandler)
+    server.daemon_threads = True
+    server.fake_term = fake_term
+    return server
+
+
+def _serve_in_process(fake_term, ports):
+    server = _build_server(fake_term)
+    ports.put(server.server_port)
+    server.serve_forever()
+
+
+class FakeSejmApi:
+    """Lokalny serwer udający API Sejmu z syntetyczną kadencją ``FakeTerm``.
+
+    Domyślnie działa w osobnym procesie, żeby generowanie odpowiedzi nie
+    konkurowało o GIL z mierzonym importem; ``subprocess=False`` uruchamia
+    go w wątku (szybciej w testach).
+    """
+
+    def __init__(self, fake_term, subprocess=True):
+        self.fake_term = fake_term
+        self.subprocess = subprocess
+        self.base_url = None
+        self._server = None
+        self._process = None
+
+    def __enter__(self):
+        if self.subprocess:
+            context = multiprocessing.get_context('spawn')
+            ports = context.Queue()
+            self._process = context.Process(target=_serve_in_process, args=(self.fake_term, ports), daemon=True)
+            self._process.start()
+            port = ports.get(timeout=30)
+        else:
+            self._server = _build_server(self.fake_term)
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+            port = self._server.server_port
+        self.base_url = f'http://127.0.0.1:{port}'
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+@dataclass
+class BenchmarkResult:
+    wall_seconds: float
+    queries: int
+    # Szczyt RSS procesu (KiB) - obejmuje też pamięć sprzed pomiaru, dlatego
+    # run_import_benchmark_in_process mierzy każdy przebieg w nowym procesie
+    peak_rss_kib: int
+    members: int
+    votings: int
+    votes: int
+    votes_per_second: float
+    votings_per_second: float
+    import_args: list = field(default_factory=list)
+
+    def as_dict(self):
+        return asdict(self)
+
+
+@contextmanager
+def count_queries(counter):
+    """Zlicza zapytania SQL bieżącego połączenia bez zapamiętywania ich treści."""
+    def wrapper(execute, sql, params, many, context):
+        counter[0] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield
+
+
+def run_import_benchmark(base_url, term=10, import_args=()):
+    """Uruchamia ``import_sejm_data`` na ``base_url`` w bieżącej bazie i mierzy przebieg.
+
+    Baza powinna być pusta (np. świeżo utworzona baza testowa), inaczej
+    import tylko aktualizuje istniejące wiersze.
+    """
+    # Import modeli dopiero tu: procesy spawn (serwer FakeSejmApi) ładują ten
+    # moduł przed konfiguracją Django
+    from sejm_app.models import Member, Vote, Voting
+
+    counter = [0]
+    start = time.perf_counter()
+    with mock.patch.dict(os.environ, {'PARLIAMENT_API_BASE_URL': base_url}), count_queries(counter):
+        call_command('import_sejm_data', '--term', str(term), *import_args, stdout=StringIO(), stderr=StringIO())
+    wall_seconds = time.perf_counter() - start
+
+    votings = Voting.objects.filter(term=term).count()
+    votes = Vote.objects.filter(term=term).count()
+    return BenchmarkResult(
+        wall_seconds=round(wall_seconds, 3),
+        queries=counter[0],
+        peak_rss_kib=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        members=Member.objects.filter(term=term).count(),
+        votings=votings,
+        votes=votes,
+        votes_per_second=round(votes / wall_seconds, 1),
+        votings_per_second=round(votings / wall_seconds, 2),
+        import_args=list(import_args),
+    )
+
+
+def _benchmark_in_worker(database_name, generation_file, base_url, term, import_args):
+    from django.db import connections
+    from django.test import override_settings
+
+    # Jak create_test_db: proces potomny czyta ustawienia od nowa, z nazwą bazy produkcyjnej
+    connections['default'].settings_dict['NAME'] = database_name
+    try:
+        with override_settings(SEJM_DATA_GENERATION_FILE=generation_file):
+            return run_import_benchmark(base_url, term=term, import_args=import_args)
+    finally:
+        # Bez otwartych połączeń proces nie blokuje usunięcia bazy po pomiarze
+        connections.close_all()
+
+
+def run_import_benchmark_in_process(database_name, generation_file, base_url, term=10, import_args=()):
+    """Jak ``run_import_benchmark``, ale w nowym procesie na bazie ``database_name``.
+
+    ``ru_maxrss`` jest szczytem z całego życia procesu, więc tylko świeży
+    proces na każdy przebieg daje szczyt RSS tego jednego importu.
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=init_worker, initargs=(None,)) as executor:
+        return executor.submit(
+            _benchmark_in_worker, database_name, generation_file, base_url, term, list(import_args),
+        ).result()
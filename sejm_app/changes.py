@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+
+from django.db import connection
+
+from sejm_app.models import ChangeLogEntry, Voting
+
+# Dziennik zmian parliament.change_log (migracja 0012) dla odbiorców, którzy
+# po imporcie pobierają tylko nowe i zmienione głosowania oraz posłów.
+# Wiersze dopisują triggery na votings i members; TRUNCATE i podmiana partycji
+# (sejm_app.partitions) ich nie uruchamiają, więc zapisują zmiany same.
+
+# Klucz blokady doradczej PostgreSQL, pod którą trigger odroczony nadaje numery seq
+# (wpisany na stałe w funkcji parliament.change_log_assign_seq)
+CHANGE_LOG_LOCK = 0x5E1A0003
+CHANGE_FEED_LIMIT = 500
+MAX_CHANGE_FEED_LIMIT = 5000
+
+
+def _change_log_table():
+    return connection.ops.quote_name(ChangeLogEntry._meta.db_table)
+
+
+@contextmanager
+def suppress_change_log(cursor):
+    """Wyłącza triggery dziennika do końca bloku (w bieżącej transakcji)."""
+    cursor.execute("SELECT set_config('sejm.change_log', 'off', true)")
+    try:
+        yield
+    finally:
+        cursor.execute("SELECT set_config('sejm.change_log', '', true)")
+
+
+def log_deleted_votings(cursor, table, term):
+    """Zapisuje usunięcie wszystkich głosowań z ``table`` - przed jej TRUNCATE."""
+    cursor.execute(
+        f"INSERT INTO {_change_log_table()} (kind, object_id, term, created_at) "
+        f"SELECT 'voting.deleted', id, %s, now() FROM {table} ORDER BY id",
+        [term],
+    )
+
+
+def log_replaced_votings(cursor, old_table, new_table, term):
+    """Zapisuje różnice między partycją głosowań ``old_table`` a jej następczynią ``new_table``.
+
+    Głosowania zachowują ``id`` przy przebudowie, więc porównanie po ``id``
+    daje nowe, usunięte i te, w których zmieniła się którakolwiek kolumna.
+    """
+    quote_name = connection.ops.quote_name
+    columns = [quote_name(field.column) for field in Voting._meta.concrete_fields if not field.primary_key]
+    old_row = ', '.join(f'o.{column}' for column in columns)
+    new_row = ', '.join(f'n.{column}' for column in columns)
+    cursor.execute(
+        f"""
+        INSERT INTO {_change_log_table()} (kind, object_id, term, created_at)
+        SELECT CASE WHEN o.id IS NULL THEN 'voting.created'
+                    WHEN n.id IS NULL THEN 'voting.deleted'
+                    ELSE 'voting.updated' END,
+               coalesce(n.id, o.id), %s, now()
+        FROM {old_table} o
+        FULL JOIN {new_table} n ON n.id = o.id
+        WHERE o.id IS NULL OR n.id IS NULL OR ({old_row}) IS DISTINCT FROM ({new_row})
+        ORDER BY coalesce(n.id, o.id)
+        """,
+        [term],
+    )
+
+
+def changes_since(since):
+    """Zatwierdzone wpisy dziennika z numerem większym niż ``since``, po kolei."""
+    return ChangeLogEntry.objects.filter(seq__gt=since).order_by('seq')
+
+
+def serialize_change(entry):
+    return {
+        'seq': entry.seq,
+        'kind': entry.kind,
+        'object_id': entry.object_id,
+        'term': entry.term,
+        'created_at': entry.created_at,
+    }
@@ -0,0 +1,146 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from sejm_app.models import Vote, VoteChoice
+
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+# Formaty tekstowe, które da się wysyłać strumieniowo przez HTTP
+TEXT_FORMATS = ('csv', 'jsonl')
+
+# Kolumny eksportu: nazwa -> wyrażenie dla values_list()
+EXPORT_COLUMNS = {
+    'voting_id': F('voting_id'),
+    'term': F('term'),
+    'sitting': F('voting__sitting'),
+    'sitting_day': F('voting__sitting_day'),
+    'voting_number': F('voting__voting_number'),
+    'date': F('voting__date'),
+    'title': F('voting__title'),
+    'member_id': F('member_id'),
+    'mp_id_api': F('mp_id_api'),
+    # Nazwisko z Member, a dla nierozpoznanych posłów - zapisane przy głosie
+    'first_name': Coalesce('member__first_name', 'first_name'),
+    'last_name': Coalesce('member__last_name', 'last_name'),
+    'club': F('club__code'),
+    'vote': F('vote_choice'),
+}
+
+_VOTE_NAMES = {choice.value: choice.name for choice in VoteChoice}
+_DATE_INDEX = list(EXPORT_COLUMNS).index('date')
+
+
+def export_queryset(term=None, sitting=None, date_from=None, date_to=None):
+    """Głosy imienne z danymi głosowania i posła; ``date_from``/``date_to`` to daty (włącznie)."""
+    # Przy pgbouncer w trybie transakcyjnym osobny alias omija pooler (patrz settings.DATABASES)
+    queryset = Vote.objects.using(settings.SEJM_STREAMING_DATABASE)
+    if term is not None:
+        # Warunek na obu tabelach - przycinanie partycji głosów i głosowań
+        queryset = queryset.filter(term=term, voting__term=term)
+    if sitting is not None:
+        queryset = queryset.filter(voting__sitting=sitting)
+    # Granice jako znaczniki czasu, żeby warunek mógł użyć indeksu (term, date)
+    if date_from is not None:
+        queryset = queryset.filter(voting__date__gte=timezone.make_aware(datetime.combine(date_from, time.min)))
+    if date_to is not None:
+        queryset = queryset.filter(voting__date__lt=timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min)))
+    return (
+        queryset.order_by('voting_id', 'member_id', 'id')
+        .values_list(*EXPORT_COLUMNS.values())
+    )
+
+
+def iter_export_rows(queryset, chunk_size=5000):
+    """Krotki w kolejności ``EXPORT_COLUMNS`` czytane kursorem po stronie serwera.
+
+    ``iterator(chunk_size)`` pobiera naraz tylko ``chunk_size`` wierszy,
+    więc pamięć nie zależy od rozmiaru eksportu. Kod głosu zamieniany jest
+    na nazwę z API (np. 'YES').
+    """
+    for row in queryset.iterator(chunk_size=chunk_size):
+        yield row[:-1] + (_VOTE_NAMES.get(row[-1]),)
+
+
+class _Echo:
+    """Plik-atrapa dla ``csv.writer``: zwraca zapisany tekst zamiast go buforować."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(_text_row(row))
+
+
+def iter_jsonl(rows):
+    columns = list(EXPORT_COLUMNS)
+    for row in rows:
+        yield json.dumps(dict(zip(columns, _text_row(row))), ensure_ascii=False) + '\n'
+
+
+def iter_text(export_format, rows):
+    if export_format == 'csv':
+        return iter_csv(rows)
+    if export_format == 'jsonl':
+        return iter_jsonl(rows)
+    raise ValueError(f'Not a text export format: {export_format!r}')
+
+
+def _text_row(row):
+    date = row[_DATE_INDEX]
+    if date is None:
+        return row
+    return row[:_DATE_INDEX] + (date.isoformat(),) + row[_DATE_INDEX + 1:]
+
+
+def write_parquet(rows, path, row_group_size=50000):
+    """Zapisuje wiersze do pliku Parquet grupami po ``row_group_size`` wierszy (wymaga pyarrow)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImportError('Parquet export requires the optional pyarrow package (pip install pyarrow).') from exc
+
+    schema = pa.schema([
+        ('voting_id', pa.int64()),
+        ('term', pa.int32()),
+        ('sitting', pa.int32()),
+        ('sitting_day', pa.int32()),
+        ('voting_number', pa.int32()),
+        ('date', pa.timestamp('us', tz='UTC')),
+        ('title', pa.string()),
+        ('member_id', pa.int64()),
+        ('mp_id_api', pa.int32()),
+        ('first_name', pa.string()),
+        ('last_name', pa.string()),
+        ('club', pa.string()),
+        # Parquet sam koduje powtarzalne teksty słownikiem
+        ('vote', pa.string()),
+    ])
+    written = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= row_group_size:
+                writer.write_table(_parquet_table(pa, schema, batch))
+                written += len(batch)
+                batch = []
+        if batch or not written:
+            writer.write_table(_parquet_table(pa, schema, batch))
+            written += len(batch)
+    return written
+
+
+def _parquet_table(pa, schema, batch):
+    columns = list(zip(*batch)) if batch else [[] for _ in schema]
+    arrays = [pa.array(values, type=field.type) for field, values in zip(schema, columns)]
+    return pa.Table.from_arrays(arrays, schema=schema)
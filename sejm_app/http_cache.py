@@ -0,0 +1,157 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    body: bytes
+    etag: str = None
+    last_modified: str = None
+    fetched_at: float = 0.0
+    content_hash: str = None
+
+
+class ResponseCache:
+    """Dyskowa pamięć podręczna surowych odpowiedzi API.
+
+    Treści leżą w ``objects/`` pod skrótem SHA-256 zawartości (skompresowane
+    gzipem, identyczne odpowiedzi zapisywane są raz), a ``urls/`` trzyma dla
+    każdego URL-a mały plik z metadanymi: skrót treści, ETag, Last-Modified
+    i czas pobrania. ``ttl`` (sekundy) określa, jak długo wpis jest świeży
+    bez rewalidacji; None oznacza, że wpisy nie wygasają.
+    """
+
+    def __init__(self, directory, ttl=None):
+        self.directory = Path(directory)
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def _meta_path(self, url):
+        key = self._key(url)
+        return self.directory / 'urls' / key[:2] / f'{key}.json'
+
+    def _object_path(self, content_hash):
+        return self.directory / 'objects' / content_hash[:2] / f'{content_hash}.gz'
+
+    @staticmethod
+    def _write_atomic(path, data):
+        # Zapis przez plik tymczasowy + rename, żeby równoległe wątki nie czytały połówek
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _read_meta(self, url):
+        try:
+            with open(self._meta_path(url), encoding='utf-8') as meta_file:
+                return json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+
+    def lookup(self, url):
+        """Zwraca metadane wpisu (``CachedResponse`` bez treści) albo None."""
+        meta = self._read_meta(url)
+        if meta is None or 'content_hash' not in meta:
+            return None
+        if not self._object_path(meta['content_hash']).exists():
+            return None
+        return CachedResponse(
+            url=url,
+            body=None,
+            etag=meta.get('etag'),
+            last_modified=meta.get('last_modified'),
+            fetched_at=meta.get('fetched_at', 0.0),
+            content_hash=meta['content_hash'],
+        )
+
+    def get(self, url):
+        """Zwraca ``CachedResponse`` z treścią dla ``url`` albo None, jeśli go nie ma."""
+        entry = self.lookup(url)
+        if entry is None:
+            return None
+        try:
+            with gzip.open(self._object_path(entry.content_hash), 'rb') as body_file:
+                entry.body = body_file.read()
+        except OSError:
+            return None
+        return entry
+
+    def iter_body(self, entry, chunk_size=64 * 1024):
+        """Czyta treść wpisu kawałkami, bez ładowania całości do pamięci."""
+        with gzip.open(self._object_path(entry.content_hash), 'rb') as body_file:
+            while True:
+                chunk = body_file.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def store_stream(self, url, chunks, etag=None, last_modified=None):
+        """Przepuszcza ``chunks`` dalej, zapisując je w tle do cache.
+
+        Wpis jest zapisywany dopiero po przeczytaniu całego strumienia,
+        więc przerwane pobieranie nie zostawia uciętej odpowiedzi.
+        """
+        self.directory.joinpath('objects').mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory / 'objects', prefix='.tmp-')
+        content_hash = hashlib.sha256()
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file, gzip.GzipFile(fileobj=tmp_file, mode='wb') as gzip_file:
+                for chunk in chunks:
+                    content_hash.update(chunk)
+                    gzip_file.write(chunk)
+                    yield chunk
+            object_path = self._object_path(content_hash.hexdigest())
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, object_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._write_meta(url, {
+            'url': url,
+            'content_hash': content_hash.hexdigest(),
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time(),
+        })
+
+    def is_fresh(self, entry):
+        return self.ttl is None or time.time() - entry.fetched_at < self.ttl
+
+    def store(self, url, body, etag=None, last_modified=None):
+        content_hash = hashlib.sha256(body).hexdigest()
+        object_path = self._object_path(content_hash)
+        if not object_path.exists():
+            self._write_atomic(object_path, gzip.compress(body))
+        self._write_meta(url, {
+            'url': url,
+            'content_hash': content_hash,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time(),
+        })
+
+    def touch(self, url):
+        """Oznacza wpis jako świeży po odpowiedzi 304 Not Modified."""
+        meta = self._read_meta(url)
+        if meta is not None:
+            meta['fetched_at'] = time.time()
+            self._write_meta(url, meta)
+
+    def _write_meta(self, url, meta):
+        self._write_atomic(self._meta_path(url), json.dumps(meta).encode('utf-8'))
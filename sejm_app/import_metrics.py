@@ -0,0 +1,176 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from sejm_app.load_test import percentile_ms
+
+# Górne granice kubełków histogramu czasu zapytań HTTP (sekundy)
+HTTP_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class ImportMetrics:
+    """Liczniki i czasy jednego przebiegu ``import_sejm_data``.
+
+    Fazy (``phase``) mierzą czas ściany poszczególnych kroków, zapytania HTTP
+    trafiają do histogramu (``observe_request`` wołane z wątków klienta API),
+    a ``add_rows`` zlicza zapisane wiersze. Zdarzenia mogą być dopisywane jako
+    linie JSON do ``events_path``, a stan zapisywany w formacie tekstowym
+    Prometheusa (``write_textfile``) dla node_exporter --collector.textfile.
+    """
+
+    def __init__(self, term, events_path=None):
+        self.term = term
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.phase_seconds = defaultdict(float)
+        self.rows = Counter()
+        self.errors = Counter()
+        self.http_requests = Counter()
+        self.http_retries = 0
+        self.http_latencies = []
+        self.http_bucket_counts = [0] * (len(HTTP_LATENCY_BUCKETS) + 1)
+        self.parse_seconds = 0.0
+        self._lock = threading.Lock()
+        self._events = open(events_path, 'a', encoding='utf-8') if events_path else None
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self._start
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.phase_seconds[name] += seconds
+            self.event('phase', phase=name, seconds=round(seconds, 6))
+
+    def observe_request(self, url, status, seconds, retries=0):
+        """Callback ``on_request`` klienta API; ``status`` to kod HTTP albo 'cache'."""
+        with self._lock:
+            self.http_requests[str(status)] += 1
+            self.http_retries += retries
+            if status != 'cache':
+                self.http_latencies.append(seconds)
+                self.http_bucket_counts[bisect_left(HTTP_LATENCY_BUCKETS, seconds)] += 1
+
+    def observe_parse(self, url, seconds):
+        """Callback ``on_parse`` klienta API - czas dekodowania JSON, sumowany ze wszystkich wątków."""
+        with self._lock:
+            self.parse_seconds += seconds
+
+    def add_rows(self, kind, count):
+        self.rows[kind] += count
+
+    def count_error(self, kind):
+        with self._lock:
+            self.errors[kind] += 1
+
+    def rows_per_second(self, kind, phase=None):
+        seconds = self.phase_seconds.get(phase) if phase else self.elapsed
+        return self.rows[kind] / seconds if seconds else 0.0
+
+    def event(self, name, **fields):
+        if self._events is None:
+            return
+        record = {'ts': round(time.time(), 3), 'event': name, 'term': self.term, **fields}
+        with self._lock:
+            self._events.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._events.flush()
+
+    def summary(self):
+        with self._lock:
+            latencies = list(self.http_latencies)
+        return {
+            'term': self.term,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'phases': {name: round(seconds, 3) for name, seconds in self.phase_seconds.items()},
+            'rows': dict(self.rows),
+            'rows_per_second': {kind: round(self.rows_per_second(kind), 1) for kind in self.rows},
+            'http': {
+                'requests': dict(self.http_requests),
+                'retries': self.http_retries,
+                'p50_ms': round(percentile_ms(latencies, 50), 2) if latencies else None,
+                'p95_ms': round(percentile_ms(latencies, 95), 2) if latencies else None,
+                'p99_ms': round(percentile_ms(latencies, 99), 2) if latencies else None,
+                'parse_seconds': round(self.parse_seconds, 3),
+            },
+            'errors': dict(self.errors),
+        }
+
+    def write_textfile(self, path):
+        """Zapisuje metryki w formacie tekstowym Prometheusa (plik musi mieć rozszerzenie .prom)."""
+        term = f'term="{self.term}"'
+        lines = [
+            '# HELP sejm_import_last_run_timestamp_seconds Start time of the last import run.',
+            '# TYPE sejm_import_last_run_timestamp_seconds gauge',
+            f'sejm_import_last_run_timestamp_seconds{{{term}}} {self.started:.3f}',
+            '# HELP sejm_import_duration_seconds Wall time of the last import run.',
+            '# TYPE sejm_import_duration_seconds gauge',
+            f'sejm_import_duration_seconds{{{term}}} {self.elapsed:.3f}',
+            '# HELP sejm_import_phase_seconds Wall time spent in each import phase.',
+            '# TYPE sejm_import_phase_seconds gauge',
+        ]
+        lines += [
+            f'sejm_import_phase_seconds{{{term},phase="{name}"}} {seconds:.6f}'
+            for name, seconds in sorted(self.phase_seconds.items())
+        ]
+        lines += [
+            '# HELP sejm_import_rows_total Rows written by the import run.',
+            '# TYPE sejm_import_rows_total counter',
+        ]
+        lines += [f'sejm_import_rows_total{{{term},kind="{kind}"}} {count}' for kind, count in sorted(self.rows.items())]
+        lines += [
+            '# HELP sejm_import_errors_total Errors reported by the import run.',
+            '# TYPE sejm_import_errors_total counter',
+        ]
+        lines += [f'sejm_import_errors_total{{{term},kind="{kind}"}} {count}' for kind, count in sorted(self.errors.items())]
+        with self._lock:
+            lines += [
+                '# HELP sejm_import_http_requests_total API requests by HTTP status ("cache" for cached responses).',
+                '# TYPE sejm_import_http_requests_total counter',
+            ]
+            lines += [
+                f'sejm_import_http_requests_total{{{term},status="{status}"}} {count}'
+                for status, count in sorted(self.http_requests.items())
+            ]
+            lines += [
+                '# HELP sejm_import_http_retries_total API requests retried after a failure.',
+                '# TYPE sejm_import_http_retries_total counter',
+                f'sejm_import_http_retries_total{{{term}}} {self.http_retries}',
+                '# HELP sejm_import_http_request_duration_seconds Latency of API requests sent over the network.',
+                '# TYPE sejm_import_http_request_duration_seconds histogram',
+            ]
+            cumulative = 0
+            for bound, count in zip(HTTP_LATENCY_BUCKETS + ('+Inf',), self.http_bucket_counts):
+                cumulative += count
+                lines.append(f'sejm_import_http_request_duration_seconds_bucket{{{term},le="{bound}"}} {cumulative}')
+            lines += [
+                f'sejm_import_http_request_duration_seconds_sum{{{term}}} {sum(self.http_latencies):.6f}',
+                f'sejm_import_http_request_duration_seconds_count{{{term}}} {len(self.http_latencies)}',
+            ]
+
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        # Zapis przez plik tymczasowy + rename - kolektor nie przeczyta połowy pliku
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as tmp_file:
+                tmp_file.write('\n'.join(lines) + '\n')
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def close(self):
+        if self._events is not None:
+            self._events.close()
+            self._events = None
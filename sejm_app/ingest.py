@@ -0,0 +1,126 @@
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+
+from django.db import connection
+
+from sejm_app.models import Member, Vote
+
+
+class VoteBulkWriter:
+    """Buforuje indywidualne głosy i zapisuje je wsadowo.
+
+    Każda paczka to jeden ``INSERT ... ON CONFLICT (voting_id, member_id, term) DO UPDATE``,
+    więc ponowny import głosowania nadpisuje istniejące głosy bez osobnych
+    zapytań na wiersz. Paczki mogą obejmować wiele głosowań.
+    """
+
+    UPDATE_FIELDS = ['mp_id_api', 'first_name', 'last_name', 'club', 'vote_choice']
+
+    def __init__(self, batch_size=5000):
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self.elapsed = 0.0
+        self._pending = {}
+        self._pending_unlinked = []
+
+    def __len__(self):
+        return len(self._pending) + len(self._pending_unlinked)
+
+    def add(self, vote):
+        if vote.member_id is None:
+            # Bez posła nie ma konfliktu na (voting, member) - zwykły INSERT
+            self._pending_unlinked.append(vote)
+        else:
+            # Duplikat w jednej paczce wywołałby błąd ON CONFLICT, wygrywa ostatni
+            self._pending[(vote.voting_id, vote.member_id)] = vote
+        if len(self) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not len(self):
+            return
+        start = time.perf_counter()
+        if self._pending:
+            Vote.objects.bulk_create(
+                list(self._pending.values()),
+                update_conflicts=True,
+                unique_fields=['voting', 'member', 'term'],
+                update_fields=self.UPDATE_FIELDS,
+            )
+        if self._pending_unlinked:
+            Vote.objects.bulk_create(self._pending_unlinked)
+        self.elapsed += time.perf_counter() - start
+        self.rows_written += len(self)
+        self._pending = {}
+        self._pending_unlinked = []
+
+    @property
+    def rows_per_second(self):
+        return self.rows_written / self.elapsed if self.elapsed else 0.0
+
+
+def summary_hash(voting_summary_info):
+    """Skrót wpisu z listy ``/votings``; zmiana skrótu oznacza zmienione głosowanie."""
+    payload = json.dumps(voting_summary_info, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# Pola posła aktualizowane przy synchronizacji (poza kluczem sejm_id)
+MEMBER_SYNC_FIELDS = [
+    'first_name', 'last_name', 'club', 'district_name', 'district_num',
+    'voivodeship', 'email', 'active',
+]
+
+
+@dataclass
+class MemberSyncResult:
+    created: list = field(default_factory=list)
+    updated: list = field(default_factory=list)
+    unchanged: int = 0
+    deactivated: int = 0
+    # sejm_id -> (imię, nazwisko) utworzonych i zaktualizowanych posłów, do logu
+    names: dict = field(default_factory=dict)
+
+
+def sync_members(term, member_rows, deactivate_missing=True):
+    """Synchronizuje posłów kadencji ``term`` z danymi z API operacjami na zbiorach.
+
+    ``member_rows`` to słowniki z ``sejm_id`` i polami z ``MEMBER_SYNC_FIELDS``.
+    Wszystkie wiersze idą jednym ``INSERT ... ON CONFLICT (term, sejm_id) DO UPDATE``
+    z warunkiem ``IS DISTINCT FROM``, więc niezmienieni posłowie nie są
+    w ogóle zapisywani (brak martwych krotek). Z ``deactivate_missing``
+    dezaktywowani są tylko aktywni posłowie tej kadencji nieobecni w danych.
+    """
+    # Ostatni wpis dla danego sejm_id wygrywa - ON CONFLICT nie może dotknąć wiersza dwa razy
+    staged = {row['sejm_id']: row for row in member_rows}
+    result = MemberSyncResult()
+    if staged:
+        quote_name = connection.ops.quote_name
+        columns = ['term', 'sejm_id'] + MEMBER_SYNC_FIELDS
+        column_list = ', '.join(quote_name(column) for column in columns)
+        row_placeholder = '(%s)' % ', '.join(['%s'] * len(columns))
+        target = ', '.join(f'{quote_name("m")}.{quote_name(column)}' for column in MEMBER_SYNC_FIELDS)
+        excluded = ', '.join(f'EXCLUDED.{quote_name(column)}' for column in MEMBER_SYNC_FIELDS)
+        assignments = ', '.join(f'{quote_name(column)} = EXCLUDED.{quote_name(column)}' for column in MEMBER_SYNC_FIELDS)
+        sql = (
+            f'INSERT INTO {quote_name(Member._meta.db_table)} AS {quote_name("m")} ({column_list}) '
+            f'VALUES {", ".join([row_placeholder] * len(staged))} '
+            f'ON CONFLICT ({quote_name("term")}, {quote_name("sejm_id")}) DO UPDATE SET {assignments} '
+            f'WHERE ({target}) IS DISTINCT FROM ({excluded}) '
+            # xmax = 0 tylko dla świeżo wstawionych wierszy
+            f'RETURNING {quote_name("m")}.{quote_name("sejm_id")}, (xmax = 0), '
+            f'{quote_name("m")}.{quote_name("first_name")}, {quote_name("m")}.{quote_name("last_name")}'
+        )
+        params = [term if column == 'term' else row.get(column) for row in staged.values() for column in columns]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            for sejm_id, inserted, first_name, last_name in cursor.fetchall():
+                (result.created if inserted else result.updated).append(sejm_id)
+                result.names[sejm_id] = (first_name, last_name)
+        result.unchanged = len(staged) - len(result.created) - len(result.updated)
+
+    if deactivate_missing:
+        result.deactivated = Member.objects.filter(term=term, active=True).exclude(sejm_id__in=list(staged)).update(active=False)
+    return result
@@ -0,0 +1,80 @@
+import codecs
+import json
+
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_json_array(chunks, encoding='utf-8'):
+    """Generator elementów tablicy JSON najwyższego poziomu czytanej kawałkami.
+
+    ``chunks`` to iterowalny strumień bajtów (np. ``response.iter_content()``).
+    W pamięci jest naraz tylko bieżący fragment tekstu i jeden element,
+    a nie całe drzewo obiektów, więc zużycie pamięci nie zależy od długości
+    tablicy. Rzuca ``ValueError`` dla niepoprawnego lub uciętego JSON-a.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder(encoding)()
+    chunks = iter(chunks)
+    buffer = ''
+    position = 0
+    exhausted = False
+    # Stany: przed '[', przed elementem, po elemencie (',' albo ']'), koniec
+    state = 'start'
+
+    def fill():
+        nonlocal buffer, position, exhausted
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            buffer = buffer[position:] + text_decoder.decode(b'', final=True)
+            exhausted = True
+        else:
+            buffer = buffer[position:] + text_decoder.decode(chunk)
+        position = 0
+
+    while True:
+        while position < len(buffer) and buffer[position] in _WHITESPACE:
+            position += 1
+        if position >= len(buffer):
+            if exhausted:
+                if state == 'end':
+                    return
+                raise ValueError('Unexpected end of JSON array stream')
+            fill()
+            continue
+
+        char = buffer[position]
+        if state == 'start':
+            if char != '[':
+                raise ValueError(f'Expected a JSON array, got {char!r}')
+            position += 1
+            state = 'first_item'
+        elif state in ('first_item', 'item'):
+            if state == 'first_item' and char == ']':
+                position += 1
+                state = 'end'
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise
+                fill()
+                continue
+            if end == len(buffer) and not exhausted:
+                # Liczba lub literał mogą ciągnąć się w następnym kawałku
+                fill()
+                continue
+            position = end
+            state = 'separator'
+            yield item
+        elif state == 'separator':
+            position += 1
+            if char == ',':
+                state = 'item'
+            elif char == ']':
+                state = 'end'
+            else:
+                raise ValueError(f'Expected "," or "]" in JSON array, got {char!r}')
+        else:
+            raise ValueError(f'Unexpected data after JSON array: {char!r}')
@@ -0,0 +1,66 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import requests
+
+
+@dataclass
+class LoadResult:
+    url: str
+    concurrency: int
+    elapsed: float = 0.0
+    # Czasy odpowiedzi w sekundach, tylko udane żądania
+    latencies: list = field(default_factory=list)
+    errors: int = 0
+
+    @property
+    def requests_per_second(self):
+        return len(self.latencies) / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, percent):
+        return percentile_ms(self.latencies, percent)
+
+
+def percentile_ms(latencies, percent):
+    """Percentyl czasów w sekundach, zwracany w milisekundach (metoda najbliższej rangi)."""
+    if not latencies:
+        return float('nan')
+    ordered = sorted(latencies)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1] * 1000
+
+
+def run_load(url, total_requests, concurrency, timeout=30):
+    """Wysyła ``total_requests`` GET-ów na ``url`` z ``concurrency`` wątków keep-alive.
+
+    Każdy wątek ma własną sesję ``requests``, więc mierzony jest serwer,
+    a nie zestawianie połączeń TCP. Statusy inne niż 2xx/304 liczą się jako błędy.
+    """
+    result = LoadResult(url=url, concurrency=concurrency)
+    local = threading.local()
+    lock = threading.Lock()
+
+    def fetch(_):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = session.get(url, timeout=timeout)
+            ok = response.status_code < 300 or response.status_code == 304
+        except requests.RequestException:
+            ok = False
+        latency = time.perf_counter() - start
+        with lock:
+            if ok:
+                result.latencies.append(latency)
+            else:
+                result.errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(fetch, range(total_requests)))
+    result.elapsed = time.perf_counter() - start
+    return result
@@ -0,0 +1,64 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from sejm_app.load_test import percentile_ms
+from sejm_app.models import Voting
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares a fresh database connection per request (CONN_MAX_AGE=0) with persistent '
+        'connections, reporting requests/sec and latency percentiles of a typical API read.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Simulated requests per mode.')
+        parser.add_argument('--concurrency', type=int, default=16, help='Worker threads, each with its own connection.')
+        parser.add_argument('--database', default='default', help='Database alias to benchmark (e.g. pointing at pgbouncer).')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be at least 1.')
+        alias = options['database']
+        if alias not in connections:
+            raise CommandError(f'Unknown database alias: {alias}')
+        settings_dict = connections[alias].settings_dict
+        self.stdout.write(
+            f"Database {alias} at {settings_dict['HOST']}:{settings_dict['PORT']} "
+            f"(CONN_MAX_AGE={settings_dict['CONN_MAX_AGE']}, "
+            f"server-side cursors {'off' if settings_dict.get('DISABLE_SERVER_SIDE_CURSORS') else 'on'})."
+        )
+
+        self.stdout.write(f"{'mode':<25}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for label, persistent in (('new connection', False), ('persistent connection', True)):
+            elapsed, latencies = self._run(alias, options['requests'], options['concurrency'], persistent)
+            self.stdout.write(
+                f'{label:<25}{len(latencies) / elapsed:>10.1f}'
+                f'{percentile_ms(latencies, 50):>10.2f}{percentile_ms(latencies, 99):>10.2f}'
+            )
+
+    def _run(self, alias, total_requests, concurrency, persistent):
+        latencies = []
+        lock = threading.Lock()
+
+        def request(_):
+            # Połączenia Django są per wątek - każdy wątek puli to osobny "worker"
+            connection = connections[alias]
+            start = time.perf_counter()
+            list(Voting.objects.using(alias).order_by('-id').values_list('id', 'title')[:20])
+            if not persistent:
+                # To samo, co koniec żądania przy CONN_MAX_AGE=0
+                connection.close()
+            latency = time.perf_counter() - start
+            with lock:
+                latencies.append(latency)
+
+        # Połączenia wątków są zamykane wraz z końcem puli, więc tryby się nie mieszają
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(request, range(total_requests)))
+        return time.perf_counter() - start, latencies
@@ -0,0 +1,122 @@
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from sejm_app.benchmark import FakeSejmApi, FakeTerm, run_import_benchmark_in_process
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks import_sejm_data against a local fake Sejm API with a synthetic term, '
+        'on a throwaway test database, and appends the results to a JSON-lines history file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', type=int, default=10, help='Term number served by the fake API.')
+        parser.add_argument('--members', type=int, default=460, help='Number of MPs in the synthetic term.')
+        parser.add_argument('--votings', type=int, default=500, help='Number of votings in the synthetic term.')
+        parser.add_argument('--votes-per-voting', type=int, help='Individual votes per voting (default: all MPs).')
+        parser.add_argument('--latency-ms', type=float, default=0.0, help='Delay added to every fake API response.')
+        parser.add_argument('--jitter-ms', type=float, default=0.0, help='Random extra delay of up to this many ms.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the generated votes.')
+        parser.add_argument('--runs', type=int, default=1, help='Import runs, each on a freshly created database.')
+        parser.add_argument(
+            '--import-args',
+            default='--concurrency 8',
+            help='Extra arguments passed to import_sejm_data, as one string (use --import-args="--concurrency 4").',
+        )
+        parser.add_argument(
+            '--results-file',
+            default=os.path.join(settings.BASE_DIR, 'var', 'benchmarks', 'import.jsonl'),
+            help='JSON-lines file the results are appended to ("" disables it).',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The importer uses PostgreSQL-specific SQL - benchmark it on PostgreSQL.')
+        if options['runs'] < 1:
+            raise CommandError('--runs must be at least 1.')
+
+        fake_term = FakeTerm(
+            term=options['term'], members=options['members'], votings=options['votings'],
+            votes_per_voting=options['votes_per_voting'], latency=options['latency_ms'] / 1000,
+            jitter=options['jitter_ms'] / 1000, seed=options['seed'],
+        )
+        import_args = options['import_args'].split()
+        parameters = {
+            'members': fake_term.members, 'votings': fake_term.votings,
+            'votes_per_voting': fake_term.votes_per_voting, 'latency_ms': options['latency_ms'],
+            'jitter_ms': options['jitter_ms'], 'seed': fake_term.seed, 'import_args': import_args,
+        }
+        self.stdout.write(f'Benchmarking import of a synthetic term: {json.dumps(parameters)}')
+
+        previous = self._previous_result(options['results_file'], parameters)
+        results = []
+        with FakeSejmApi(fake_term) as fake_api:
+            for run in range(1, options['runs'] + 1):
+                result = self._run_on_throwaway_database(fake_api.base_url, fake_term.term, import_args)
+                results.append(result)
+                self.stdout.write(
+                    f'Run {run}: {result.wall_seconds:.2f}s, {result.queries} queries, '
+                    f'{result.votes_per_second:.0f} votes/s, {result.votings_per_second:.1f} votings/s, '
+                    f'peak RSS {result.peak_rss_kib / 1024:.0f} MiB'
+                )
+
+        best = min(results, key=lambda result: result.wall_seconds)
+        record = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'commit': self._git_commit(),
+            'parameters': parameters,
+            'runs': len(results),
+            'best': best.as_dict(),
+        }
+        if previous:
+            change = (best.wall_seconds - previous['best']['wall_seconds']) / previous['best']['wall_seconds'] * 100
+            self.stdout.write(f"Best wall time {best.wall_seconds:.2f}s ({change:+.1f}% vs {previous.get('commit') or 'previous run'}).")
+        if options['results_file']:
+            os.makedirs(os.path.dirname(options['results_file']) or '.', exist_ok=True)
+            with open(options['results_file'], 'a', encoding='utf-8') as results_file:
+                results_file.write(json.dumps(record) + '\n')
+            self.stdout.write(f"Appended results to {options['results_file']}.")
+
+    def _run_on_throwaway_database(self, base_url, term, import_args):
+        # Baza testowa (test_<nazwa>) z pełnymi migracjami, usuwana po pomiarze
+        original_name = connection.settings_dict['NAME']
+        test_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            # Generacje danych z bazy testowej nie mogą trafić do pliku generacji API;
+            # import w osobnym procesie, żeby szczyt RSS dotyczył tylko tego przebiegu
+            with tempfile.TemporaryDirectory() as directory:
+                return run_import_benchmark_in_process(
+                    test_name, os.path.join(directory, 'generation.json'), base_url, term=term, import_args=import_args,
+                )
+        finally:
+            connection.creation.destroy_test_db(original_name, verbosity=0)
+
+    @staticmethod
+    def _previous_result(path, parameters):
+        if not path or not os.path.exists(path):
+            return None
+        previous = None
+        with open(path, encoding='utf-8') as results_file:
+            for line in results_file:
+                record = json.loads(line)
+                if record.get('parameters') == parameters:
+                    previous = record
+        return previous
+
+    @staticmethod
+    def _git_commit():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,58 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from sejm_app.similarity import RollCallMatrix, load_roll_call_matrix, store_top_neighbours
+
+
+class Command(BaseCommand):
+    help = 'Computes MP-to-MP voting agreement for a term and stores the top-k most similar MPs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', type=int, default=10, help='Parliamentary term to analyse.')
+        parser.add_argument('--top-k', type=int, default=10, help='Number of most similar MPs stored per MP.')
+        parser.add_argument(
+            '--min-shared',
+            type=int,
+            default=20,
+            help='Minimum number of votings both MPs voted in for the pair to be ranked.',
+        )
+        parser.add_argument(
+            '--matrix-dir',
+            default=settings.SEJM_ANALYSIS_DIR,
+            help='Directory where the roll call matrix is saved as a memory-mappable .npy file.',
+        )
+        parser.add_argument(
+            '--from-file',
+            action='store_true',
+            help='Reuse the matrix saved in --matrix-dir instead of loading roll calls from the database.',
+        )
+
+    def handle(self, *args, **options):
+        term = options['term']
+        if options['top_k'] < 1:
+            raise CommandError('--top-k must be at least 1.')
+
+        start = time.perf_counter()
+        if options['from_file']:
+            try:
+                roll_calls = RollCallMatrix.load(options['matrix_dir'], term)
+            except FileNotFoundError as exc:
+                raise CommandError(f'No saved roll call matrix for term {term}: {exc}')
+        else:
+            roll_calls = load_roll_call_matrix(term)
+            if roll_calls.matrix.size:
+                path = roll_calls.save(options['matrix_dir'], term)
+                self.stdout.write(f'Saved roll call matrix to {os.path.abspath(path)}.')
+        votings, mps = roll_calls.matrix.shape
+        if not votings:
+            raise CommandError(f'No roll calls for term {term} - import votings first.')
+        self.stdout.write(f'Loaded {votings} votings x {mps} MPs in {time.perf_counter() - start:.2f}s.')
+
+        start = time.perf_counter()
+        stored = store_top_neighbours(term, roll_calls, top_k=options['top_k'], min_shared=options['min_shared'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {stored} similarity rows for term {term} in {time.perf_counter() - start:.2f}s.'
+        ))
@@ -0,0 +1,110 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from sejm_app.models import Vote, VoteChoice, Voting
+from sejm_app.search import search_votings
+
+# Indeksy z migracji 0004 i 0009, które --compare tymczasowo usuwa
+QUERY_INDEXES = [
+    'parliament.vote_member_voting_idx',
+    'parliament.vote_club_choice_idx',
+    'parliament.voting_term_date_idx',
+    'parliament.voting_term_sitting_idx',
+    'parliament.voting_search_vector_idx',
+    'parliament.voting_title_trgm_idx',
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Runs EXPLAIN ANALYZE on the representative vote/voting queries and reports execution times.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', type=int, default=10, help='Parliamentary term used in the queries.')
+        parser.add_argument('--member', type=int, help='Member id for the "votes of an MP" query (default: first member with votes).')
+        parser.add_argument('--voting', type=int, help='Voting id for the "votes by club" query (default: latest voting of the term).')
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Also run every query with the query indexes dropped inside a rolled-back transaction '
+                 '(takes ACCESS EXCLUSIVE locks - do not use on a live database).',
+        )
+        parser.add_argument('--search', default='ustawy o zmianie', help='Phrase used in the voting search queries.')
+        parser.add_argument('--plans', action='store_true', help='Print full query plans, not only timings.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('This command requires PostgreSQL.')
+
+        queries = self._build_queries(options['term'], options['member'], options['voting'], options['search'])
+
+        # Najpierw wariant z indeksami, żeby rozgrzany cache nie faworyzował indeksów
+        results = {'with indexes': self._explain_all(queries, options['plans'])}
+        if options['compare']:
+            try:
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        for index_name in QUERY_INDEXES:
+                            cursor.execute(f'DROP INDEX IF EXISTS {index_name}')
+                    results['without indexes'] = self._explain_all(queries, options['plans'])
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+        self.stdout.write('\nExecution time (ms):')
+        variants = list(results)
+        self.stdout.write(f"  {'query':<40}" + ''.join(f'{variant:>18}' for variant in variants))
+        for label in queries:
+            timings = ''.join(f'{results[variant][label]:>18.3f}' for variant in variants)
+            self.stdout.write(f'  {label:<40}{timings}')
+
+    def _build_queries(self, term, member_id, voting_id, phrase):
+        if member_id is None:
+            member_id = Vote.objects.filter(member__isnull=False).values_list('member_id', flat=True).first()
+        if voting_id is None:
+            voting_id = Voting.objects.filter(term=term).order_by('-date').values_list('id', flat=True).first()
+        if member_id is None or voting_id is None:
+            raise CommandError(f'No imported votes for term {term} - nothing to explain.')
+
+        club = Vote.objects.filter(voting_id=voting_id).exclude(club=None).values_list('club', flat=True).first()
+        latest = Voting.objects.filter(term=term).order_by('-date').values_list('date', 'sitting').first()
+        date_to, sitting = latest
+        date_from = Voting.objects.filter(term=term, sitting=sitting).order_by('date').values_list('date', flat=True).first()
+
+        return {
+            'votes of an MP across the term': (
+                Vote.objects.filter(member_id=member_id, term=term)
+                .values('voting_id', 'vote_choice')
+            ),
+            'votes of a club in a voting': (
+                Vote.objects.filter(voting_id=voting_id, club=club)
+                .values('vote_choice').annotate(votes=Count('id'))
+            ),
+            'club choices across all votings': (
+                Vote.objects.filter(club=club, vote_choice=VoteChoice.NO).values('voting_id')
+            ),
+            'votings in a date range': (
+                Voting.objects.filter(term=term, date__range=(date_from, date_to)).order_by('date')
+            ),
+            'votings of a sitting': Voting.objects.filter(term=term, sitting=sitting),
+            # Pierwsza strona /api/votings/search wobec dawnego icontains po wszystkich kadencjach
+            'search votings (ranked, first page)': search_votings(phrase).order_by('-rank', 'id')[:100],
+            'search votings with icontains': Voting.objects.filter(title__icontains=phrase)[:100],
+        }
+
+    def _explain_all(self, queries, print_plans):
+        timings = {}
+        for label, queryset in queries.items():
+            plan = queryset.explain(analyze=True, buffers=True)
+            if print_plans:
+                self.stdout.write(self.style.MIGRATE_HEADING(f'\n{label}'))
+                self.stdout.write(plan)
+            match = re.search(r'Execution Time: ([\d.]+) ms', plan)
+            timings[label] = float(match.group(1)) if match else float('nan')
+        return timings
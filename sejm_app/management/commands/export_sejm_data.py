@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from sejm_app.export import EXPORT_FORMATS, export_queryset, iter_export_rows, iter_text, write_parquet
+
+
+def _date_argument(value):
+    date = parse_date(value)
+    if date is None:
+        raise ValueError(value)
+    return date
+
+
+class Command(BaseCommand):
+    help = 'Exports individual votes joined with votings and members as CSV, JSONL or Parquet, streaming from the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv', help='Output format (parquet needs pyarrow).')
+        parser.add_argument('--output', default='-', help='Output file; "-" writes CSV/JSONL to stdout.')
+        parser.add_argument('--term', type=int, help='Export only this parliamentary term.')
+        parser.add_argument('--sitting', type=int, help='Export only this sitting.')
+        parser.add_argument('--date-from', type=_date_argument, help='First voting date to export (YYYY-MM-DD).')
+        parser.add_argument('--date-to', type=_date_argument, help='Last voting date to export (YYYY-MM-DD).')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Rows fetched from the server-side cursor at a time.',
+        )
+
+    def handle(self, *args, **options):
+        export_format = options['format']
+        output = options['output']
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+        if export_format == 'parquet' and output == '-':
+            raise CommandError('Parquet export needs a file path in --output.')
+
+        queryset = export_queryset(
+            term=options['term'], sitting=options['sitting'],
+            date_from=options['date_from'], date_to=options['date_to'],
+        )
+        self.rows_written = 0
+        rows = self._count(iter_export_rows(queryset, chunk_size=options['chunk_size']))
+        start = time.perf_counter()
+        if export_format == 'parquet':
+            try:
+                write_parquet(rows, output)
+            except ImportError as exc:
+                raise CommandError(str(exc))
+        elif output == '-':
+            for line in iter_text(export_format, rows):
+                self.stdout.write(line, ending='')
+        else:
+            with open(output, 'w', encoding='utf-8', newline='') as output_file:
+                output_file.writelines(iter_text(export_format, rows))
+
+        # Podsumowanie na stderr, żeby nie mieszać go z danymi na stdout
+        self.stderr.write(f'Exported {self.rows_written} votes as {export_format} in {time.perf_counter() - start:.2f}s.')
+
+    def _count(self, rows):
+        for row in rows:
+            self.rows_written += 1
+            yield row
@@ -1,12 +1,29 @@
-import requests
+import multiprocessing
 import os
+import queue
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
+from django.db import connection, connections, transaction
 from django.utils import timezone
 import json # Pamiętaj o imporcie!
 
 # Upewnij się, że masz poprawne importy modeli
-from sejm_app.models import Member, Voting, Vote
+from sejm_app.analysis import refresh_analysis
+from sejm_app.api_cache import bump_generation, restore_generation_file
+from sejm_app.import_metrics import ImportMetrics
+from sejm_app.models import ImportCheckpoint, Voting, Vote, VoteChoice
+from sejm_app.ingest import VoteBulkWriter, summary_hash, sync_members
+from sejm_app.members import ClubResolver, MemberResolver, normalize_sejm_id
+from sejm_app.parallel_import import import_term, init_worker, parse_terms
+from sejm_app.partitions import TermRebuild, ensure_term_partitions, truncate_term
+from sejm_app.roll_calls import pack_roll_call
+from sejm_app.http_cache import ResponseCache
+from sejm_app.sejm_api import SejmApiClient
+
+# Klucz blokady doradczej PostgreSQL dla synchronizacji posłów
+MEMBER_SYNC_LOCK = 0x5E1A0001
+
 
 class Command(BaseCommand):
     help = 'Imports data about Members of Parliament and Votings from Sejm API.'
@@ -18,6 +35,16 @@ class Command(BaseCommand):
             default=10, # Domyślna kadencja (np. 10 dla obecnej)
             help='Specify the parliamentary term (kadencja) to import data from.',
         )
+        parser.add_argument(
+            '--terms',
+            type=parse_terms,
+            help='Import several terms in parallel worker processes, e.g. "1-10" or "7,9-10" (overrides --term).',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Worker processes for --terms (default: number of terms, at most the CPU count).',
+        )
         parser.add_argument(
             '--import-members',
             action='store_true',
@@ -38,15 +65,109 @@ class Command(BaseCommand):
             action='store_true',
             help='Skip deactivating all existing members before import (use with caution).',
         )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Number of voting detail requests fetched in parallel (default: 1, sequential).',
+        )
+        parser.add_argument(
+            '--max-retries',
+            type=int,
+            default=3,
+            help='How many times a failed API request is retried with exponential backoff.',
+        )
+        parser.add_argument(
+            '--vote-batch-size',
+            type=int,
+            default=5000,
+            help='Number of individual votes written per bulk INSERT statement.',
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Fetch details only for votings that are new or whose summary changed since the last import.',
+        )
+        parser.add_argument(
+            '--cache-dir',
+            default=os.getenv('SEJM_API_CACHE_DIR'),
+            help='Directory for the on-disk cache of raw API responses (default: $SEJM_API_CACHE_DIR, disabled if unset).',
+        )
+        parser.add_argument(
+            '--cache-ttl',
+            type=int,
+            default=24 * 60 * 60,
+            help='Seconds a cached response is used without revalidation (ETag/Last-Modified). 0 always revalidates.',
+        )
+        parser.add_argument(
+            '--offline',
+            action='store_true',
+            help='Replay the import from the response cache only, without any network access.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100,
+            help='Number of votings committed per transaction (each commit also saves a checkpoint).',
+        )
+        parser.add_argument(
+            '--skip-analysis',
+            action='store_true',
+            help='Do not update the aggregates in the analysis schema after importing votings.',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue an interrupted votings import after its last committed checkpoint.',
+        )
+        parser.add_argument(
+            '--replace',
+            action='store_true',
+            help=(
+                "Re-import the term's votings from scratch, emptying its table partitions with TRUNCATE first. "
+                "Offline only: the term stays empty or partial until the import finishes; "
+                "use --rebuild while the API is serving."
+            ),
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help="Re-import the term's votings into shadow tables and swap them in atomically once loaded and indexed.",
+        )
+        parser.add_argument(
+            '--metrics-file',
+            default=os.getenv('SEJM_IMPORT_METRICS_FILE'),
+            help='Append structured progress events (phases, progress, summary) to this file as JSON lines.',
+        )
+        parser.add_argument(
+            '--prometheus-textfile',
+            default=os.getenv('SEJM_IMPORT_PROMETHEUS_FILE'),
+            help='Write import metrics to this .prom file for the node_exporter textfile collector.',
+        )
 
 
     def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        self.rebuild = None
+        if options['terms']:
+            return self._import_terms(options)
         term = options['term']
         import_members_only = options['import_members']
         import_votings_only = options['import_votings']
         dry_run = options['dry_run']
         skip_member_deactivation = options['skip_member_deactivation']
 
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency must be at least 1.')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+        if options['offline'] and not options['cache_dir']:
+            raise CommandError('--offline requires --cache-dir (or SEJM_API_CACHE_DIR).')
+        if options['replace'] and (options['incremental'] or options['resume']):
+            raise CommandError('--replace cannot be combined with --incremental or --resume.')
+        if options['rebuild'] and (options['incremental'] or options['resume'] or options['replace']):
+            raise CommandError('--rebuild cannot be combined with --incremental, --resume or --replace.')
+
         # Domyślnie importuj wszystko, chyba że wybrano konkretne opcje
         if not import_members_only and not import_votings_only:
             import_members_only = True
@@ -55,27 +176,181 @@ class Command(BaseCommand):
         API_BASE_URL = os.getenv('PARLIAMENT_API_BASE_URL', 'https://api.sejm.gov.pl')
 
         self.stdout.write(self.style.SUCCESS(f'Starting data import for Sejm Term {term} from {API_BASE_URL}...'))
+        self.metrics = ImportMetrics(term, events_path=options['metrics_file'])
+        self.metrics.event('start', base_url=API_BASE_URL, dry_run=dry_run)
+
+        response_cache = None
+        if options['cache_dir']:
+            response_cache = ResponseCache(options['cache_dir'], ttl=options['cache_ttl'])
+            self.stdout.write(f"Using API response cache in {options['cache_dir']}{' (offline)' if options['offline'] else ''}.")
+
+        self.api = SejmApiClient(
+            concurrency=options['concurrency'],
+            max_retries=options['max_retries'],
+            on_error=self._report_api_error,
+            cache=response_cache,
+            offline=options['offline'],
+            on_request=self.metrics.observe_request,
+            on_parse=self.metrics.observe_parse,
+        )
+        try:
+            if import_members_only:
+                with self.metrics.phase('members'):
+                    self._import_members(API_BASE_URL, term, dry_run, skip_member_deactivation)
+            if import_votings_only:
+                self._import_votings(
+                    API_BASE_URL, term, dry_run, options['vote_batch_size'],
+                    incremental=options['incremental'],
+                    chunk_size=options['chunk_size'],
+                    resume=options['resume'],
+                    replace=options['replace'],
+                    rebuild=options['rebuild'],
+                )
+                if not dry_run and not options['skip_analysis']:
+                    with self.metrics.phase('analysis'):
+                        # Po przebudowie głosy mogły się zmienić bez zmiany skrótów głosowań
+                        self._refresh_analysis(term, full=options['rebuild'])
+        except BaseException as exc:
+            self.metrics.count_error(type(exc).__name__)
+            if self.rebuild is not None:
+                self.rebuild.discard()
+            raise
+        finally:
+            self.api.close()
+            summary = self.summary = self.metrics.summary()
+            self.metrics.event('summary', **summary)
+            if options['prometheus_textfile']:
+                self.metrics.write_textfile(options['prometheus_textfile'])
+            self.metrics.close()
+
+        self._write_summary(summary)
+        self.stdout.write(self.style.SUCCESS('Data import finished.'))
 
-        if import_members_only:
-            self._import_members(API_BASE_URL, term, dry_run, skip_member_deactivation)
-        if import_votings_only:
-            self._import_votings(API_BASE_URL, term, dry_run)
-
+    # Opcje przekazywane do importów poszczególnych kadencji w --terms
+    FORWARDED_OPTIONS = [
+        'concurrency', 'max_retries', 'vote_batch_size', 'cache_dir', 'cache_ttl',
+        'chunk_size', 'metrics_file',
+    ]
+    FORWARDED_FLAGS = [
+        'dry_run', 'incremental', 'offline', 'skip_analysis', 'resume', 'replace', 'rebuild',
+        'import_members', 'import_votings', 'skip_member_deactivation',
+    ]
+
+    def _import_terms(self, options):
+        """Importuje kadencje z ``--terms`` równolegle, każdą w osobnym procesie.
+
+        Każdy worker importuje posłów swojej kadencji (wiersze ``Member`` są
+        per kadencja, bo API nadaje ID posłów w każdej kadencji od nowa), a potem
+        jej głosowania. Ma własne połączenie z bazą i własne transakcje paczek;
+        jego komunikaty trafiają tu z prefiksem kadencji.
+        """
+        terms = options['terms']
+        workers = options['workers'] or min(len(terms), os.cpu_count() or 1)
+        if workers < 1:
+            raise CommandError('--workers must be at least 1.')
+
+        import_args = ['--verbosity', str(options['verbosity'])]
+        for name in self.FORWARDED_OPTIONS:
+            if options[name] is not None:
+                import_args += [f"--{name.replace('_', '-')}", str(options[name])]
+        import_args += [f"--{name.replace('_', '-')}" for name in self.FORWARDED_FLAGS if options[name]]
+
+        self.stdout.write(self.style.SUCCESS(f"Importing terms {', '.join(map(str, terms))} with {workers} worker processes..."))
+        # Procesy spawn nie dziedziczą połączeń; własnego nie trzymamy w czasie importu
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        output = context.Queue()
+        summaries = {}
+        failures = {}
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker, initargs=(output,)) as executor:
+            pending = {
+                executor.submit(import_term, term, import_args + self._term_textfile_args(options['prometheus_textfile'], term)): term
+                for term in terms
+            }
+            while pending:
+                done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                self._drain_worker_output(output)
+                for future in done:
+                    term = pending.pop(future)
+                    try:
+                        summaries[term] = future.result()
+                    except Exception as exc:
+                        failures[term] = exc
+                        self.stderr.write(self.style.ERROR(f'[term {term}] Import failed: {exc!r}'))
+                    else:
+                        self.stdout.write(self.style.SUCCESS(f'[term {term}] Finished.'))
+        self._drain_worker_output(output)
+
+        # Workery zapisywały plik generacji niezależnie - zostaje najnowsza z bazy
+        if not options['dry_run']:
+            restore_generation_file()
+        self.stdout.write('\nTerms summary:')
+        for term in terms:
+            if term in failures:
+                self.stdout.write(self.style.ERROR(f'  term {term:<4} failed'))
+                continue
+            summary = summaries[term]
+            rows = summary['rows']
+            self.stdout.write(
+                f"  term {term:<4} {summary['elapsed_seconds']:>9.1f}s  {rows.get('votings', 0):>7} votings  "
+                f"{rows.get('votes', 0):>10} votes  {summary['rows_per_second'].get('votes', 0):>8.0f} votes/s"
+            )
+        if failures:
+            raise CommandError(f"Import failed for terms: {', '.join(map(str, sorted(failures)))}.")
         self.stdout.write(self.style.SUCCESS('Data import finished.'))
 
+    @staticmethod
+    def _term_textfile_args(path, term):
+        # Osobny plik .prom na kadencję - workery nie nadpisują sobie metryk
+        if not path:
+            return []
+        root, extension = os.path.splitext(path)
+        return ['--prometheus-textfile', f'{root}_term{term}{extension or ".prom"}']
+
+    def _drain_worker_output(self, output):
+        while True:
+            try:
+                term, stream, line = output.get_nowait()
+            except queue.Empty:
+                return
+            (self.stderr if stream == 'stderr' else self.stdout).write(f'[term {term}] {line}')
+
+    def _report_api_error(self, url, message):
+        # Wołane także z wątków puli klienta API
+        self.metrics.count_error('api')
+        self.stderr.write(self.style.ERROR(message))
+
+    def _write_summary(self, summary):
+        self.stdout.write('\nImport summary:')
+        self.stdout.write(f"  Total time: {summary['elapsed_seconds']:.2f}s")
+        for phase, seconds in summary['phases'].items():
+            self.stdout.write(f'  {phase:<20}{seconds:>10.2f}s')
+        for kind, count in summary['rows'].items():
+            self.stdout.write(f"  {kind:<20}{count:>10} rows ({summary['rows_per_second'][kind]:.0f}/s overall)")
+        http = summary['http']
+        requests_total = sum(http['requests'].values())
+        if requests_total:
+            latency = f"p50 {http['p50_ms']} ms, p99 {http['p99_ms']} ms" if http['p50_ms'] is not None else 'all from cache'
+            self.stdout.write(
+                f"  API requests: {requests_total} ({latency}), {http['retries']} retries, "
+                f"JSON parsing {http['parse_seconds']:.2f}s"
+            )
+        if summary['errors']:
+            self.stdout.write(self.style.WARNING(f"  Errors: {summary['errors']}"))
+
     def _get_api_data(self, url):
         """Pomocnicza funkcja do pobierania danych z API."""
         self.stdout.write(f"Fetching data from: {url}")
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status() # Wyrzuci wyjątek dla kodów błędów HTTP (4xx lub 5xx)
-            return response.json()
-        except requests.exceptions.Timeout:
-            self.stderr.write(self.style.ERROR(f"Timeout occurred while fetching data from {url}"))
-            return None
-        except requests.exceptions.RequestException as e:
-            self.stderr.write(self.style.ERROR(f"Error fetching data from {url}: {e}"))
-            return None
+        return self.api.get_json(url)
+
+    def _iter_voting_details(self, base_url, term, votings_to_fetch):
+        """Pobiera szczegóły głosowań (równolegle przy --concurrency > 1) w kolejności listy."""
+        urls = (
+            f'{base_url}/sejm/term{term}/votings/{sitting_day}/{voting_number}'
+            for sitting_day, voting_number, _ in votings_to_fetch
+        )
+        for voting_key, (url, data) in zip(votings_to_fetch, self.api.fetch_many(urls)):
+            yield voting_key, data
 
     def _import_members(self, base_url, term, dry_run, skip_member_deactivation):
         self.stdout.write(f'\nImporting Members for Term {term}...')
@@ -93,191 +368,371 @@ class Command(BaseCommand):
                 # print(json.dumps(member_info, indent=2)) # Odkomentuj dla pełnego podglądu JSON
             return
 
-        with transaction.atomic():
-            if not skip_member_deactivation:
-                # Dezaktywuj wszystkich obecnych posłów przed importem, aby oznaczyć nieaktywnych
-                Member.objects.all().update(active=False)
-                self.stdout.write(self.style.WARNING('Deactivated all existing members for update.'))
-            else:
-                self.stdout.write(self.style.NOTICE('Skipping deactivation of existing members.'))
-
-
-            for i, member_info in enumerate(members_data):
-                # Zgodnie z Twoim JSON-em posłów:
-                sejm_id = member_info.get('id')
-                first_name = member_info.get('firstName') # Poprawione na 'firstName'
-                last_name = member_info.get('lastName')   # Poprawione na 'lastName'
-                club = member_info.get('club')
-                district_name = member_info.get('districtName')
-                district_num = member_info.get('districtNum')
-                voivodeship = member_info.get('voivodeship')
-                email = member_info.get('email')
-                active = member_info.get('active', True)
-
-                if not sejm_id:
-                    self.stderr.write(self.style.WARNING(f"Skipping member without 'id': {first_name} {last_name}"))
-                    continue
+        member_rows = []
+        for member_info in members_data:
+            # Zgodnie z Twoim JSON-em posłów:
+            sejm_id = normalize_sejm_id(member_info.get('id'))
+            if not sejm_id:
+                self.stderr.write(self.style.WARNING(f"Skipping member without 'id': {member_info.get('firstName')} {member_info.get('lastName')}"))
+                continue
+            member_rows.append({
+                'sejm_id': sejm_id,
+                'first_name': member_info.get('firstName'),
+                'last_name': member_info.get('lastName'),
+                'club': member_info.get('club'),
+                'district_name': member_info.get('districtName'),
+                'district_num': member_info.get('districtNum'),
+                'voivodeship': member_info.get('voivodeship'),
+                'email': member_info.get('email'),
+                'active': member_info.get('active', True),
+            })
+
+        if skip_member_deactivation:
+            self.stdout.write(self.style.NOTICE('Skipping deactivation of members missing from the API data.'))
 
-                member, created = Member.objects.update_or_create(
-                    sejm_id=sejm_id,
-                    defaults={
-                        'first_name': first_name,
-                        'last_name': last_name,
-                        'club': club,
-                        'district_name': district_name,
-                        'district_num': district_num,
-                        'voivodeship': voivodeship,
-                        'email': email,
-                        'active': active,
-                    }
-                )
-                if created:
-                    self.stdout.write(self.style.SUCCESS(f'Created member: {first_name} {last_name} (ID: {sejm_id})'))
-                else:
-                    self.stdout.write(self.style.NOTICE(f'Updated member: {first_name} {last_name} (ID: {sejm_id})'))
-
-                if (i + 1) % 50 == 0:
-                    self.stdout.write(f"Processed {i + 1} members...")
-
-        self.stdout.write(self.style.SUCCESS(f'Successfully processed {len(members_data)} members.'))
-
-    def _import_votings(self, base_url, term, dry_run):
+        with transaction.atomic():
+            # Równoległe importy (osobne wywołania) synchronizują posłów po kolei;
+            # blokada transakcyjna, więc działa także za pgbouncer w trybie transakcyjnym
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [MEMBER_SYNC_LOCK])
+            result = sync_members(term, member_rows, deactivate_missing=not skip_member_deactivation)
+            if result.created or result.updated or result.deactivated:
+                bump_generation(term, 'members')
+        self.metrics.add_rows('members', len(result.created) + len(result.updated))
+
+        if self.verbosity >= 2:
+            for sejm_id in result.created:
+                first_name, last_name = result.names[sejm_id]
+                self.stdout.write(self.style.SUCCESS(f'Created member: {first_name} {last_name} (ID: {sejm_id})'))
+            for sejm_id in result.updated:
+                first_name, last_name = result.names[sejm_id]
+                self.stdout.write(self.style.NOTICE(f'Updated member: {first_name} {last_name} (ID: {sejm_id})'))
+        if result.deactivated:
+            self.stdout.write(self.style.WARNING(f'Deactivated {result.deactivated} members missing from the API data.'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully processed {len(member_rows)} members: {len(result.created)} created, '
+            f'{len(result.updated)} updated, {result.unchanged} unchanged.'
+        ))
+
+    def _import_votings(self, base_url, term, dry_run, vote_batch_size, incremental=False, chunk_size=100, resume=False, replace=False, rebuild=False):
         self.stdout.write(f'\nImporting Votings for Term {term}...')
-        # Krok 1: Pobierz ogólną listę głosowań
+        # Krok 1: Pobierz ogólną listę głosowań. Lista jest parsowana strumieniowo,
+        # a z każdego wpisu zostaje tylko klucz i skrót, więc pamięć nie rośnie
+        # z rozmiarem odpowiedzi.
         all_votings_summary_url = f'{base_url}/sejm/term{term}/votings'
-        votings_summary_data = self._get_api_data(all_votings_summary_url)
-
-        if not votings_summary_data:
-            self.stderr.write(self.style.ERROR('No voting summary data received.'))
-            return
+        self.stdout.write(f"Fetching data from: {all_votings_summary_url}")
+        votings_summary_items = self.api.iter_json_items(all_votings_summary_url)
 
         if dry_run:
-            self.stdout.write(self.style.NOTICE(f'Dry run: Would process {len(votings_summary_data)} votings.'))
-            self.stdout.write(self.style.NOTICE('First 5 votings summary data:'))
-            for i, voting_sum in enumerate(votings_summary_data[:5]):
-                self.stdout.write(f"  {voting_sum.get('sittingDay')}/{voting_sum.get('votingNumber')} - {voting_sum.get('title')}")
-                # print(json.dumps(voting_sum, indent=2)) # Odkomentuj dla pełnego podglądu JSON summary
+            total_votings_to_process = 0
+            for voting_sum in votings_summary_items:
+                if total_votings_to_process == 0:
+                    self.stdout.write(self.style.NOTICE('First 5 votings summary data:'))
+                if total_votings_to_process < 5:
+                    self.stdout.write(f"  {voting_sum.get('sittingDay')}/{voting_sum.get('votingNumber')} - {voting_sum.get('title')}")
+                    # print(json.dumps(voting_sum, indent=2)) # Odkomentuj dla pełnego podglądu JSON summary
+                total_votings_to_process += 1
+            self.stdout.write(self.style.NOTICE(f'Dry run: Would process {total_votings_to_process} votings.'))
             return
 
-        with transaction.atomic():
-            imported_votings_count = 0
-            imported_votes_count = 0
-            total_votings_to_process = len(votings_summary_data)
-            self.stdout.write(f"Found {total_votings_to_process} votings to process for detailed import.")
-
-            for i, voting_summary_info in enumerate(votings_summary_data):
+        total_votings_to_process = 0
+        votings_to_fetch = []
+        with self.metrics.phase('votings_summary'):
+            for voting_summary_info in votings_summary_items:
+                total_votings_to_process += 1
                 sitting_day = voting_summary_info.get('sittingDay')
                 voting_number = voting_summary_info.get('votingNumber')
-                # Używamy title_summary tylko do logowania, właściwy title będzie z detailed_voting_data
-                title_summary = voting_summary_info.get('title')
 
                 if not sitting_day or not voting_number:
-                    self.stderr.write(self.style.WARNING(f"Skipping voting summary due to missing sittingDay or votingNumber: {title_summary}"))
+                    self.stderr.write(self.style.WARNING(f"Skipping voting summary due to missing sittingDay or votingNumber: {voting_summary_info.get('title')}"))
                     continue
+                votings_to_fetch.append((sitting_day, voting_number, summary_hash(voting_summary_info)))
+
+        if not votings_summary_items.complete:
+            self.metrics.count_error('incomplete_voting_summary')
+            # Bez pełnej listy --replace i --rebuild usunęłyby głosowania spoza urwanej części
+            if replace or rebuild:
+                raise CommandError(
+                    f'The votings summary of Term {term} was cut off after {total_votings_to_process} entries; '
+                    f'not {"replacing" if replace else "rebuilding"} the term.'
+                )
+            self.stderr.write(self.style.WARNING(
+                f'The votings summary was cut off after {total_votings_to_process} entries. Importing only those.'
+            ))
 
-                # Krok 2: Pobierz szczegółowe dane dla każdego głosowania
-                detail_voting_url = f'{base_url}/sejm/term{term}/votings/{sitting_day}/{voting_number}'
-                detailed_voting_data = self._get_api_data(detail_voting_url)
-
-                if not detailed_voting_data:
-                    self.stderr.write(self.style.ERROR(f"Could not fetch detailed data for voting {sitting_day}/{voting_number}. Skipping."))
-                    continue
+        if not total_votings_to_process:
+            self.stderr.write(self.style.ERROR('No voting summary data received.'))
+            return
 
-                # Wyciąganie danych ze szczegółowego JSON-a (Zgodnie z Twoim JSON-em głosowania)
-                date_str = detailed_voting_data.get('date')
-                title = detailed_voting_data.get('title')
-                topic = detailed_voting_data.get('topic')
-                kind = detailed_voting_data.get('kind')
-                majority_type = detailed_voting_data.get('majorityType')
-                majority_votes = detailed_voting_data.get('majorityVotes')
-                yes = detailed_voting_data.get('yes')
-                no = detailed_voting_data.get('no')
-                abstain = detailed_voting_data.get('abstain')
-                not_participating = detailed_voting_data.get('notParticipating')
-                present = detailed_voting_data.get('present')
-                total_voted = detailed_voting_data.get('totalVoted')
-                links = detailed_voting_data.get('links')
-                sitting = detailed_voting_data.get('sitting')
-                votes_list = detailed_voting_data.get('votes', []) # Lista indywidualnych głosów posłów
-
-                # Konwersja daty (format "YYYY-MM-DDTHH:MM:SS")
-                date_obj = None
-                if date_str:
-                    try:
-                        date_obj = timezone.datetime.fromisoformat(date_str)
-                    except ValueError as e:
-                        self.stderr.write(self.style.ERROR(f"Could not parse date '{date_str}' for voting {voting_number} ({title}): {e}"))
-                        continue # Pomiń głosowanie jeśli data jest błędna
-
-                # Utwórz lub zaktualizuj obiekt Voting
-                voting, created = Voting.objects.update_or_create(
-                    voting_number=voting_number,
-                    sitting_day=sitting_day,
-                    term=term, # Zapewnij, że to pole jest brane pod uwagę w unique_together i defaults
-                    defaults={
-                        'date': date_obj,
-                        'title': title,
-                        'topic': topic,
-                        'kind': kind,
-                        'majority_type': majority_type,
-                        'majority_votes': majority_votes,
-                        'yes': yes,
-                        'no': no,
-                        'abstain': abstain,
-                        'not_participating': not_participating,
-                        'present': present,
-                        'total_voted': total_voted,
-                        'links': links,
-                        'sitting': sitting,
-                    }
+        # Partycje kadencji zakładane przed zapisem; przy --replace opróżniane
+        # dopiero po pobraniu listy, więc błąd API nie zostawi pustej kadencji
+        created_partitions = ensure_term_partitions(term)
+        if created_partitions:
+            self.stdout.write(f"Created table partitions: {', '.join(created_partitions)}.")
+        if replace:
+            with self.metrics.phase('votings_truncate'):
+                truncate_term(term)
+            self.stdout.write(self.style.WARNING(
+                f'Removed all votings of Term {term} (partitions truncated); '
+                'readers see an incomplete term until the import finishes.'
+            ))
+
+        imported_votings_count = 0
+        committed_votings_count = 0
+        committed_votes_count = 0
+        imported_votes_count = 0
+        if rebuild:
+            # Głosowania trafiają do tabel-cieni przez COPY, a do partycji dopiero w swap()
+            with self.metrics.phase('rebuild_prepare'):
+                vote_writer = self.rebuild = TermRebuild(term, batch_size=vote_batch_size).start()
+            self.stdout.write(f'Rebuild mode: loading Term {term} into shadow tables.')
+        else:
+            vote_writer = VoteBulkWriter(batch_size=vote_batch_size)
+        # Posłowie kadencji ładowani raz na cały import zamiast zapytania na każdy głos
+        member_resolver = MemberResolver(term=term).refresh()
+        club_resolver = ClubResolver().refresh()
+        self.stdout.write(f"Found {total_votings_to_process} votings to process for detailed import.")
+
+        # Stała kolejność (dzień posiedzenia, numer) pozwala wznowić import po punkcie kontrolnym
+        votings_to_fetch.sort(key=lambda voting_key: (voting_key[0], voting_key[1]))
+
+        if incremental:
+            # Jedno zapytanie o znaczniki zamiast pobierania szczegółów wszystkich głosowań
+            known_hashes = {
+                (known_sitting_day, known_voting_number): known_hash
+                for known_sitting_day, known_voting_number, known_hash in Voting.objects.filter(term=term).values_list('sitting_day', 'voting_number', 'summary_hash')
+            }
+            votings_to_fetch = [
+                voting_key for voting_key in votings_to_fetch
+                if known_hashes.get((voting_key[0], voting_key[1])) != voting_key[2]
+            ]
+            self.stdout.write(f"Incremental mode: {len(votings_to_fetch)} new or changed votings, {total_votings_to_process - len(votings_to_fetch)} unchanged or skipped.")
+
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(term=term)
+        if resume and not checkpoint.completed and checkpoint.last_sitting_day is not None:
+            last_key = (checkpoint.last_sitting_day, checkpoint.last_voting_number)
+            votings_to_fetch = [voting_key for voting_key in votings_to_fetch if (voting_key[0], voting_key[1]) > last_key]
+            self.stdout.write(self.style.NOTICE(f"Resuming after voting {last_key[0]}/{last_key[1]}: {len(votings_to_fetch)} votings left."))
+        else:
+            if resume:
+                self.stdout.write(self.style.NOTICE('No unfinished import to resume, starting from the beginning.'))
+            checkpoint.last_sitting_day = None
+            checkpoint.last_voting_number = None
+            checkpoint.processed_votings = 0
+            checkpoint.completed = False
+            checkpoint.save()
+
+        # Krok 2: Pobierz szczegółowe dane dla każdego głosowania.
+        # Zapytania HTTP mogą iść równolegle, ale zapis do bazy odbywa się
+        # w tym wątku, w kolejności z listy, paczkami po chunk_size głosowań.
+        voting_details = self._iter_voting_details(base_url, term, votings_to_fetch)
+        while True:
+            # Czas oczekiwania na szczegóły (HTTP + JSON) osobno od czasu zapisu do bazy
+            with self.metrics.phase('votings_fetch'):
+                chunk = list(islice(voting_details, chunk_size))
+            if not chunk:
+                break
+            # Każda paczka to osobna transakcja razem z punktem kontrolnym,
+            # więc błąd po godzinach importu cofa tylko ostatnią paczkę
+            with self.metrics.phase('votings_write'), transaction.atomic():
+                for (sitting_day, voting_number, voting_summary_hash), detailed_voting_data in chunk:
+                    if self.verbosity >= 2:
+                        self.stdout.write(f"Fetched voting details: {sitting_day}/{voting_number}")
+
+                    if not detailed_voting_data:
+                        self.metrics.count_error('missing_voting_details')
+                        self.stderr.write(self.style.ERROR(f"Could not fetch detailed data for voting {sitting_day}/{voting_number}. Skipping."))
+                        continue
+
+                    votes_count = self._import_voting_detail(term, sitting_day, voting_number, voting_summary_hash, detailed_voting_data, member_resolver, club_resolver, vote_writer)
+                    if votes_count is None:
+                        self.metrics.count_error('invalid_voting')
+                        continue
+                    imported_votes_count += votes_count
+                    imported_votings_count += 1
+                    if imported_votings_count % 10 == 0 and self.verbosity >= 2:
+                        self.stdout.write(f"Processed {imported_votings_count}/{total_votings_to_process} votings. Total individual votes: {imported_votes_count}")
+
+                vote_writer.flush()
+                if imported_votings_count > committed_votings_count and not rebuild:
+                    # Nowa generacja unieważnia cache API po zatwierdzeniu paczki
+                    bump_generation(term, 'votings')
+                checkpoint.last_sitting_day, checkpoint.last_voting_number = chunk[-1][0][:2]
+                checkpoint.processed_votings += len(chunk)
+                # Przerwanej przebudowy nie da się wznowić - tabele-cienie są usuwane
+                if not rebuild:
+                    checkpoint.save()
+            self.metrics.add_rows('votings', imported_votings_count - committed_votings_count)
+            self.metrics.add_rows('votes', imported_votes_count - committed_votes_count)
+            committed_votings_count = imported_votings_count
+            committed_votes_count = imported_votes_count
+            self.metrics.event(
+                'progress',
+                processed_votings=checkpoint.processed_votings,
+                votings_to_process=len(votings_to_fetch),
+                votings=imported_votings_count,
+                votes=imported_votes_count,
+                votes_per_second=round(self.metrics.rows_per_second('votes'), 1),
+                db_rows_per_second=round(vote_writer.rows_per_second, 1),
+            )
+            self.stdout.write(
+                f"{'Loaded' if rebuild else 'Committed'} votings up to {checkpoint.last_sitting_day}/{checkpoint.last_voting_number} "
+                f"({checkpoint.processed_votings}/{len(votings_to_fetch)} in this import, "
+                f"{self.metrics.rows_per_second('votes'):.0f} votes/s)."
+            )
+
+        if rebuild:
+            # Podmiana usunęłaby z kadencji głosowania, których szczegółów nie udało się pobrać
+            missing = vote_writer.missing_votings((voting_key[0], voting_key[1]) for voting_key in votings_to_fetch)
+            if missing:
+                vote_writer.discard()
+                self.rebuild = None
+                raise CommandError(
+                    f'Could not load {len(missing)} votings of Term {term} (first: {missing[0][0]}/{missing[0][1]}). '
+                    f'Rebuild discarded, the current partitions are unchanged.'
                 )
-                if created:
-                    self.stdout.write(self.style.SUCCESS(f'Created voting: {voting_number}/{sitting_day} - {title}'))
-                else:
-                    self.stdout.write(self.style.NOTICE(f'Updated voting: {voting_number}/{sitting_day} - {title}'))
-
-                # Przetwórz indywidualne głosy
-                if votes_list:
-                    # Usuń stare głosy dla tego głosowania, jeśli aktualizujesz
-                    # To zapobiega duplikatom przy ponownym uruchomieniu
-                    if not created: # Tylko jeśli głosowanie już istniało i jest aktualizowane
-                        voting.individual_votes.all().delete()
-                        # self.stdout.write(self.style.NOTICE(f'Cleared old votes for voting {voting.id}'))
-
-
-                    for vote_info in votes_list:
-                        mp_id_api = vote_info.get('MP')
-                        first_name = vote_info.get('firstName') # 'firstName' z API
-                        last_name = vote_info.get('lastName')   # 'lastName' z API
-                        club = vote_info.get('club')
-                        vote_choice = vote_info.get('vote') # np. 'YES', 'NO', 'ABSTAIN'
-
-                        if not mp_id_api or not vote_choice:
-                            self.stderr.write(self.style.WARNING(f"Skipping individual vote for voting {voting.id} due to missing MP ID or vote choice."))
-                            continue
-
-                        member_obj = None
-                        try:
-                            member_obj = Member.objects.get(sejm_id=mp_id_api)
-                        except Member.DoesNotExist:
-                            self.stdout.write(self.style.WARNING(f"Member with sejm_id {mp_id_api} ({first_name} {last_name}) not found. Storing vote without linked Member object."))
-
-                        # Utwórz obiekt Vote
-                        # Używamy update_or_create z (voting, member, mp_id_api) aby zapobiec duplikatom
-                        Vote.objects.update_or_create(
-                            voting=voting,
-                            member=member_obj,
-                            mp_id_api=mp_id_api, # Zawsze zapisuj ID z API, nawet jeśli member_obj is None
-                            defaults={
-                                'first_name': first_name,
-                                'last_name': last_name,
-                                'club': club,
-                                'vote_choice': vote_choice,
-                            }
-                        )
-                        imported_votes_count += 1
-                imported_votings_count += 1
-                if imported_votings_count % 10 == 0:
-                    self.stdout.write(f"Processed {imported_votings_count}/{total_votings_to_process} votings. Total individual votes: {imported_votes_count}")
-
-        self.stdout.write(self.style.SUCCESS(f'Successfully processed {imported_votings_count} votings and {imported_votes_count} individual votes.'))
\ No newline at end of file
+            with self.metrics.phase('rebuild_indexes'):
+                vote_writer.build_indexes()
+            with self.metrics.phase('rebuild_swap'):
+                vote_writer.swap()
+            self.rebuild = None
+            self.stdout.write(self.style.SUCCESS(f'Swapped in the rebuilt partitions of Term {term}.'))
+        checkpoint.completed = True
+        checkpoint.save()
+
+        if member_resolver.misses:
+            self.stdout.write(self.style.WARNING(f'{member_resolver.misses} individual votes referenced {len(member_resolver.missing_ids)} unknown members.'))
+        self.stdout.write(self.style.SUCCESS(f'Successfully processed {imported_votings_count} votings and {imported_votes_count} individual votes.'))
+        self.stdout.write(f'Wrote {vote_writer.rows_written} individual votes in {vote_writer.elapsed:.2f}s ({vote_writer.rows_per_second:.0f} rows/s).')
+
+    def _refresh_analysis(self, term, full=False):
+        self.stdout.write(f'\nUpdating analysis aggregates for Term {term}...')
+        result = refresh_analysis(term, full=full)
+        if result.full_rebuild:
+            self.stdout.write(self.style.NOTICE('Previously analyzed votings changed - aggregates of the term were rebuilt.'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Added {result.votings_added} votings to the aggregates ({result.members_updated} member stats updated).'
+        ))
+
+    def _import_voting_detail(self, term, sitting_day, voting_number, voting_summary_hash, detailed_voting_data, member_resolver, club_resolver, vote_writer):
+        """Zapisuje jedno głosowanie i przekazuje jego głosy do ``vote_writer``
+        (w trybie --rebuild oba trafiają do tabel-cieni ``self.rebuild``).
+
+        Zwraca liczbę zapisanych głosów albo None, jeśli głosowanie pominięto.
+        """
+        # Wyciąganie danych ze szczegółowego JSON-a (Zgodnie z Twoim JSON-em głosowania)
+        date_str = detailed_voting_data.get('date')
+        title = detailed_voting_data.get('title')
+        topic = detailed_voting_data.get('topic')
+        kind = detailed_voting_data.get('kind')
+        majority_type = detailed_voting_data.get('majorityType')
+        majority_votes = detailed_voting_data.get('majorityVotes')
+        yes = detailed_voting_data.get('yes')
+        no = detailed_voting_data.get('no')
+        abstain = detailed_voting_data.get('abstain')
+        not_participating = detailed_voting_data.get('notParticipating')
+        present = detailed_voting_data.get('present')
+        total_voted = detailed_voting_data.get('totalVoted')
+        links = detailed_voting_data.get('links')
+        sitting = detailed_voting_data.get('sitting')
+        votes_list = detailed_voting_data.get('votes', []) # Lista indywidualnych głosów posłów
+
+        # Konwersja daty (format "YYYY-MM-DDTHH:MM:SS")
+        date_obj = None
+        if date_str:
+            try:
+                date_obj = timezone.datetime.fromisoformat(date_str)
+            except ValueError as e:
+                self.stderr.write(self.style.ERROR(f"Could not parse date '{date_str}' for voting {voting_number} ({title}): {e}"))
+                return None # Pomiń głosowanie jeśli data jest błędna
+
+        # Najpierw sprawdź indywidualne głosy - z nich powstaje też upakowany roll_call
+        parsed_votes = []
+        for vote_info in votes_list:
+            mp_id_api = vote_info.get('MP')
+            vote_choice = VoteChoice.from_api(vote_info.get('vote')) # np. 'YES' -> VoteChoice.YES
+            if not mp_id_api or vote_choice is None:
+                self.stderr.write(self.style.WARNING(f"Skipping individual vote for voting {sitting_day}/{voting_number} due to missing MP ID or unknown vote choice {vote_info.get('vote')!r}."))
+                continue
+            parsed_votes.append((mp_id_api, vote_choice, vote_info))
+
+        try:
+            roll_call = pack_roll_call({int(mp_id_api): vote_choice for mp_id_api, vote_choice, _ in parsed_votes})
+        except ValueError as e:
+            self.stderr.write(self.style.WARNING(f"Not packing roll call for voting {sitting_day}/{voting_number}: {e}"))
+            roll_call = None
+
+        voting_fields = {
+            'date': date_obj,
+            'title': title,
+            'topic': topic,
+            'kind': kind,
+            'majority_type': majority_type,
+            'majority_votes': majority_votes,
+            'yes': yes,
+            'no': no,
+            'abstain': abstain,
+            'not_participating': not_participating,
+            'present': present,
+            'total_voted': total_voted,
+            'links': links,
+            'sitting': sitting,
+            'summary_hash': voting_summary_hash,
+            'roll_call': roll_call,
+        }
+
+        # Przetwórz indywidualne głosy (głosowanie przypisuje zapis niżej)
+        votes = []
+        for mp_id_api, vote_choice, vote_info in parsed_votes:
+            first_name = vote_info.get('firstName') # 'firstName' z API
+            last_name = vote_info.get('lastName')   # 'lastName' z API
+
+            # Ostrzegaj tylko raz dla każdego brakującego posła
+            already_missing = normalize_sejm_id(mp_id_api) in member_resolver.missing_ids
+            member_obj = member_resolver.resolve(mp_id_api)
+            if member_obj is None and not already_missing:
+                self.stdout.write(self.style.WARNING(f"Member with sejm_id {mp_id_api} ({first_name} {last_name}) not found. Storing vote without linked Member object."))
+
+            votes.append(Vote(
+                term=term,
+                member=member_obj,
+                mp_id_api=mp_id_api, # Zawsze zapisuj ID z API, nawet jeśli member_obj is None
+                # Imię i nazwisko tylko dla głosów bez posła - pozostałe są w Member
+                first_name=first_name if member_obj is None else None,
+                last_name=last_name if member_obj is None else None,
+                club=club_resolver.resolve(vote_info.get('club')),
+                vote_choice=vote_choice,
+            ))
+
+        if self.rebuild is not None:
+            voting = Voting(voting_number=voting_number, sitting_day=sitting_day, term=term, **voting_fields)
+            if not self.rebuild.add_voting(voting, votes):
+                self.stderr.write(self.style.WARNING(f"Voting {sitting_day}/{voting_number} is listed twice. Skipping the repeat."))
+                return None
+            return len(votes)
+
+        # Utwórz lub zaktualizuj obiekt Voting
+        voting, created = Voting.objects.update_or_create(
+            voting_number=voting_number,
+            sitting_day=sitting_day,
+            term=term, # Zapewnij, że to pole jest brane pod uwagę w unique_together i defaults
+            defaults=voting_fields,
+        )
+        # Komunikat na każde głosowanie tylko na życzenie - przy tysiącach głosowań sam spowalnia import
+        if self.verbosity >= 2:
+            if created:
+                self.stdout.write(self.style.SUCCESS(f'Created voting: {voting_number}/{sitting_day} - {title}'))
+            else:
+                self.stdout.write(self.style.NOTICE(f'Updated voting: {voting_number}/{sitting_day} - {title}'))
+
+        if not created:
+            # Głosy posłów z paczki nadpisuje upsert na (voting, member, term). Usuwane są
+            # stare głosy bez posła (inaczej powstałyby duplikaty) i głosy posłów, których
+            # nie ma już w danych z API (np. po korekcie głosowania)
+            voting.individual_votes.filter(term=term).exclude(
+                member_id__in=[vote.member_id for vote in votes if vote.member_id is not None],
+            ).delete()
+        for vote in votes:
+            vote.voting = voting
+            vote_writer.add(vote)
+        return len(votes)
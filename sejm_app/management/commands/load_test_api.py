@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sejm_app.load_test import run_load
+
+# Ta sama treść przez widok synchroniczny (DRF) i asynchroniczny
+DEFAULT_PATHS = [
+    '/api/votings?page_size=20',
+    '/api/live/votings/latest?limit=20',
+]
+
+
+class Command(BaseCommand):
+    help = 'Load-tests running API endpoints and reports requests/sec and latency percentiles per path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Address of the running server.')
+        parser.add_argument(
+            '--path',
+            action='append',
+            dest='paths',
+            help='Path to load-test; repeat for several (default: the sync and async latest votings endpoints).',
+        )
+        parser.add_argument('--requests', type=int, default=2000, help='Requests sent per path.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight at the same time.')
+        parser.add_argument('--warmup', type=int, default=50, help='Requests sent per path before measuring.')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be at least 1.')
+        base_url = options['base_url'].rstrip('/')
+        paths = options['paths'] or DEFAULT_PATHS
+
+        self.stdout.write(f"{'path':<45}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for path in paths:
+            url = base_url + path
+            if options['warmup']:
+                run_load(url, options['warmup'], min(options['concurrency'], options['warmup']))
+            result = run_load(url, options['requests'], options['concurrency'])
+            self.stdout.write(
+                f'{path:<45}{result.requests_per_second:>10.1f}'
+                f'{result.percentile(50):>10.2f}{result.percentile(99):>10.2f}{result.errors:>8}'
+            )
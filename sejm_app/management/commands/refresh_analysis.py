@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from sejm_app.analysis import refresh_analysis
+
+
+class Command(BaseCommand):
+    help = 'Updates club cohesion and member loyalty/attendance aggregates in the analysis schema.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', type=int, default=10, help='Parliamentary term to analyse.')
+        parser.add_argument('--full', action='store_true', help='Rebuild the aggregates of the term from scratch.')
+
+    def handle(self, *args, **options):
+        result = refresh_analysis(options['term'], full=options['full'])
+        if result.full_rebuild:
+            self.stdout.write(self.style.NOTICE(f"Rebuilt the aggregates of term {options['term']}."))
+        self.stdout.write(self.style.SUCCESS(
+            f'Added {result.votings_added} votings to the aggregates ({result.members_updated} member stats updated).'
+        ))
@@ -0,0 +1,82 @@
+from sejm_app.models import Club, Member
+
+
+def normalize_sejm_id(value):
+    """Sprowadza ID posła do postaci klucza: API podaje int, a ``Member.sejm_id`` to tekst."""
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        return str(int(text))
+    except ValueError:
+        return text
+
+
+class MemberResolver:
+    """Słownik posłów w pamięci do rozwiązywania ID z API bez zapytań do bazy.
+
+    Posłowie są ładowani jednym zapytaniem przy pierwszym użyciu; ``refresh()``
+    przeładowuje ich na żądanie (np. po imporcie posłów). Nietrafione ID są
+    zliczane w ``misses`` i zbierane w ``missing_ids``. ID z API są unikalne
+    tylko w ramach kadencji, więc głosy rozwiązuje się z ``term``.
+    """
+
+    def __init__(self, queryset=None, term=None):
+        self.queryset = queryset if queryset is not None else Member.objects.all()
+        if term is not None:
+            self.queryset = self.queryset.filter(term=term)
+        self.hits = 0
+        self.misses = 0
+        self.missing_ids = set()
+        self._members = None
+
+    def refresh(self):
+        self._members = {
+            normalize_sejm_id(member.sejm_id): member
+            for member in self.queryset.iterator()
+            if member.sejm_id is not None
+        }
+        return self
+
+    def __len__(self):
+        if self._members is None:
+            self.refresh()
+        return len(self._members)
+
+    def resolve(self, mp_id):
+        """Zwraca ``Member`` dla ID z API albo None, jeśli takiego posła nie ma."""
+        if self._members is None:
+            self.refresh()
+        key = normalize_sejm_id(mp_id)
+        member = self._members.get(key)
+        if member is None:
+            self.misses += 1
+            if key is not None:
+                self.missing_ids.add(key)
+        else:
+            self.hits += 1
+        return member
+
+
+class ClubResolver:
+    """Zamienia nazwy klubów z API na obiekty ``Club``, tworząc brakujące przy pierwszym użyciu."""
+
+    def __init__(self):
+        self._clubs = None
+
+    def refresh(self):
+        self._clubs = {club.code: club for club in Club.objects.all()}
+        return self
+
+    def resolve(self, code):
+        if not code:
+            return None
+        if self._clubs is None:
+            self.refresh()
+        club = self._clubs.get(code)
+        if club is None:
+            club, _ = Club.objects.get_or_create(code=code)
+            self._clubs[code] = club
+        return club
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sejm_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='voting',
+            name='summary_hash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
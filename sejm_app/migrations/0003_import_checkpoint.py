@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sejm_app', '0002_voting_summary_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.IntegerField(unique=True)),
+                ('last_sitting_day', models.IntegerField(blank=True, null=True)),
+                ('last_voting_number', models.IntegerField(blank=True, null=True)),
+                ('processed_votings', models.IntegerField(default=0)),
+                ('completed', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'parliament"."import_checkpoints',
+            },
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Introspekcja i RemoveIndex w Django nie widzą obiektów w schemacie "parliament"
+# (db_table zawiera nazwę schematu), więc indeksy są zakładane i usuwane
+# ręcznie z pełnymi nazwami, a stan modeli aktualizują state_operations.
+# CREATE INDEX CONCURRENTLY nie blokuje zapisów do dużej tabeli głosów.
+CREATE_INDEXES_SQL = [
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS vote_member_voting_idx '
+    'ON parliament.individual_votes (member_id, voting_id) INCLUDE (vote_choice)',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS vote_club_choice_idx '
+    'ON parliament.individual_votes (club, vote_choice)',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS voting_term_date_idx '
+    'ON parliament.votings (term, date)',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS voting_term_sitting_idx '
+    'ON parliament.votings (term, sitting)',
+]
+
+DROP_INDEXES_SQL = [
+    'DROP INDEX CONCURRENTLY IF EXISTS parliament.vote_member_voting_idx',
+    'DROP INDEX CONCURRENTLY IF EXISTS parliament.vote_club_choice_idx',
+    'DROP INDEX CONCURRENTLY IF EXISTS parliament.voting_term_date_idx',
+    'DROP INDEX CONCURRENTLY IF EXISTS parliament.voting_term_sitting_idx',
+]
+
+# Pojedyncze indeksy kluczy obcych są pokryte przez (voting, member) i (member, voting)
+DROP_FK_INDEXES_SQL = """
+DO $$
+DECLARE
+    index_name regclass;
+BEGIN
+    FOR index_name IN
+        SELECT i.indexrelid::regclass
+        FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+        WHERE i.indrelid = 'parliament.individual_votes'::regclass
+          AND i.indnatts = 1
+          AND NOT i.indisunique
+          AND a.attname IN ('member_id', 'voting_id')
+    LOOP
+        EXECUTE 'DROP INDEX ' || index_name;
+    END LOOP;
+END
+$$;
+"""
+
+CREATE_FK_INDEXES_SQL = [
+    'CREATE INDEX IF NOT EXISTS individual_votes_member_id ON parliament.individual_votes (member_id)',
+    'CREATE INDEX IF NOT EXISTS individual_votes_voting_id ON parliament.individual_votes (voting_id)',
+]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('sejm_app', '0003_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(sql=CREATE_INDEXES_SQL, reverse_sql=DROP_INDEXES_SQL),
+                migrations.RunSQL(sql=DROP_FK_INDEXES_SQL, reverse_sql=CREATE_FK_INDEXES_SQL),
+            ],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='vote',
+                    index=models.Index(fields=['member', 'voting'], include=('vote_choice',), name='vote_member_voting_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='vote',
+                    index=models.Index(fields=['club', 'vote_choice'], name='vote_club_choice_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='voting',
+                    index=models.Index(fields=['term', 'date'], name='voting_term_date_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='voting',
+                    index=models.Index(fields=['term', 'sitting'], name='voting_term_sitting_idx'),
+                ),
+                migrations.AlterField(
+                    model_name='vote',
+                    name='member',
+                    field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='member_votes', to='sejm_app.member'),
+                ),
+                migrations.AlterField(
+                    model_name='vote',
+                    name='voting',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='individual_votes', to='sejm_app.voting'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,125 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Kody muszą odpowiadać sejm_app.models.VoteChoice
+VOTE_CHOICE_CODES = [
+    ('YES', 1),
+    ('NO', 2),
+    ('ABSTAIN', 3),
+    ('NOT_PARTICIPATING', 4),
+    ('ABSENT', 5),
+    ('VOTE_VALID', 6),
+    ('VOTE_INVALID', 7),
+]
+
+_TO_CODE = ' '.join(f"WHEN '{name}' THEN {code}" for name, code in VOTE_CHOICE_CODES)
+_TO_NAME = ' '.join(f"WHEN {code} THEN '{name}'" for name, code in VOTE_CHOICE_CODES)
+_KNOWN_NAMES = ', '.join(f"'{name}'" for name, _ in VOTE_CHOICE_CODES)
+
+# Ręczny SQL, bo Django nie rzutuje tekstu na kody, a introspekcja nie widzi
+# tabel w schemacie "parliament". Po migracji dużej tabeli warto wykonać
+# VACUUM FULL (lub pg_repack) na parliament.individual_votes, żeby odzyskać miejsce.
+FORWARD_SQL = [
+    # Odroczone triggery kluczy obcych blokowałyby ALTER TABLE po UPDATE
+    'SET CONSTRAINTS ALL IMMEDIATE',
+    # Kluby jako osobna tabela słownikowa
+    'INSERT INTO parliament.clubs (code) '
+    'SELECT DISTINCT club FROM parliament.individual_votes WHERE club IS NOT NULL',
+    'ALTER TABLE parliament.individual_votes ADD COLUMN club_id bigint NULL',
+    'UPDATE parliament.individual_votes v SET club_id = c.id '
+    'FROM parliament.clubs c WHERE c.code = v.club',
+    'ALTER TABLE parliament.individual_votes DROP COLUMN club',
+    'ALTER TABLE parliament.individual_votes ADD CONSTRAINT individual_votes_club_id_fk_clubs_id '
+    'FOREIGN KEY (club_id) REFERENCES parliament.clubs (id) DEFERRABLE INITIALLY DEFERRED',
+    # Głosy z nieznanym wyborem nie mają kodu - wcześniej importer ich nie walidował
+    f'DELETE FROM parliament.individual_votes WHERE vote_choice NOT IN ({_KNOWN_NAMES})',
+    f'ALTER TABLE parliament.individual_votes ALTER COLUMN vote_choice TYPE smallint '
+    f'USING CASE vote_choice {_TO_CODE} END',
+    'CREATE INDEX vote_club_choice_idx ON parliament.individual_votes (club_id, vote_choice)',
+    # Imiona i nazwiska zostają tylko przy głosach bez powiązanego posła
+    'UPDATE parliament.individual_votes SET first_name = NULL, last_name = NULL '
+    'WHERE member_id IS NOT NULL AND (first_name IS NOT NULL OR last_name IS NOT NULL)',
+    # Upakowane głosowania imienne: bajt i-1 = kod głosu posła o ID i z API
+    'ALTER TABLE parliament.votings ADD COLUMN roll_call bytea NULL',
+    '''
+    UPDATE parliament.votings v SET roll_call = packed.roll_call
+    FROM (
+        SELECT bounds.voting_id,
+               decode(string_agg(lpad(to_hex(coalesce(choices.vote_choice, 0)), 2, '0'), '' ORDER BY mp_id), 'hex') AS roll_call
+        FROM (
+            SELECT voting_id, max(mp_id_api) AS max_mp_id
+            FROM parliament.individual_votes
+            WHERE mp_id_api BETWEEN 1 AND 2048
+            GROUP BY voting_id
+        ) bounds
+        CROSS JOIN LATERAL generate_series(1, bounds.max_mp_id) AS mp_id
+        LEFT JOIN (
+            SELECT voting_id, mp_id_api, max(vote_choice) AS vote_choice
+            FROM parliament.individual_votes
+            GROUP BY voting_id, mp_id_api
+        ) choices ON choices.voting_id = bounds.voting_id AND choices.mp_id_api = mp_id
+        GROUP BY bounds.voting_id
+    ) packed
+    WHERE v.id = packed.voting_id
+    ''',
+]
+
+REVERSE_SQL = [
+    'SET CONSTRAINTS ALL IMMEDIATE',
+    'ALTER TABLE parliament.votings DROP COLUMN roll_call',
+    'DROP INDEX parliament.vote_club_choice_idx',
+    f'ALTER TABLE parliament.individual_votes ALTER COLUMN vote_choice TYPE varchar(20) '
+    f'USING CASE vote_choice {_TO_NAME} END',
+    'ALTER TABLE parliament.individual_votes ADD COLUMN club varchar(100) NULL',
+    'UPDATE parliament.individual_votes v SET club = c.code '
+    'FROM parliament.clubs c WHERE c.id = v.club_id',
+    'ALTER TABLE parliament.individual_votes DROP COLUMN club_id',
+    'CREATE INDEX vote_club_choice_idx ON parliament.individual_votes (club, vote_choice)',
+    'UPDATE parliament.individual_votes v SET first_name = m.first_name, last_name = m.last_name '
+    'FROM parliament.members m WHERE m.id = v.member_id',
+    'DELETE FROM parliament.clubs',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sejm_app', '0004_vote_and_voting_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Club',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'db_table': 'parliament"."clubs',
+            },
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(sql=FORWARD_SQL, reverse_sql=REVERSE_SQL),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='voting',
+                    name='roll_call',
+                    field=models.BinaryField(blank=True, editable=False, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='vote',
+                    name='vote_choice',
+                    field=models.SmallIntegerField(choices=[(1, 'Za'), (2, 'Przeciw'), (3, 'Wstrzymał się'), (4, 'Nie brał udziału'), (5, 'Nieobecny'), (6, 'Głos ważny'), (7, 'Głos nieważny')]),
+                ),
+                migrations.AlterField(
+                    model_name='vote',
+                    name='club',
+                    field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='votes', to='sejm_app.club'),
+                ),
+            ],
+        ),
+    ]
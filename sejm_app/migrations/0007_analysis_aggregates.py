@@ -0,0 +1,65 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sejm_app', '0006_data_generation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyzedVoting',
+            fields=[
+                ('voting', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='analyzed', serialize=False, to='sejm_app.voting')),
+                ('summary_hash', models.CharField(blank=True, max_length=64, null=True)),
+                ('analyzed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'analysis"."analyzed_votings',
+            },
+        ),
+        migrations.CreateModel(
+            name='MemberStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.IntegerField()),
+                ('votings', models.IntegerField(default=0)),
+                ('absent', models.IntegerField(default=0)),
+                ('votes_with_club_majority_known', models.IntegerField(default=0)),
+                ('votes_with_club_majority', models.IntegerField(default=0)),
+                ('attendance_rate', models.FloatField(blank=True, null=True)),
+                ('loyalty_rate', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('member', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='sejm_app.member')),
+            ],
+            options={
+                'db_table': 'analysis"."member_stats',
+                'indexes': [models.Index(fields=['term', 'loyalty_rate'], name='member_stats_term_loyalty_idx'), models.Index(fields=['term', 'attendance_rate'], name='member_stats_term_attend_idx')],
+                'unique_together': {('member', 'term')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ClubCohesion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('members', models.IntegerField()),
+                ('yes', models.IntegerField()),
+                ('no', models.IntegerField()),
+                ('abstain', models.IntegerField()),
+                ('not_voting', models.IntegerField()),
+                ('rice_index', models.FloatField(blank=True, null=True)),
+                ('majority_choice', models.SmallIntegerField(blank=True, choices=[(1, 'Za'), (2, 'Przeciw'), (3, 'Wstrzymał się'), (4, 'Nie brał udziału'), (5, 'Nieobecny'), (6, 'Głos ważny'), (7, 'Głos nieważny')], null=True)),
+                ('club', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='cohesion', to='sejm_app.club')),
+                ('voting', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='club_cohesion', to='sejm_app.voting')),
+            ],
+            options={
+                'db_table': 'analysis"."club_cohesion',
+                'indexes': [models.Index(fields=['club', 'voting'], name='cohesion_club_voting_idx')],
+                'unique_together': {('voting', 'club')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sejm_app', '0007_analysis_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.IntegerField()),
+                ('rank', models.SmallIntegerField()),
+                ('agreement', models.FloatField()),
+                ('similarity', models.FloatField(blank=True, null=True)),
+                ('shared_votings', models.IntegerField()),
+                ('member', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='similar_members', to='sejm_app.member')),
+                ('neighbour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sejm_app.member')),
+            ],
+            options={
+                'db_table': 'analysis"."member_similarity',
+                'unique_together': {('term', 'member', 'rank')},
+            },
+        ),
+    ]
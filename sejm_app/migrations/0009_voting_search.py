@@ -0,0 +1,105 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+# Konfiguracja parliament.polish: kopia 'polish', jeśli serwer ma słownik polski,
+# a w przeciwnym razie 'simple' ze słowami przepuszczanymi przez unaccent
+# (wtedy "zolc" znajduje "żółć").
+CREATE_SEARCH_CONFIG_SQL = """
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_ts_config c JOIN pg_namespace n ON n.oid = c.cfgnamespace
+        WHERE n.nspname = 'parliament' AND c.cfgname = 'polish'
+    ) THEN
+        IF EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'polish' AND cfgnamespace = 'pg_catalog'::regnamespace) THEN
+            CREATE TEXT SEARCH CONFIGURATION parliament.polish (COPY = pg_catalog.polish);
+        ELSE
+            CREATE TEXT SEARCH CONFIGURATION parliament.polish (COPY = pg_catalog.simple);
+            ALTER TEXT SEARCH CONFIGURATION parliament.polish
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple;
+        END IF;
+    END IF;
+END
+$$;
+"""
+
+DROP_SEARCH_CONFIG_SQL = 'DROP TEXT SEARCH CONFIGURATION IF EXISTS parliament.polish'
+
+# Trigger zamiast kolumny GENERATED: Django 4.2 zapisuje wszystkie pola modelu,
+# a do kolumny generowanej nie można nic wpisać
+CREATE_TRIGGER_SQL = [
+    """
+    CREATE FUNCTION parliament.votings_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('parliament.polish', coalesce(NEW.title, '')), 'A')
+            || setweight(to_tsvector('parliament.polish', coalesce(NEW.topic, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER votings_search_vector_update
+    BEFORE INSERT OR UPDATE ON parliament.votings
+    FOR EACH ROW EXECUTE FUNCTION parliament.votings_search_vector_update()
+    """,
+    # Wypełnienie istniejących wierszy przez trigger
+    'UPDATE parliament.votings SET search_vector = NULL',
+]
+
+DROP_TRIGGER_SQL = [
+    'DROP TRIGGER IF EXISTS votings_search_vector_update ON parliament.votings',
+    'DROP FUNCTION IF EXISTS parliament.votings_search_vector_update()',
+]
+
+# Jak w 0004 - indeksy z pełnymi nazwami i CONCURRENTLY, stan przez state_operations
+CREATE_INDEXES_SQL = [
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS voting_search_vector_idx '
+    'ON parliament.votings USING gin (search_vector)',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS voting_title_trgm_idx '
+    'ON parliament.votings USING gin (title gin_trgm_ops)',
+]
+
+DROP_INDEXES_SQL = [
+    'DROP INDEX CONCURRENTLY IF EXISTS parliament.voting_search_vector_idx',
+    'DROP INDEX CONCURRENTLY IF EXISTS parliament.voting_title_trgm_idx',
+]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('sejm_app', '0008_member_similarity'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        UnaccentExtension(),
+        migrations.RunSQL(sql=CREATE_SEARCH_CONFIG_SQL, reverse_sql=DROP_SEARCH_CONFIG_SQL),
+        migrations.AddField(
+            model_name='voting',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(sql=CREATE_TRIGGER_SQL, reverse_sql=DROP_TRIGGER_SQL),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(sql=CREATE_INDEXES_SQL, reverse_sql=DROP_INDEXES_SQL),
+            ],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='voting',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='voting_search_vector_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='voting',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='voting_title_trgm_idx', opclasses=['gin_trgm_ops']),
+                ),
+            ],
+        ),
+    ]
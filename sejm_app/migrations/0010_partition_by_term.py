@@ -0,0 +1,175 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Kadencje, które dostają partycje od razu (oprócz tych, które już są w bazie);
+# kolejne zakłada importer przez sejm_app.partitions.ensure_term_partitions
+INITIAL_TERMS = range(1, 11)
+
+# Tabele parliament.votings i parliament.individual_votes są przepisywane do
+# tabel partycjonowanych zakresami kadencji (PARTITION BY RANGE (term)).
+# PostgreSQL 13 nie obsługuje kolumn IDENTITY w tabelach partycjonowanych,
+# więc id dostaje zwykłą sekwencję, a klucze główne i unikalne muszą
+# obejmować kolumnę term. Klucze obce do głosowań znikają (DROP ... CASCADE):
+# musiałyby wskazywać (id, term) i blokowałyby TRUNCATE partycji kadencji.
+CREATE_PARTITIONS_SQL = f"""
+DO $$
+DECLARE
+    term_number integer;
+BEGIN
+    FOR term_number IN
+        SELECT generate_series({INITIAL_TERMS.start}, {INITIAL_TERMS.stop - 1})
+        UNION SELECT DISTINCT term FROM parliament.votings
+    LOOP
+        EXECUTE format('CREATE TABLE parliament.%I PARTITION OF parliament.votings_partitioned FOR VALUES FROM (%s) TO (%s)',
+                       'votings_term_' || term_number, term_number, term_number + 1);
+        EXECUTE format('CREATE TABLE parliament.%I PARTITION OF parliament.individual_votes_partitioned FOR VALUES FROM (%s) TO (%s)',
+                       'individual_votes_term_' || term_number, term_number, term_number + 1);
+    END LOOP;
+END
+$$;
+"""
+
+SEARCH_TRIGGER_SQL = (
+    'CREATE TRIGGER votings_search_vector_update '
+    'BEFORE INSERT OR UPDATE ON parliament.votings '
+    'FOR EACH ROW EXECUTE FUNCTION parliament.votings_search_vector_update()'
+)
+
+# Indeksy z 0004, 0005 i 0009 - te same nazwy, teraz na tabelach partycjonowanych
+INDEXES_SQL = [
+    'CREATE INDEX vote_member_voting_idx ON parliament.individual_votes (member_id, voting_id) INCLUDE (vote_choice)',
+    'CREATE INDEX vote_club_choice_idx ON parliament.individual_votes (club_id, vote_choice)',
+    'CREATE INDEX voting_term_date_idx ON parliament.votings (term, date)',
+    'CREATE INDEX voting_term_sitting_idx ON parliament.votings (term, sitting)',
+    'CREATE INDEX voting_search_vector_idx ON parliament.votings USING gin (search_vector)',
+    'CREATE INDEX voting_title_trgm_idx ON parliament.votings USING gin (title gin_trgm_ops)',
+]
+
+VOTE_FOREIGN_KEYS_SQL = [
+    'ALTER TABLE parliament.individual_votes ADD CONSTRAINT individual_votes_member_id_fk_members_id '
+    'FOREIGN KEY (member_id) REFERENCES parliament.members (id) DEFERRABLE INITIALLY DEFERRED',
+    'ALTER TABLE parliament.individual_votes ADD CONSTRAINT individual_votes_club_id_fk_clubs_id '
+    'FOREIGN KEY (club_id) REFERENCES parliament.clubs (id) DEFERRABLE INITIALLY DEFERRED',
+]
+
+FORWARD_SQL = [
+    'SET CONSTRAINTS ALL IMMEDIATE',
+    # Kolumna term jest kluczem partycjonowania - głosowania bez kadencji trzeba najpierw usunąć lub uzupełnić
+    'ALTER TABLE parliament.votings ALTER COLUMN term SET NOT NULL',
+    'CREATE TABLE parliament.votings_partitioned (LIKE parliament.votings) PARTITION BY RANGE (term)',
+    'CREATE TABLE parliament.individual_votes_partitioned (LIKE parliament.individual_votes, term integer NOT NULL) '
+    'PARTITION BY RANGE (term)',
+    CREATE_PARTITIONS_SQL,
+    # Partycje domyślne na wiersze kadencji bez własnej partycji
+    'CREATE TABLE parliament.votings_default PARTITION OF parliament.votings_partitioned DEFAULT',
+    'CREATE TABLE parliament.individual_votes_default PARTITION OF parliament.individual_votes_partitioned DEFAULT',
+    # Kopiowanie przed założeniem indeksów i triggera - wektory wyszukiwania są już policzone
+    'INSERT INTO parliament.votings_partitioned SELECT * FROM parliament.votings',
+    'INSERT INTO parliament.individual_votes_partitioned '
+    'SELECT v.*, t.term FROM parliament.individual_votes v JOIN parliament.votings t ON t.id = v.voting_id',
+    'DROP TABLE parliament.individual_votes',
+    # CASCADE usuwa klucze obce z tabel w schemacie analysis
+    'DROP TABLE parliament.votings CASCADE',
+    'ALTER TABLE parliament.votings_partitioned RENAME TO votings',
+    'ALTER TABLE parliament.individual_votes_partitioned RENAME TO individual_votes',
+    'CREATE SEQUENCE parliament.votings_id_seq OWNED BY parliament.votings.id',
+    "SELECT setval('parliament.votings_id_seq', coalesce(max(id), 0) + 1, false) FROM parliament.votings",
+    "ALTER TABLE parliament.votings ALTER COLUMN id SET DEFAULT nextval('parliament.votings_id_seq')",
+    'CREATE SEQUENCE parliament.individual_votes_id_seq OWNED BY parliament.individual_votes.id',
+    "SELECT setval('parliament.individual_votes_id_seq', coalesce(max(id), 0) + 1, false) FROM parliament.individual_votes",
+    "ALTER TABLE parliament.individual_votes ALTER COLUMN id SET DEFAULT nextval('parliament.individual_votes_id_seq')",
+    'ALTER TABLE parliament.votings ADD CONSTRAINT votings_pkey PRIMARY KEY (id, term)',
+    'ALTER TABLE parliament.votings ADD CONSTRAINT voting_number_sitting_day_term_uniq '
+    'UNIQUE (voting_number, sitting_day, term)',
+    'ALTER TABLE parliament.individual_votes ADD CONSTRAINT individual_votes_pkey PRIMARY KEY (id, term)',
+    # Kolejność kolumn jak w dawnym (voting, member) - głosy jednego głosowania w partycji
+    'ALTER TABLE parliament.individual_votes ADD CONSTRAINT vote_voting_member_term_uniq '
+    'UNIQUE (voting_id, member_id, term)',
+    *VOTE_FOREIGN_KEYS_SQL,
+    *INDEXES_SQL,
+    SEARCH_TRIGGER_SQL,
+    # Autovacuum nie zbiera statystyk samych tabel nadrzędnych
+    'ANALYZE parliament.votings',
+    'ANALYZE parliament.individual_votes',
+]
+
+REVERSE_SQL = [
+    'SET CONSTRAINTS ALL IMMEDIATE',
+    'CREATE TABLE parliament.votings_unpartitioned (LIKE parliament.votings)',
+    'ALTER TABLE parliament.votings_unpartitioned ALTER COLUMN term DROP NOT NULL',
+    'INSERT INTO parliament.votings_unpartitioned SELECT * FROM parliament.votings',
+    'CREATE TABLE parliament.individual_votes_unpartitioned (LIKE parliament.individual_votes)',
+    'INSERT INTO parliament.individual_votes_unpartitioned SELECT * FROM parliament.individual_votes',
+    'ALTER TABLE parliament.individual_votes_unpartitioned DROP COLUMN term',
+    'DROP TABLE parliament.individual_votes',
+    'DROP TABLE parliament.votings',
+    'ALTER TABLE parliament.votings_unpartitioned RENAME TO votings',
+    'ALTER TABLE parliament.individual_votes_unpartitioned RENAME TO individual_votes',
+    'ALTER TABLE parliament.votings ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY',
+    "SELECT setval(pg_get_serial_sequence('parliament.votings', 'id'), coalesce(max(id), 0) + 1, false) FROM parliament.votings",
+    'ALTER TABLE parliament.individual_votes ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY',
+    "SELECT setval(pg_get_serial_sequence('parliament.individual_votes', 'id'), coalesce(max(id), 0) + 1, false) "
+    'FROM parliament.individual_votes',
+    'ALTER TABLE parliament.votings ADD CONSTRAINT votings_pkey PRIMARY KEY (id)',
+    'ALTER TABLE parliament.votings ADD CONSTRAINT voting_number_sitting_day_term_uniq '
+    'UNIQUE (voting_number, sitting_day, term)',
+    'ALTER TABLE parliament.individual_votes ADD CONSTRAINT individual_votes_pkey PRIMARY KEY (id)',
+    'ALTER TABLE parliament.individual_votes ADD CONSTRAINT vote_voting_member_uniq UNIQUE (voting_id, member_id)',
+    'ALTER TABLE parliament.individual_votes ADD CONSTRAINT individual_votes_voting_id_fk_votings_id '
+    'FOREIGN KEY (voting_id) REFERENCES parliament.votings (id) DEFERRABLE INITIALLY DEFERRED',
+    *VOTE_FOREIGN_KEYS_SQL,
+    'ALTER TABLE analysis.club_cohesion ADD CONSTRAINT club_cohesion_voting_id_fk_votings_id '
+    'FOREIGN KEY (voting_id) REFERENCES parliament.votings (id) DEFERRABLE INITIALLY DEFERRED',
+    'ALTER TABLE analysis.analyzed_votings ADD CONSTRAINT analyzed_votings_voting_id_fk_votings_id '
+    'FOREIGN KEY (voting_id) REFERENCES parliament.votings (id) DEFERRABLE INITIALLY DEFERRED',
+    *INDEXES_SQL,
+    SEARCH_TRIGGER_SQL,
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sejm_app', '0009_voting_search'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(sql=FORWARD_SQL, reverse_sql=REVERSE_SQL),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='voting',
+                    name='term',
+                    field=models.IntegerField(),
+                ),
+                migrations.AddField(
+                    model_name='vote',
+                    name='term',
+                    field=models.IntegerField(),
+                ),
+                migrations.AlterField(
+                    model_name='vote',
+                    name='voting',
+                    field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='individual_votes', to='sejm_app.voting'),
+                ),
+                migrations.AlterUniqueTogether(
+                    name='vote',
+                    unique_together={('voting', 'member', 'term')},
+                ),
+                migrations.AlterField(
+                    model_name='clubcohesion',
+                    name='voting',
+                    field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='club_cohesion', to='sejm_app.voting'),
+                ),
+                migrations.AlterField(
+                    model_name='analyzedvoting',
+                    name='voting',
+                    field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='analyzed', serialize=False, to='sejm_app.voting'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-16 22:10
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sejm_app', '0010_partition_by_term'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberTimeline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.IntegerField()),
+                ('voting_ids', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), default=list, size=None)),
+                ('dates', django.contrib.postgres.fields.ArrayField(base_field=models.DateTimeField(null=True), default=list, size=None)),
+                ('choices', django.contrib.postgres.fields.ArrayField(base_field=models.SmallIntegerField(choices=[(1, 'Za'), (2, 'Przeciw'), (3, 'Wstrzymał się'), (4, 'Nie brał udziału'), (5, 'Nieobecny'), (6, 'Głos ważny'), (7, 'Głos nieważny')]), default=list, size=None)),
+                ('against_club', django.contrib.postgres.fields.ArrayField(base_field=models.BooleanField(), default=list, size=None)),
+                ('yes', models.IntegerField(default=0)),
+                ('no', models.IntegerField(default=0)),
+                ('abstain', models.IntegerField(default=0)),
+                ('absent', models.IntegerField(default=0)),
+                ('rebellions', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('member', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='timelines', to='sejm_app.member')),
+            ],
+            options={
+                'db_table': 'analysis"."member_timeline',
+                'unique_together': {('member', 'term')},
+            },
+        ),
+    ]
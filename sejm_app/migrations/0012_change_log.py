@@ -0,0 +1,100 @@
+# Generated by Django 4.2.7 on 2026-10-16 22:40
+
+from django.db import migrations, models
+
+# Wiersze dziennika dopisują triggery na parliament.votings i parliament.members,
+# więc trafiają do niego zmiany z każdej ścieżki zapisu (import, admin, ORM).
+# Aktualizacja bez zmiany wartości (update_or_create przy ponownym imporcie,
+# ON CONFLICT DO UPDATE) nie tworzy wpisu dzięki WHEN (OLD.* IS DISTINCT FROM NEW.*).
+# Ustawienie sejm.change_log = 'off' w transakcji wyłącza zapis (przenoszenie
+# wierszy między partycjami w sejm_app.partitions nie jest zmianą danych).
+CREATE_RECORD_FUNCTION_SQL = """
+CREATE FUNCTION parliament.change_log_record() RETURNS trigger AS $$
+DECLARE
+    entity text := TG_ARGV[0];
+BEGIN
+    IF current_setting('sejm.change_log', true) = 'off' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO parliament.change_log (kind, object_id, term, created_at)
+        VALUES (entity || '.deleted', OLD.id, (to_jsonb(OLD) ->> 'term')::integer, now());
+    ELSE
+        INSERT INTO parliament.change_log (kind, object_id, term, created_at)
+        VALUES (entity || CASE TG_OP WHEN 'INSERT' THEN '.created' ELSE '.updated' END,
+                NEW.id, (to_jsonb(NEW) ->> 'term')::integer, now());
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# Numer seq jest nadawany dopiero przy zatwierdzeniu transakcji (trigger
+# odroczony) pod blokadą doradczą sejm_app.changes.CHANGE_LOG_LOCK. Numery
+# z sekwencji pobierane w trakcie równoległych transakcji mogłyby stać się
+# widoczne nie po kolei, a odbiorca czytający "po numerze N" pominąłby wpis
+# zatwierdzony później z mniejszym numerem.
+CREATE_ASSIGN_SEQ_FUNCTION_SQL = """
+CREATE FUNCTION parliament.change_log_assign_seq() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(1578762243);
+    UPDATE parliament.change_log SET seq = nextval('parliament.change_log_seq')
+    WHERE id = NEW.id AND seq IS NULL;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+FORWARD_SQL = [
+    'CREATE SEQUENCE parliament.change_log_seq',
+    CREATE_RECORD_FUNCTION_SQL,
+    CREATE_ASSIGN_SEQ_FUNCTION_SQL,
+    'CREATE CONSTRAINT TRIGGER change_log_assign_seq AFTER INSERT ON parliament.change_log '
+    'DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION parliament.change_log_assign_seq()',
+    # Wyzwalacze wierszowe na tabeli partycjonowanej są kopiowane do jej partycji
+    # (także podłączanych później przez ATTACH PARTITION)
+    "CREATE TRIGGER votings_change_log AFTER INSERT OR DELETE ON parliament.votings "
+    "FOR EACH ROW EXECUTE FUNCTION parliament.change_log_record('voting')",
+    "CREATE TRIGGER votings_change_log_update AFTER UPDATE ON parliament.votings "
+    "FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION parliament.change_log_record('voting')",
+    "CREATE TRIGGER members_change_log AFTER INSERT OR DELETE ON parliament.members "
+    "FOR EACH ROW EXECUTE FUNCTION parliament.change_log_record('member')",
+    "CREATE TRIGGER members_change_log_update AFTER UPDATE ON parliament.members "
+    "FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION parliament.change_log_record('member')",
+]
+
+REVERSE_SQL = [
+    'DROP TRIGGER IF EXISTS members_change_log_update ON parliament.members',
+    'DROP TRIGGER IF EXISTS members_change_log ON parliament.members',
+    'DROP TRIGGER IF EXISTS votings_change_log_update ON parliament.votings',
+    'DROP TRIGGER IF EXISTS votings_change_log ON parliament.votings',
+    'DROP TRIGGER IF EXISTS change_log_assign_seq ON parliament.change_log',
+    'DROP FUNCTION IF EXISTS parliament.change_log_assign_seq()',
+    'DROP FUNCTION IF EXISTS parliament.change_log_record()',
+    'DROP SEQUENCE IF EXISTS parliament.change_log_seq',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sejm_app', '0011_member_timeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.BigIntegerField(editable=False, null=True, unique=True)),
+                ('kind', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('term', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'parliament"."change_log',
+            },
+        ),
+        migrations.RunSQL(sql=FORWARD_SQL, reverse_sql=REVERSE_SQL),
+    ]
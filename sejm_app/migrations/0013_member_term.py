@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-17 09:30
+
+from django.db import migrations, models
+
+# ID posłów z API są nadawane w każdej kadencji od nowa, więc wiersz posła
+# dostaje kadencję. Dotychczasowe wiersze biorą ją z najnowszej kadencji, w której
+# mają głosy; głosy starszych kadencji powiązane z nimi przez to samo ID
+# poprawia ponowny import tych kadencji (--import-members i --import-votings).
+FILL_TERM_SQL = """
+UPDATE parliament.members m SET term = v.term
+FROM (
+    SELECT member_id, max(term) AS term
+    FROM parliament.individual_votes
+    WHERE member_id IS NOT NULL
+    GROUP BY member_id
+) AS v
+WHERE v.member_id = m.id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sejm_app', '0012_change_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='term',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        # Zdarzenia odroczone z UPDATE (dziennik zmian) przed ALTER TABLE w tej samej transakcji
+        migrations.RunSQL(sql=[FILL_TERM_SQL, 'SET CONSTRAINTS ALL IMMEDIATE'], reverse_sql=migrations.RunSQL.noop),
+        migrations.AlterField(
+            model_name='member',
+            name='sejm_id',
+            field=models.CharField(blank=True, max_length=50, null=True),
+        ),
+        migrations.AlterUniqueTogether(
+            name='member',
+            unique_together={('term', 'sejm_id')},
+        ),
+    ]
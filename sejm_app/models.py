@@ -1,8 +1,34 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.db.models import JSONField
 
+class VoteChoice(models.IntegerChoices):
+    """Kody głosów zapisywane jako smallint zamiast tekstu z API."""
+    YES = 1, 'Za'
+    NO = 2, 'Przeciw'
+    ABSTAIN = 3, 'Wstrzymał się'
+    NOT_PARTICIPATING = 4, 'Nie brał udziału'
+    ABSENT = 5, 'Nieobecny'
+    # Głosowania "na listę" (np. wybór członków organów)
+    VOTE_VALID = 6, 'Głos ważny'
+    VOTE_INVALID = 7, 'Głos nieważny'
+
+    @classmethod
+    def from_api(cls, value):
+        """Zamienia wartość pola ``vote`` z API (np. 'YES') na kod; None dla nieznanych."""
+        try:
+            return cls[value]
+        except KeyError:
+            return None
+
+
 class Member(models.Model):
-    sejm_id = models.CharField(max_length=50, unique=True, null=True, blank=True)
+    """Poseł w jednej kadencji - API Sejmu nadaje ID posłów osobno w każdej kadencji."""
+    # NULL tylko dla wierszy sprzed list posłów per kadencja, bez głosów (migracja 0013)
+    term = models.IntegerField(null=True, blank=True)
+    sejm_id = models.CharField(max_length=50, null=True, blank=True)
     first_name = models.CharField(max_length=50, null=True, blank=True)
     last_name = models.CharField(max_length=50, null=True, blank=True)
     club = models.CharField(max_length=50, null=True, blank=True)
@@ -13,6 +39,7 @@ class Member(models.Model):
     email = models.EmailField(max_length=100, null=True, blank=True)
 
     class Meta:
+        unique_together = ('term', 'sejm_id')
         db_table = 'parliament"."members' 
         app_label = 'sejm_app'
 
@@ -31,47 +58,279 @@ class Voting(models.Model):
     present = models.IntegerField(null=True, blank=True)
     sitting = models.IntegerField(null=True, blank=True)
     sitting_day = models.IntegerField(null=True, blank=True)
-    term = models.IntegerField(null=True, blank=True)
+    # Klucz partycjonowania tabeli (partycja na kadencję, patrz sejm_app.partitions)
+    term = models.IntegerField()
     title = models.CharField(max_length=200, null=True, blank=True)
     topic = models.CharField(max_length=200, null=True, blank=True)
     total_voted = models.IntegerField(null=True, blank=True)
     voting_number = models.IntegerField(null=True, blank=True)
     yes = models.IntegerField(null=True, blank=True)
+    # Skrót wpisu z listy /votings z ostatniego importu szczegółów (tryb --incremental)
+    summary_hash = models.CharField(max_length=64, null=True, blank=True)
+    # Całe głosowanie imienne w jednym wierszu: bajt i-1 to kod VoteChoice posła
+    # o ID i z API (0 - brak głosu), patrz sejm_app.roll_calls
+    roll_call = models.BinaryField(null=True, blank=True, editable=False)
+    # Tytuł (waga A) i temat (waga B) dla wyszukiwania, patrz sejm_app.search.
+    # Wypełnia go trigger w bazie przy każdym INSERT/UPDATE - wartość zapisywana przez ORM jest ignorowana
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         unique_together = ('voting_number', 'sitting_day', 'term')
+        indexes = [
+            # Głosowania z zakresu dat i z danego posiedzenia w ramach kadencji
+            models.Index(fields=['term', 'date'], name='voting_term_date_idx'),
+            models.Index(fields=['term', 'sitting'], name='voting_term_sitting_idx'),
+            GinIndex(fields=['search_vector'], name='voting_search_vector_idx'),
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='voting_title_trgm_idx'),
+        ]
         db_table = 'parliament"."votings' 
         app_label = 'sejm_app'
 
     def __str__(self):
         return f"Voting {self.voting_number}/{self.sitting_day} - {self.title}"
+
+
+class Club(models.Model):
+    """Klub lub koło poselskie; głosy wskazują na klub zamiast powtarzać jego nazwę."""
+    code = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        db_table = 'parliament"."clubs'
+        app_label = 'sejm_app'
+
+    def __str__(self):
+        return self.code
     
 
 class Vote(models.Model):
     # Relacja do konkretnego głosowania
-    voting = models.ForeignKey(Voting, on_delete=models.CASCADE, related_name='individual_votes')
-    # Relacja do posła
-    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='member_votes', null=True, blank=True)
+    # (bez osobnego indeksu - pokrywa go unikalny indeks (voting, member, term)).
+    # Bez klucza obcego w bazie: klucz głosowań partycjonowanych to (id, term),
+    # a klucze obce blokowałyby TRUNCATE partycji kadencji - usuwanie kaskadowe robi ORM
+    voting = models.ForeignKey(Voting, on_delete=models.CASCADE, related_name='individual_votes', db_index=False, db_constraint=False)
+    # Kopia voting.term - klucz partycjonowania tabeli głosów
+    term = models.IntegerField()
+    # Relacja do posła (bez osobnego indeksu - pokrywa go indeks (member, voting))
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='member_votes', null=True, blank=True, db_index=False)
     # Pole MP jest unikalnym ID z API posłów. Jeśli poseł nie zostanie znaleziony, zapiszemy MP ID z API
     mp_id_api = models.IntegerField(null=True, blank=True) # Unikalne ID posła z API, jeśli nie mamy go w bazie
-    first_name = models.CharField(max_length=100, null=True, blank=True) # Zachowujemy na wypadek braku posła
+    # Imię i nazwisko zapisujemy tylko, gdy nie znaleziono posła - inaczej są w Member
+    first_name = models.CharField(max_length=100, null=True, blank=True)
     last_name = models.CharField(max_length=100, null=True, blank=True)
-    club = models.CharField(max_length=100, null=True, blank=True)
-    vote_choice = models.CharField(
-        max_length=20,
-        choices=[
-            ('YES', 'Za'),
-            ('NO', 'Przeciw'),
-            ('ABSTAIN', 'Wstrzymał się'),
-            ('NOT_PARTICIPATING', 'Nie brał udziału'), # Opcjonalne, jeśli to ma sens
-        ]
-    )
+    # Klub w chwili głosowania (posłowie zmieniają kluby w trakcie kadencji)
+    club = models.ForeignKey(Club, on_delete=models.PROTECT, related_name='votes', null=True, blank=True, db_index=False)
+    vote_choice = models.SmallIntegerField(choices=VoteChoice.choices)
 
     class Meta:
-        # Jeden poseł może głosować raz w danym głosowaniu
-        unique_together = ('voting', 'member')
+        # Jeden poseł może głosować raz w danym głosowaniu (unikalność w tabeli
+        # partycjonowanej musi obejmować klucz partycjonowania)
+        unique_together = ('voting', 'member', 'term')
+        indexes = [
+            # Wszystkie głosy posła; vote_choice w INCLUDE pozwala na index-only scan
+            models.Index(fields=['member', 'voting'], include=['vote_choice'], name='vote_member_voting_idx'),
+            models.Index(fields=['club', 'vote_choice'], name='vote_club_choice_idx'),
+        ]
         db_table = 'parliament"."individual_votes' # Nazwa tabeli dla głosów indywidualnych
         app_label = 'sejm_app'
 
+    def save(self, *args, **kwargs):
+        if self.term is None and self.voting_id is not None:
+            self.term = self.voting.term
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.member or f'{self.first_name} {self.last_name}'} głosował {self.get_vote_choice_display()} w {self.voting}"
+
+class ImportCheckpoint(models.Model):
+    """Ostatnie zatwierdzone głosowanie importu danej kadencji (dla --resume)."""
+    term = models.IntegerField(unique=True)
+    last_sitting_day = models.IntegerField(null=True, blank=True)
+    last_voting_number = models.IntegerField(null=True, blank=True)
+    processed_votings = models.IntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'parliament"."import_checkpoints'
+        app_label = 'sejm_app'
+
+    def __str__(self):
+        return f"Term {self.term} checkpoint at {self.last_sitting_day}/{self.last_voting_number}"
+
+
+class DataGeneration(models.Model):
+    """Wersja danych: każdy zatwierdzony zapis importu dodaje wiersz, a jego ``id`` to numer generacji.
+
+    Numer wersjonuje klucze cache odpowiedzi API (``sejm_app.api_cache``).
+    """
+    term = models.IntegerField(null=True, blank=True)
+    # Co się zmieniło: 'members', 'votings' albo 'analysis' (agregaty)
+    source = models.CharField(max_length=20)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'parliament"."data_generations'
+        app_label = 'sejm_app'
+
+    def __str__(self):
+        return f"Generation {self.pk} ({self.source}, term {self.term})"
+
+
+class ChangeLogEntry(models.Model):
+    """Wpis dziennika zmian głosowań i posłów dla odbiorców zewnętrznych (patrz sejm_app.changes).
+
+    Wiersze dopisują triggery w bazie; ``seq`` jest nadawany przy zatwierdzeniu
+    transakcji, więc rośnie w kolejności, w jakiej zmiany stają się widoczne.
+    """
+    # Numer w dzienniku; NULL do zatwierdzenia transakcji, która dopisała wiersz
+    seq = models.BigIntegerField(null=True, unique=True, editable=False)
+    # '<encja>.<zdarzenie>': voting.created, voting.updated, voting.deleted, member.created, ...
+    kind = models.CharField(max_length=20)
+    # id głosowania albo posła
+    object_id = models.BigIntegerField()
+    term = models.IntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'parliament"."change_log'
+        app_label = 'sejm_app'
+
+    def __str__(self):
+        return f"#{self.seq} {self.kind} {self.object_id}"
+
+
+# Agregaty w schemacie analysis, utrzymywane przez sejm_app.analysis.refresh_analysis
+
+class ClubCohesion(models.Model):
+    """Spójność klubu w jednym głosowaniu."""
+    # Bez osobnych indeksów na FK - pokrywają je (voting, club) i (club, voting).
+    # Głosowania są partycjonowane, więc bez klucza obcego w bazie (jak Vote.voting)
+    voting = models.ForeignKey(Voting, on_delete=models.CASCADE, related_name='club_cohesion', db_index=False, db_constraint=False)
+    club = models.ForeignKey(Club, on_delete=models.CASCADE, related_name='cohesion', db_index=False)
+    members = models.IntegerField()
+    yes = models.IntegerField()
+    no = models.IntegerField()
+    abstain = models.IntegerField()
+    # Nieobecni i niegłosujący
+    not_voting = models.IntegerField()
+    # Indeks Rice'a |za - przeciw| / (za + przeciw); NULL, gdy nikt z klubu nie głosował za ani przeciw
+    rice_index = models.FloatField(null=True, blank=True)
+    # Najczęstszy głos spośród za/przeciw/wstrzymał się; NULL przy remisie
+    majority_choice = models.SmallIntegerField(choices=VoteChoice.choices, null=True, blank=True)
+
+    class Meta:
+        unique_together = ('voting', 'club')
+        indexes = [
+            models.Index(fields=['club', 'voting'], name='cohesion_club_voting_idx'),
+        ]
+        db_table = 'analysis"."club_cohesion'
+        app_label = 'sejm_app'
+
+    def __str__(self):
+        return f"{self.club} in {self.voting_id}: Rice {self.rice_index}"
+
+
+class MemberStats(models.Model):
+    """Frekwencja posła i zgodność z większością jego klubu w danej kadencji."""
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='stats', db_index=False)
+    term = models.IntegerField()
+    # Głosowania, w których poseł ma zapisany głos (także nieobecność)
+    votings = models.IntegerField(default=0)
+    absent = models.IntegerField(default=0)
+    # Głosy za/przeciw/wstrzymał się tam, gdzie klub miał większość
+    votes_with_club_majority_known = models.IntegerField(default=0)
+    votes_with_club_majority = models.IntegerField(default=0)
+    attendance_rate = models.FloatField(null=True, blank=True)
+    loyalty_rate = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('member', 'term')
+        indexes = [
+            models.Index(fields=['term', 'loyalty_rate'], name='member_stats_term_loyalty_idx'),
+            models.Index(fields=['term', 'attendance_rate'], name='member_stats_term_attend_idx'),
+        ]
+        db_table = 'analysis"."member_stats'
+        app_label = 'sejm_app'
+
+    def __str__(self):
+        return f"{self.member} term {self.term}: loyalty {self.loyalty_rate}, attendance {self.attendance_rate}"
+
+
+class MemberTimeline(models.Model):
+    """Historia głosów posła w kadencji w jednym wierszu, w kolejności (data, id głosowania).
+
+    Tablice ``voting_ids``, ``dates``, ``choices`` i ``against_club`` mają tę samą
+    długość; liczniki to sumy z całej kadencji, a narastające wartości dla
+    kolejnych głosowań daje ``running_counters``.
+    """
+    # Bez osobnego indeksu - pokrywa go unikalny (member, term)
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='timelines', db_index=False)
+    term = models.IntegerField()
+    voting_ids = ArrayField(models.BigIntegerField(), default=list)
+    dates = ArrayField(models.DateTimeField(null=True), default=list)
+    choices = ArrayField(models.SmallIntegerField(choices=VoteChoice.choices), default=list)
+    # Głos za/przeciw/wstrzymał się inny niż większość klubu posła
+    against_club = ArrayField(models.BooleanField(), default=list)
+    yes = models.IntegerField(default=0)
+    no = models.IntegerField(default=0)
+    abstain = models.IntegerField(default=0)
+    absent = models.IntegerField(default=0)
+    rebellions = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('member', 'term')
+        db_table = 'analysis"."member_timeline'
+        app_label = 'sejm_app'
+
+    def __str__(self):
+        return f"{self.member} term {self.term}: {len(self.voting_ids)} votes, {self.rebellions} rebellions"
+
+    def running_counters(self):
+        """Wpisy historii z licznikami narastającymi do danego głosowania włącznie."""
+        counters = dict.fromkeys(['yes', 'no', 'abstain', 'absent', 'rebellions'], 0)
+        names = {VoteChoice.YES: 'yes', VoteChoice.NO: 'no', VoteChoice.ABSTAIN: 'abstain', VoteChoice.ABSENT: 'absent'}
+        entries = []
+        for voting_id, date, choice, against_club in zip(self.voting_ids, self.dates, self.choices, self.against_club):
+            if choice in names:
+                counters[names[choice]] += 1
+            counters['rebellions'] += against_club
+            entries.append({'voting': voting_id, 'date': date, 'vote': VoteChoice(choice).name, 'against_club': against_club, **counters})
+        return entries
+
+
+class AnalyzedVoting(models.Model):
+    """Głosowanie już wliczone do agregatów; ``summary_hash`` pozwala wykryć późniejszą zmianę."""
+    voting = models.OneToOneField(Voting, on_delete=models.CASCADE, primary_key=True, related_name='analyzed', db_constraint=False)
+    summary_hash = models.CharField(max_length=64, null=True, blank=True)
+    analyzed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'analysis"."analyzed_votings'
+        app_label = 'sejm_app'
+
+    def __str__(self):
+        return f"Analyzed voting {self.voting_id}"
+
+
+class MemberSimilarity(models.Model):
+    """Najbardziej podobnie głosujący posłowie w kadencji (top-k sąsiadów, patrz sejm_app.similarity)."""
+    term = models.IntegerField()
+    # Bez osobnego indeksu - pokrywa go (term, member, rank)
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='similar_members', db_index=False)
+    neighbour = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='+')
+    rank = models.SmallIntegerField()
+    # Odsetek wspólnych głosowań, w których oddali ten sam głos
+    agreement = models.FloatField()
+    # Podobieństwo kosinusowe wektorów głosów (za = 1, przeciw = -1, pozostałe = 0)
+    similarity = models.FloatField(null=True, blank=True)
+    shared_votings = models.IntegerField()
+
+    class Meta:
+        unique_together = ('term', 'member', 'rank')
+        db_table = 'analysis"."member_similarity'
+        app_label = 'sejm_app'
+
     def __str__(self):
-        return f"{self.member or self.first_name + ' ' + self.last_name} głosował {self.vote_choice} w {self.voting}"
\ No newline at end of file
+        return f"{self.member} ~ {self.neighbour} (term {self.term}, #{self.rank}: {self.agreement:.3f})"
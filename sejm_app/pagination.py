@@ -0,0 +1,135 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Stronicowanie po kluczu (keyset) zamiast OFFSET.
+
+    Kursor to zakodowane wartości pól ``ordering`` ostatniego wiersza strony;
+    następna strona to ``WHERE (pola) > (kursor)``, więc koszt zapytania nie
+    rośnie z numerem strony i korzysta z indeksu na tych polach. Ostatnie pole
+    musi być unikalne (zwykle ``id``). Wartości NULL sortowane są na końcu,
+    tak jak domyślnie w PostgreSQL. Widok może nadpisać ``ordering`` atrybutem
+    ``keyset_ordering``; ``-`` przed nazwą oznacza kolejność malejącą, a pole
+    może być też adnotacją querysetu (np. ranking wyszukiwania).
+    """
+
+    ordering = ('id',)
+    page_size = 100
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = tuple(getattr(view, 'keyset_ordering', self.ordering))
+        self.page_size = self.get_page_size(request)
+        self.fields = {name: self._field(queryset, name) for name in self._names()}
+
+        queryset = queryset.order_by(*[
+            F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_last=True)
+            for name, descending in self._directions()
+        ])
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(self._after(cursor))
+
+        # Jeden wiersz więcej mówi, czy istnieje następna strona - bez COUNT(*)
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def _directions(self):
+        return [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def _names(self):
+        return [name for name, _ in self._directions()]
+
+    @staticmethod
+    def _field(queryset, name):
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        return queryset.model._meta.get_field(name)
+
+    def _after(self, cursor):
+        # (a, b) > (x, y)  <=>  a > x  OR  (a = x AND b > y), z NULL na końcu;
+        # dla pól malejących "dalej" znaczy "mniejsze"
+        condition = Q(pk__in=[])
+        equal_prefix = Q()
+        for (name, descending), value in zip(self._directions(), cursor):
+            if value is None:
+                # Za NULL-em są już tylko kolejne NULL-e - zostaje porównanie równości
+                equal_prefix &= Q(**{f'{name}__isnull': True})
+                continue
+            greater = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+            if self.fields[name].null:
+                greater |= Q(**{f'{name}__isnull': True})
+            condition |= equal_prefix & greater
+            equal_prefix &= Q(**{name: value})
+        return condition
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, instance):
+        values = []
+        for name in self._names():
+            value = getattr(instance, name)
+            values.append(None if value is None else str(value))
+        token = base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                None if value is None else self.fields[name].to_python(value)
+                for name, value in zip(self._names(), values)
+            ]
+        except (binascii.Error, UnicodeError, ValueError, TypeError, ValidationError) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_first_link(self):
+        return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('first', self.get_first_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'first': {'type': 'string', 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,71 @@
+import os
+import re
+
+# Kolejka (kadencja, strumień, linia) do procesu głównego, ustawiana w każdym workerze
+_output_queue = None
+
+
+def parse_terms(value):
+    """Zamienia zapis typu ``'1-10'`` albo ``'7,9-10'`` na posortowaną listę kadencji."""
+    terms = set()
+    for part in value.split(','):
+        match = re.fullmatch(r'\s*(\d+)\s*(?:-\s*(\d+)\s*)?', part)
+        if not match:
+            raise ValueError(f'Invalid term range: {part!r}')
+        first = int(match.group(1))
+        last = int(match.group(2) or first)
+        if first < 1 or last < first:
+            raise ValueError(f'Invalid term range: {part!r}')
+        terms.update(range(first, last + 1))
+    return sorted(terms)
+
+
+class QueueWriter:
+    """Plik dla ``OutputWrapper``, który przekazuje pełne linie do procesu głównego."""
+
+    def __init__(self, queue, term, stream):
+        self.queue = queue
+        self.term = term
+        self.stream = stream
+        self._buffer = ''
+
+    def write(self, text):
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split('\n')
+        for line in lines:
+            self.queue.put((self.term, self.stream, line))
+
+    def flush(self):
+        if self._buffer:
+            self.queue.put((self.term, self.stream, self._buffer))
+            self._buffer = ''
+
+
+def init_worker(queue):
+    """Inicjalizator procesu puli: własna konfiguracja Django i własne połączenie z bazą."""
+    global _output_queue
+    _output_queue = queue
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sejm_project.settings')
+    import django
+
+    django.setup()
+
+
+def import_term(term, import_args):
+    """Importuje głosowania jednej kadencji w procesie puli i zwraca podsumowanie metryk."""
+    from django.core.management import call_command
+    from django.db import connections
+
+    from sejm_app.management.commands.import_sejm_data import Command
+
+    stdout = QueueWriter(_output_queue, term, 'stdout')
+    stderr = QueueWriter(_output_queue, term, 'stderr')
+    command = Command()
+    try:
+        call_command(command, '--term', str(term), '--import-votings', *import_args, stdout=stdout, stderr=stderr)
+    finally:
+        stdout.flush()
+        stderr.flush()
+        # Proces puli może dostać kolejną kadencję - bez otwartych transakcji i połączeń
+        connections.close_all()
+    return command.summary
@@ -0,0 +1,363 @@
+import io
+import json
+import re
+import time
+from datetime import datetime
+
+from django.db import OperationalError, connection, models, transaction
+from django.utils import timezone
+
+from sejm_app.api_cache import bump_generation
+from sejm_app.changes import log_deleted_votings, log_replaced_votings, suppress_change_log
+from sejm_app.models import AnalyzedVoting, ClubCohesion, MemberStats, MemberTimeline, Vote, Voting
+
+# Tabele partycjonowane zakresami kadencji (migracja 0010): partycja
+# <tabela>_term_<N> na każdą kadencję i <tabela>_default na pozostałe wiersze
+PARTITIONED_MODELS = (Vote, Voting)
+
+# Klucz blokady doradczej PostgreSQL dla zakładania partycji
+PARTITION_LOCK = 0x5E1A0002
+
+
+def _table(model):
+    """(schemat, tabela) z ``db_table`` w postaci 'schemat"."tabela'."""
+    return tuple(model._meta.db_table.split('"."'))
+
+
+def partition_name(model, term):
+    return f'{_table(model)[1]}_term_{term}'
+
+
+def _qualified(schema, table):
+    quote_name = connection.ops.quote_name
+    return f'{quote_name(schema)}.{quote_name(table)}'
+
+
+def _fire_deferred_triggers(cursor):
+    """Wykonuje odroczone zdarzenia triggerów (klucze obce) zapisów z bieżącej transakcji.
+
+    TRUNCATE, DETACH PARTITION i DROP TABLE odmawiają pracy na tabeli
+    z oczekującymi zdarzeniami. Wszystkie ograniczenia odroczone w bazie są
+    INITIALLY DEFERRED, więc po sprawdzeniu wraca tryb domyślny.
+    """
+    cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+    cursor.execute('SET CONSTRAINTS ALL DEFERRED')
+
+
+def term_partitions(model):
+    """Kadencje, które mają własną partycję w tabeli modelu."""
+    schema, table = _table(model)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            '''
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass AND c.relname LIKE %s
+            ''',
+            [_qualified(schema, table), f'{table}_term_%'],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    return sorted(int(name.rsplit('_', 1)[1]) for name in names)
+
+
+def ensure_term_partitions(term):
+    """Zakłada partycje kadencji ``term`` w obu tabelach, jeśli ich jeszcze nie ma.
+
+    Wiersze kadencji, które trafiły wcześniej do partycji domyślnej, są do nich
+    przenoszone (PostgreSQL nie pozwala dodać partycji, której wartości są już
+    w partycji domyślnej). Zwraca listę założonych partycji.
+    """
+    created = []
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Równoległe importy kadencji (--terms) zakładają partycje po kolei
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [PARTITION_LOCK])
+            for model in PARTITIONED_MODELS:
+                schema, table = _table(model)
+                name = partition_name(model, term)
+                cursor.execute('SELECT to_regclass(%s)', [_qualified(schema, name)])
+                if cursor.fetchone()[0] is not None:
+                    continue
+                parent = _qualified(schema, table)
+                default = _qualified(schema, f'{table}_default')
+                cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {default} WHERE term = %s)', [term])
+                move_rows = cursor.fetchone()[0]
+                if move_rows:
+                    _fire_deferred_triggers(cursor)
+                    cursor.execute(f'ALTER TABLE {parent} DETACH PARTITION {default}')
+                cursor.execute(
+                    f'CREATE TABLE {_qualified(schema, name)} PARTITION OF {parent} '
+                    f'FOR VALUES FROM (%s) TO (%s)',
+                    [term, term + 1],
+                )
+                if move_rows:
+                    # Przeniesienie między partycjami nie jest zmianą dla odbiorców dziennika
+                    with suppress_change_log(cursor):
+                        cursor.execute(f'INSERT INTO {parent} SELECT * FROM {default} WHERE term = %s', [term])
+                        cursor.execute(f'DELETE FROM {default} WHERE term = %s', [term])
+                    cursor.execute(f'ALTER TABLE {parent} ATTACH PARTITION {default} DEFAULT')
+                created.append(name)
+    return created
+
+
+def truncate_term(term):
+    """Usuwa wszystkie głosowania i głosy kadencji jednym TRUNCATE jej partycji.
+
+    Zamiast usuwania wiersz po wierszu (i martwych krotek do odkurzenia)
+    partycje są opróżniane od razu; agregaty kadencji w schemacie ``analysis``
+    są usuwane razem z nimi, bo nie mają kluczy obcych do głosowań.
+    TRUNCATE blokuje partycje kadencji do końca transakcji i nie uruchamia
+    triggerów, więc usunięcia głosowań trafiają do dziennika zmian osobno.
+
+    Opróżnienie jest zatwierdzane od razu, a ponowny import dopisuje głosowania
+    w kolejnych transakcjach, więc do jego końca kadencja jest pusta lub
+    niepełna dla czytelników API. Do użytku tylko przy wyłączonym API;
+    na działającej instancji kadencję przebudowuje ``TermRebuild``.
+    """
+    ensure_term_partitions(term)
+    with transaction.atomic():
+        ClubCohesion.objects.filter(voting__term=term).delete()
+        AnalyzedVoting.objects.filter(voting__term=term).delete()
+        MemberStats.objects.filter(term=term).delete()
+        MemberTimeline.objects.filter(term=term).delete()
+        tables = ', '.join(_qualified(_table(model)[0], partition_name(model, term)) for model in PARTITIONED_MODELS)
+        with connection.cursor() as cursor:
+            log_deleted_votings(cursor, _qualified(_table(Voting)[0], partition_name(Voting, term)), term)
+            _fire_deferred_triggers(cursor)
+            cursor.execute(f'TRUNCATE {tables}')
+        bump_generation(term, 'votings')
+
+
+# Funkcja triggera wyszukiwania z migracji 0009 (na tabelach-cieniach też liczy search_vector)
+SEARCH_VECTOR_FUNCTION = 'parliament.votings_search_vector_update()'
+SHADOW_SUFFIX = '_rebuild'
+# Kod błędu PostgreSQL lock_not_available (przekroczony lock_timeout)
+LOCK_NOT_AVAILABLE = '55P03'
+
+
+def _copy_value(field, value):
+    """Wartość pola w formacie tekstowym COPY."""
+    if value is None:
+        return '\\N'
+    if isinstance(field, models.JSONField):
+        value = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, (bytes, memoryview)):
+        value = '\\x' + bytes(value).hex()
+    elif isinstance(value, datetime):
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        value = value.isoformat()
+    elif isinstance(value, bool):
+        value = 't' if value else 'f'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+class TermRebuild:
+    """Przebudowa kadencji w tabelach-cieniach podmienianych atomowo na jej partycje.
+
+    ``start`` zakłada puste kopie partycji kadencji bez indeksów, do których
+    ``add_voting``/``flush`` ładują wiersze przez COPY. ``build_indexes`` zakłada
+    potem indeksy i ograniczenia takie jak w tabelach nadrzędnych, a ``swap``
+    w jednej krótkiej transakcji odłącza stare partycje i podłącza nowe.
+    Do tego momentu czytelnicy widzą stare dane. Głosowania zachowują
+    dotychczasowe ``id``, nowe dostają je z sekwencji tabeli.
+    """
+
+    def __init__(self, term, batch_size=5000):
+        self.term = term
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self.elapsed = 0.0
+        self._voting_fields = [field for field in Voting._meta.concrete_fields if field.name != 'search_vector']
+        self._vote_fields = [field for field in Vote._meta.concrete_fields if not field.primary_key]
+        self._votings = []
+        self._votes = []
+        self._voting_ids = {}
+        self._loaded = set()
+        self._free_ids = []
+
+    def _names(self, model):
+        """(tabela nadrzędna, partycja kadencji, tabela-cień) z nazwami kwalifikowanymi schematem."""
+        schema, table = _table(model)
+        partition = partition_name(model, self.term)
+        return _qualified(schema, table), _qualified(schema, partition), _qualified(schema, partition + SHADOW_SUFFIX)
+
+    def start(self):
+        ensure_term_partitions(self.term)
+        self.discard()
+        with connection.cursor() as cursor:
+            for model in PARTITIONED_MODELS:
+                parent, _, shadow = self._names(model)
+                # INCLUDING DEFAULTS przenosi nextval() z sekwencji id tabeli nadrzędnej
+                cursor.execute(f'CREATE TABLE {shadow} (LIKE {parent} INCLUDING DEFAULTS)')
+            _, votings, shadow_votings = self._names(Voting)
+            cursor.execute(
+                f'CREATE TRIGGER shadow_search_vector_update BEFORE INSERT ON {shadow_votings} '
+                f'FOR EACH ROW EXECUTE FUNCTION {SEARCH_VECTOR_FUNCTION}'
+            )
+            cursor.execute(f'SELECT sitting_day, voting_number, id FROM {votings}')
+            self._voting_ids = {(sitting_day, voting_number): voting_id for sitting_day, voting_number, voting_id in cursor.fetchall()}
+        return self
+
+    def add_voting(self, voting, votes):
+        """Dodaje niezapisane ``Voting`` z jego głosami; zwraca False dla powtórzonego głosowania."""
+        key = (voting.sitting_day, voting.voting_number)
+        if key in self._loaded:
+            return False
+        self._loaded.add(key)
+        voting.id = self._voting_ids.get(key) or self._next_voting_id()
+        self._votings.append(voting)
+        # Jak w VoteBulkWriter: przy powtórzonym pośle wygrywa ostatni głos
+        linked = {}
+        for vote in votes:
+            vote.voting_id = voting.id
+            if vote.member_id is None:
+                self._votes.append(vote)
+            else:
+                linked[vote.member_id] = vote
+        self._votes.extend(linked.values())
+        if len(self._votes) >= self.batch_size:
+            self.flush()
+        return True
+
+    def missing_votings(self, keys):
+        """Klucze (dzień posiedzenia, numer) z ``keys``, których głosowań nie załadowano."""
+        return [key for key in keys if key not in self._loaded]
+
+    def _next_voting_id(self):
+        if not self._free_ids:
+            parent, _, _ = self._names(Voting)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, 100)",
+                    [parent],
+                )
+                self._free_ids = [row[0] for row in cursor.fetchall()][::-1]
+        return self._free_ids.pop()
+
+    def flush(self):
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            for model, fields, rows in ((Voting, self._voting_fields, self._votings), (Vote, self._vote_fields, self._votes)):
+                if not rows:
+                    continue
+                _, _, shadow = self._names(model)
+                buffer = io.StringIO()
+                for row in rows:
+                    buffer.write('\t'.join(_copy_value(field, getattr(row, field.attname)) for field in fields) + '\n')
+                buffer.seek(0)
+                columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+                cursor.copy_expert(f'COPY {shadow} ({columns}) FROM STDIN', buffer)
+        self.rows_written += len(self._votes)
+        self.elapsed += time.perf_counter() - start
+        self._votings = []
+        self._votes = []
+
+    @property
+    def rows_per_second(self):
+        return self.rows_written / self.elapsed if self.elapsed else 0.0
+
+    def build_indexes(self):
+        """Zakłada na tabelach-cieniach klucze, klucze obce i indeksy tabel nadrzędnych.
+
+        Te same definicje pozwalają PostgreSQL przy ATTACH PARTITION podpiąć
+        gotowe indeksy i klucze obce zamiast budować i sprawdzać je pod blokadą,
+        a CHECK na kolumnie term - pominąć skanowanie tabeli.
+        """
+        self.flush()
+        quote_name = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TRIGGER shadow_search_vector_update ON {self._names(Voting)[2]}")
+            for model in PARTITIONED_MODELS:
+                parent, _, shadow = self._names(model)
+                shadow_name = partition_name(model, self.term) + SHADOW_SUFFIX
+                cursor.execute(
+                    "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+                    "WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f') ORDER BY contype DESC",
+                    [parent],
+                )
+                for name, kind, definition in cursor.fetchall():
+                    # Nazwy indeksów kluczy są wspólne dla schematu - stąd prefiks tabeli
+                    name = name if kind == 'f' else f'{shadow_name}_{name}'
+                    cursor.execute(f'ALTER TABLE {shadow} ADD CONSTRAINT {quote_name(name)} {definition}')
+                cursor.execute(
+                    '''
+                    SELECT c.relname, pg_get_indexdef(i.indexrelid)
+                    FROM pg_index i
+                    JOIN pg_class c ON c.oid = i.indexrelid
+                    WHERE i.indrelid = %s::regclass
+                      AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = i.indexrelid AND k.conrelid = i.indrelid)
+                    ''',
+                    [parent],
+                )
+                for name, definition in cursor.fetchall():
+                    cursor.execute(re.sub(
+                        r'^CREATE (UNIQUE )?INDEX \S+ ON ONLY \S+ ',
+                        lambda match: f"CREATE {match.group(1) or ''}INDEX {quote_name(f'{shadow_name}_{name}')} ON {shadow} ",
+                        definition,
+                    ))
+                cursor.execute(
+                    f'ALTER TABLE {shadow} ADD CONSTRAINT term_range CHECK (term >= %s AND term < %s)',
+                    [self.term, self.term + 1],
+                )
+                cursor.execute(f'ANALYZE {shadow}')
+
+    def swap(self, lock_timeout='5s', attempts=5):
+        """Podmienia partycje kadencji na tabele-cienie w jednej transakcji.
+
+        DETACH PARTITION w PostgreSQL 13 bierze blokadę wyłączną tabeli
+        nadrzędnej; ``lock_timeout`` nie pozwala, żeby oczekiwanie na długie
+        zapytania wstrzymało na dłużej wszystkie odczyty - po przekroczeniu
+        podmiana jest ponawiana.
+        """
+        for attempt in range(1, attempts + 1):
+            try:
+                with transaction.atomic():
+                    self._swap(lock_timeout)
+                return
+            except OperationalError as exc:
+                if getattr(exc.__cause__, 'pgcode', None) != LOCK_NOT_AVAILABLE or attempt == attempts:
+                    raise
+                time.sleep(attempt)
+
+    def _swap(self, lock_timeout):
+        quote_name = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('lock_timeout', %s, true)", [lock_timeout])
+            # Agregaty usuniętych głosowań - bez kluczy obcych nie znikną same
+            _, votings, shadow_votings = self._names(Voting)
+            for model in (ClubCohesion, AnalyzedVoting):
+                cursor.execute(
+                    f'DELETE FROM {quote_name(model._meta.db_table)} WHERE voting_id IN '
+                    f'(SELECT id FROM {votings} EXCEPT SELECT id FROM {shadow_votings})'
+                )
+            # Tabele-cienie ładuje COPY bez triggerów dziennika - różnice są liczone tutaj
+            log_replaced_votings(cursor, votings, shadow_votings, self.term)
+            _fire_deferred_triggers(cursor)
+            for model in PARTITIONED_MODELS:
+                parent, partition, shadow = self._names(model)
+                schema, _ = _table(model)
+                name = partition_name(model, self.term)
+                cursor.execute(f'ALTER TABLE {parent} DETACH PARTITION {partition}')
+                cursor.execute(f'DROP TABLE {partition}')
+                cursor.execute(f'ALTER TABLE {parent} ATTACH PARTITION {shadow} FOR VALUES FROM (%s) TO (%s)', [self.term, self.term + 1])
+                cursor.execute(f'ALTER TABLE {shadow} RENAME TO {quote_name(name)}')
+                # Indeksy bez przyrostka, żeby następna przebudowa mogła użyć tych samych nazw
+                cursor.execute(
+                    'SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE i.indrelid = %s::regclass',
+                    [partition],
+                )
+                prefix = name + SHADOW_SUFFIX + '_'
+                for (index_name,) in cursor.fetchall():
+                    if index_name.startswith(prefix):
+                        cursor.execute(
+                            f'ALTER INDEX {_qualified(schema, index_name)} '
+                            f'RENAME TO {quote_name(name + "_" + index_name[len(prefix):])}'
+                        )
+            bump_generation(self.term, 'votings')
+
+    def discard(self):
+        with connection.cursor() as cursor:
+            for model in PARTITIONED_MODELS:
+                cursor.execute(f'DROP TABLE IF EXISTS {self._names(model)[2]}')
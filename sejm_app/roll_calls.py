@@ -0,0 +1,33 @@
+from sejm_app.models import VoteChoice
+
+# Kod 0 w upakowanym wektorze oznacza posła, który nie ma głosu w danym głosowaniu
+NO_VOTE = 0
+# Zabezpieczenie przed ogromnym wektorem dla błędnego ID z API
+MAX_MP_ID = 2048
+
+
+def pack_roll_call(choices_by_mp_id):
+    """Pakuje {ID posła z API: kod VoteChoice} do bajtów (bajt i-1 dla posła i).
+
+    ID posłów z API są w ramach kadencji stałymi, małymi liczbami, więc
+    wektor ma ok. 460 bajtów na głosowanie zamiast setek wierszy.
+    """
+    if not choices_by_mp_id:
+        return None
+    if min(choices_by_mp_id) < 1 or max(choices_by_mp_id) > MAX_MP_ID:
+        raise ValueError(f'MP ids must be between 1 and {MAX_MP_ID} to be packed')
+    packed = bytearray(max(choices_by_mp_id))
+    for mp_id, choice in choices_by_mp_id.items():
+        packed[mp_id - 1] = choice
+    return bytes(packed)
+
+
+def unpack_roll_call(packed):
+    """Odwrotność ``pack_roll_call``: zwraca {ID posła z API: VoteChoice}."""
+    if not packed:
+        return {}
+    return {
+        position + 1: VoteChoice(code)
+        for position, code in enumerate(bytes(packed))
+        if code != NO_VOTE
+    }
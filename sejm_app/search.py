@@ -0,0 +1,27 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+
+from sejm_app.models import Voting
+
+# Konfiguracja wyszukiwania pełnotekstowego z migracji 0009: kopia 'polish'
+# (jeśli serwer ją ma) albo 'simple' z unaccent
+SEARCH_CONFIG = 'parliament.polish'
+
+
+def search_votings(text, term=None):
+    """Głosowania pasujące do frazy ``text`` z adnotacją ``rank`` (im wyżej, tym lepiej).
+
+    Pasują głosowania, których ``search_vector`` (tytuł z wagą A, temat z wagą B)
+    spełnia zapytanie w składni ``websearch_to_tsquery``, oraz te, w których tytule
+    jest fragment podobny trygramowo do frazy (literówki, odmiana). Oba warunki
+    korzystają z indeksów GIN.
+    """
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    queryset = Voting.objects.filter(Q(search_vector=query) | Q(title__trigram_word_similar=text))
+    if term is not None:
+        queryset = queryset.filter(term=term)
+    # ts_rank i similarity zwracają real; double precision daje dokładny kursor stronicowania
+    return queryset.annotate(
+        rank=Cast(SearchRank(F('search_vector'), query) + TrigramWordSimilarity(text, 'title'), FloatField()),
+    )
@@ -0,0 +1,243 @@
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from sejm_app.json_stream import iter_json_array
+
+DEFAULT_TIMEOUT = 30
+STREAM_CHUNK_SIZE = 64 * 1024
+# Kody, przy których API Sejmu zwykle odpowiada poprawnie po chwili
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class OfflineCacheMiss(LookupError):
+    """Brak odpowiedzi w cache, a tryb offline zabrania sięgania do sieci."""
+
+
+class JsonItemStream:
+    """Elementy tablicy JSON z ``SejmApiClient.iter_json_items``.
+
+    Po przejściu pętli ``complete`` mówi, czy tablica została doczytana do
+    końca - przy błędzie w połowie odpowiedzi iteracja kończy się wcześniej.
+    """
+
+    def __init__(self, items):
+        self._items = items
+        self.complete = False
+
+    def __iter__(self):
+        self.complete = yield from self._items
+
+
+class SejmApiClient:
+    """Klient HTTP dla API Sejmu z pulą połączeń keep-alive i ponawianiem zapytań.
+
+    Każdy wątek dostaje własną sesję ``requests`` (sesje nie są w pełni
+    bezpieczne wątkowo), a ``fetch_many`` pobiera wiele adresów równolegle,
+    oddając wyniki w kolejności wejściowej.
+
+    Z ``cache`` (``ResponseCache``) świeże odpowiedzi są brane z dysku,
+    a przeterminowane rewalidowane przez If-None-Match/If-Modified-Since.
+    W trybie ``offline`` klient w ogóle nie korzysta z sieci.
+
+    ``on_request(url, status, seconds, retries)`` dostaje czas każdego
+    zapytania (``status`` 'cache' dla odpowiedzi z dysku), a
+    ``on_parse(url, seconds)`` czas dekodowania JSON - oba mogą być
+    wołane z wątków puli.
+    """
+
+    def __init__(self, concurrency=1, max_retries=3, backoff_factor=0.5,
+                 timeout=DEFAULT_TIMEOUT, on_error=None, cache=None, offline=False,
+                 on_request=None, on_parse=None):
+        if offline and cache is None:
+            raise ValueError('Offline mode requires a response cache.')
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        # Wywoływane jako on_error(url, message) zamiast rzucania wyjątku
+        self.on_error = on_error
+        self.on_request = on_request
+        self.on_parse = on_parse
+        self.cache = cache
+        self.offline = offline
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+
+    def _build_session(self):
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=retry)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    @property
+    def session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self._build_session()
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def _report_error(self, url, message):
+        if self.on_error:
+            self.on_error(url, message)
+
+    def _report_request(self, url, status, start, response=None):
+        if self.on_request is None:
+            return
+        # Ponowienia wykonuje urllib3 wewnątrz jednego session.get
+        retry = getattr(response.raw, 'retries', None) if response is not None else None
+        retries = len(retry.history) if retry is not None else 0
+        self.on_request(url, status, time.perf_counter() - start, retries)
+
+    def get_json(self, url):
+        """Pobiera i dekoduje JSON spod ``url``; przy błędzie zwraca None."""
+        try:
+            body, response = self._get_body(url)
+            parse_start = time.perf_counter()
+            data = json.loads(body)
+            if self.on_parse:
+                self.on_parse(url, time.perf_counter() - parse_start)
+            if response is not None and self.cache:
+                # Do cache trafiają tylko poprawnie zdekodowane odpowiedzi
+                self.cache.store(
+                    url, body,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified'),
+                )
+            return data
+        except requests.exceptions.Timeout:
+            self._report_error(url, f"Timeout occurred while fetching data from {url}")
+        except requests.exceptions.RequestException as e:
+            self._report_error(url, f"Error fetching data from {url}: {e}")
+        except ValueError as e:
+            self._report_error(url, f"Invalid JSON received from {url}: {e}")
+        except OfflineCacheMiss as e:
+            self._report_error(url, str(e))
+        return None
+
+    def _get_body(self, url):
+        """Zwraca ``(treść, odpowiedź HTTP)``; odpowiedź jest None, gdy treść pochodzi z cache."""
+        start = time.perf_counter()
+        cached = self.cache.get(url) if self.cache else None
+        if cached is not None and (self.offline or self.cache.is_fresh(cached)):
+            self._report_request(url, 'cache', start)
+            return cached.body, None
+        if self.offline:
+            raise OfflineCacheMiss(f"No cached response for {url} (offline mode)")
+
+        response = self.session.get(url, timeout=self.timeout, headers=self._conditional_headers(cached))
+        self._report_request(url, response.status_code, start, response)
+        if response.status_code == 304 and cached is not None:
+            self.cache.touch(url)
+            return cached.body, None
+        response.raise_for_status()
+        return response.content, response
+
+    def iter_json_items(self, url):
+        """Strumieniowo pobiera tablicę JSON spod ``url`` i oddaje jej elementy po kolei.
+
+        Elementy są parsowane w miarę napływu danych (także z cache), więc
+        w pamięci nigdy nie ma całej odpowiedzi. Błąd jest zgłaszany przez
+        ``on_error`` i kończy iterację; zwrócony ``JsonItemStream`` ma wtedy
+        ``complete`` równe False, a niedokończona odpowiedź nie trafia do cache.
+        """
+        return JsonItemStream(self._iter_json_items(url))
+
+    def _iter_json_items(self, url):
+        try:
+            yield from iter_json_array(self._iter_body_chunks(url))
+            return True
+        except requests.exceptions.Timeout:
+            self._report_error(url, f"Timeout occurred while fetching data from {url}")
+        except requests.exceptions.RequestException as e:
+            self._report_error(url, f"Error fetching data from {url}: {e}")
+        except ValueError as e:
+            self._report_error(url, f"Invalid JSON received from {url}: {e}")
+        except OfflineCacheMiss as e:
+            self._report_error(url, str(e))
+        return False
+
+    def _iter_body_chunks(self, url):
+        start = time.perf_counter()
+        cached = self.cache.lookup(url) if self.cache else None
+        if cached is not None and (self.offline or self.cache.is_fresh(cached)):
+            self._report_request(url, 'cache', start)
+            yield from self.cache.iter_body(cached, STREAM_CHUNK_SIZE)
+            return
+        if self.offline:
+            raise OfflineCacheMiss(f"No cached response for {url} (offline mode)")
+
+        with self.session.get(url, timeout=self.timeout, headers=self._conditional_headers(cached), stream=True) as response:
+            # Przy strumieniu mierzony jest czas do nagłówków; treść jest parsowana w trakcie pobierania
+            self._report_request(url, response.status_code, start, response)
+            if response.status_code == 304 and cached is not None:
+                self.cache.touch(url)
+                yield from self.cache.iter_body(cached, STREAM_CHUNK_SIZE)
+                return
+            response.raise_for_status()
+            chunks = response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+            if self.cache:
+                chunks = self.cache.store_stream(
+                    url, chunks,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified'),
+                )
+            yield from chunks
+
+    @staticmethod
+    def _conditional_headers(cached):
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+        return headers
+
+    def fetch_many(self, urls):
+        """Generator par ``(url, dane)`` w kolejności ``urls``.
+
+        Przy ``concurrency > 1`` zapytania idą przez pulę wątków, ale w locie
+        jest najwyżej ``2 * concurrency`` z nich, więc pamięć nie rośnie
+        z liczbą adresów, a konsument (zapis do bazy) dostaje wyniki po kolei.
+        """
+        if self.concurrency == 1:
+            for url in urls:
+                yield url, self.get_json(url)
+            return
+
+        window = self.concurrency * 2
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = deque()
+            for url in urls:
+                pending.append((url, executor.submit(self.get_json, url)))
+                if len(pending) >= window:
+                    done_url, future = pending.popleft()
+                    yield done_url, future.result()
+            while pending:
+                done_url, future = pending.popleft()
+                yield done_url, future.result()
+
+    def close(self):
+        with self._sessions_lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions = []
+        self._local = threading.local()
@@ -0,0 +1,55 @@
+from rest_framework import serializers
+
+from sejm_app.models import Member, Vote, VoteChoice, Voting
+
+
+class MemberSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Member
+        fields = [
+            'id', 'term', 'sejm_id', 'first_name', 'last_name', 'club', 'district_name',
+            'district_num', 'voivodeship', 'active',
+        ]
+
+
+class VotingSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Voting
+        fields = [
+            'id', 'term', 'sitting', 'sitting_day', 'voting_number', 'date', 'title',
+            'topic', 'kind', 'majority_type', 'majority_votes', 'yes', 'no', 'abstain',
+            'not_participating', 'present', 'total_voted', 'links',
+        ]
+
+
+class VotingSearchSerializer(VotingSerializer):
+    """Głosowanie z wyniku wyszukiwania; ``rank`` pochodzi z ``sejm_app.search.search_votings``."""
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(VotingSerializer.Meta):
+        fields = VotingSerializer.Meta.fields + ['rank']
+
+
+class VoteSerializer(serializers.ModelSerializer):
+    """Głos posła; wymaga querysetu z ``select_related('member', 'club')``."""
+
+    # Imię i nazwisko z Member, a z samego głosu tylko dla nierozpoznanych posłów
+    first_name = serializers.SerializerMethodField()
+    last_name = serializers.SerializerMethodField()
+    club = serializers.CharField(source='club.code', default=None)
+    vote = serializers.SerializerMethodField()
+    vote_label = serializers.CharField(source='get_vote_choice_display')
+
+    class Meta:
+        model = Vote
+        fields = ['id', 'member', 'mp_id_api', 'first_name', 'last_name', 'club', 'vote', 'vote_label']
+
+    def get_first_name(self, vote):
+        return vote.member.first_name if vote.member_id else vote.first_name
+
+    def get_last_name(self, vote):
+        return vote.member.last_name if vote.member_id else vote.last_name
+
+    def get_vote(self, vote):
+        # Ta sama wartość co pole "vote" w API Sejmu, np. 'YES'
+        return VoteChoice(vote.vote_choice).name
@@ -0,0 +1,139 @@
+import os
+from dataclasses import dataclass
+
+import numpy as np
+from django.db import transaction
+
+from sejm_app.members import MemberResolver
+from sejm_app.models import MemberSimilarity, VoteChoice, Voting
+from sejm_app.roll_calls import NO_VOTE
+
+# Głosy, które porównujemy między posłami; nieobecność nie jest ani zgodą, ani niezgodą
+CAST_CHOICES = (VoteChoice.YES, VoteChoice.NO, VoteChoice.ABSTAIN)
+
+
+@dataclass
+class RollCallMatrix:
+    """Głosy kadencji jako macierz int8: wiersz - głosowanie, kolumna - poseł, wartość - kod VoteChoice."""
+    matrix: np.ndarray
+    voting_ids: np.ndarray
+    # ID posłów z API odpowiadające kolumnom
+    mp_ids: np.ndarray
+
+    def save(self, directory, term):
+        """Zapisuje macierz jako ``.npy`` (do odczytu przez ``np.load(..., mmap_mode='r')``) i indeksy obok."""
+        os.makedirs(directory, exist_ok=True)
+        matrix_path, index_path = matrix_paths(directory, term)
+        np.save(matrix_path, self.matrix)
+        np.savez(index_path, voting_ids=self.voting_ids, mp_ids=self.mp_ids)
+        return matrix_path
+
+    @classmethod
+    def load(cls, directory, term, mmap_mode='r'):
+        matrix_path, index_path = matrix_paths(directory, term)
+        with np.load(index_path) as index:
+            voting_ids, mp_ids = index['voting_ids'], index['mp_ids']
+        return cls(np.load(matrix_path, mmap_mode=mmap_mode), voting_ids, mp_ids)
+
+
+def matrix_paths(directory, term):
+    return (
+        os.path.join(directory, f'roll_calls_term{term}.npy'),
+        os.path.join(directory, f'roll_calls_term{term}_index.npz'),
+    )
+
+
+def load_roll_call_matrix(term):
+    """Buduje ``RollCallMatrix`` kadencji jednym zapytaniem z upakowanych ``Voting.roll_call``."""
+    rows = list(
+        Voting.objects.filter(term=term, roll_call__isnull=False)
+        .order_by('date', 'id')
+        .values_list('id', 'roll_call')
+    )
+    width = max((len(roll_call) for _, roll_call in rows), default=0)
+    matrix = np.zeros((len(rows), width), dtype=np.int8)
+    for row, (_, roll_call) in enumerate(rows):
+        matrix[row, :len(roll_call)] = np.frombuffer(roll_call, dtype=np.int8)
+    # Kolumny posłów, którzy nie mają żadnego głosu (luki w numeracji ID z API)
+    present = (matrix != NO_VOTE).any(axis=0)
+    return RollCallMatrix(
+        matrix=np.ascontiguousarray(matrix[:, present]),
+        voting_ids=np.array([voting_id for voting_id, _ in rows], dtype=np.int64),
+        mp_ids=np.flatnonzero(present) + 1,
+    )
+
+
+def agreement_matrix(matrix):
+    """Zwraca (zgodność, liczba wspólnych głosowań) dla każdej pary posłów.
+
+    Zgodność to odsetek głosowań, w których obaj oddali głos (za/przeciw/
+    wstrzymał się) i był to ten sam głos; NaN dla par bez wspólnych głosowań.
+    Liczone iloczynami macierzy jedynek dla każdego rodzaju głosu.
+    """
+    same = np.zeros((matrix.shape[1], matrix.shape[1]), dtype=np.float64)
+    cast = np.zeros(matrix.shape, dtype=np.float32)
+    for choice in CAST_CHOICES:
+        indicator = (matrix == choice).astype(np.float32)
+        same += indicator.T @ indicator
+        cast += indicator
+    shared = cast.T @ cast
+    with np.errstate(divide='ignore', invalid='ignore'):
+        agreement = np.where(shared > 0, same / shared, np.nan)
+    return agreement, shared.astype(np.int64)
+
+
+def similarity_matrix(matrix):
+    """Podobieństwo kosinusowe posłów dla głosów zakodowanych jako za = 1, przeciw = -1, reszta = 0."""
+    signed = (matrix == VoteChoice.YES).astype(np.float64) - (matrix == VoteChoice.NO).astype(np.float64)
+    gram = signed.T @ signed
+    norms = np.sqrt(np.diag(gram))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.clip(gram / np.outer(norms, norms), -1.0, 1.0)
+
+
+def top_neighbours(agreement, shared, k, min_shared=1):
+    """Indeksy ``k`` najbardziej zgodnych posłów dla każdego posła (-1, gdy brak kandydatów)."""
+    scores = np.where(shared >= min_shared, agreement, np.nan)
+    np.fill_diagonal(scores, np.nan)
+    scores = np.nan_to_num(scores, nan=-np.inf)
+    k = min(k, max(scores.shape[0] - 1, 0))
+    order = np.argsort(-scores, axis=1, kind='stable')[:, :k]
+    ranked_scores = np.take_along_axis(scores, order, axis=1)
+    return np.where(np.isfinite(ranked_scores), order, -1)
+
+
+def store_top_neighbours(term, roll_calls, top_k=10, min_shared=1):
+    """Liczy macierze i zapisuje top-k sąsiadów każdego posła do ``analysis.member_similarity``.
+
+    Zwraca liczbę zapisanych wierszy. Posłowie bez rekordu ``Member`` są pomijani.
+    """
+    agreement, shared = agreement_matrix(roll_calls.matrix)
+    similarity = similarity_matrix(roll_calls.matrix)
+    neighbours = top_neighbours(agreement, shared, top_k, min_shared)
+
+    resolver = MemberResolver(term=term).refresh()
+    members = [resolver.resolve(int(mp_id)) for mp_id in roll_calls.mp_ids]
+    rows = []
+    for column, member in enumerate(members):
+        if member is None:
+            continue
+        rank = 0
+        for neighbour_column in neighbours[column]:
+            neighbour = members[neighbour_column] if neighbour_column >= 0 else None
+            if neighbour is None:
+                continue
+            rank += 1
+            cosine = similarity[column, neighbour_column]
+            rows.append(MemberSimilarity(
+                term=term,
+                member=member,
+                neighbour=neighbour,
+                rank=rank,
+                agreement=float(agreement[column, neighbour_column]),
+                similarity=float(cosine) if np.isfinite(cosine) else None,
+                shared_votings=int(shared[column, neighbour_column]),
+            ))
+    with transaction.atomic():
+        MemberSimilarity.objects.filter(term=term).delete()
+        MemberSimilarity.objects.bulk_create(rows, batch_size=5000)
+    return len(rows)
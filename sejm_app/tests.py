@@ -1,3 +1,1037 @@
-from django.test import TestCase
+import csv
+import hashlib
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+
+from sejm_app.analysis import refresh_analysis
+from sejm_app.api_cache import bump_generation, current_generation
+from sejm_app.benchmark import FakeSejmApi, FakeTerm, run_import_benchmark
+from sejm_app.export import EXPORT_COLUMNS
+from sejm_app.http_cache import ResponseCache
+from sejm_app.ingest import sync_members
+from sejm_app.json_stream import iter_json_array
+from sejm_app.load_test import percentile_ms, run_load
+from sejm_app.management.commands.import_sejm_data import Command as ImportCommand
+from sejm_app.members import MemberResolver, normalize_sejm_id
+from sejm_app.models import AnalyzedVoting, ChangeLogEntry, Club, ClubCohesion, DataGeneration, ImportCheckpoint, Member, MemberSimilarity, MemberStats, MemberTimeline, Vote, VoteChoice, Voting
+from sejm_app.parallel_import import QueueWriter, parse_terms
+from sejm_app.partitions import ensure_term_partitions, term_partitions
+from sejm_app.roll_calls import pack_roll_call, unpack_roll_call
+from sejm_app.search import search_votings
+from sejm_app.sejm_api import SejmApiClient
+from sejm_app.similarity import RollCallMatrix, agreement_matrix, similarity_matrix, top_neighbours
+
+
+class StubSejmApi:
+    """Lokalny serwer HTTP udający API Sejmu na potrzeby testów."""
+
+    def __init__(self, routes):
+        # routes: ścieżka -> dane JSON; lista kodów w `failures` zwracana przed sukcesem
+        self.routes = routes
+        self.failures = {}
+        self.requests = []
+        self.not_modified = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                stub.requests.append(self.path)
+                pending_failures = stub.failures.get(self.path)
+                if pending_failures:
+                    self._send(pending_failures.pop(0), {'error': 'stub failure'})
+                elif self.path in stub.routes:
+                    body = json.dumps(stub.routes[self.path]).encode()
+                    etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                    if self.headers.get('If-None-Match') == etag:
+                        stub.not_modified += 1
+                        self.send_response(304)
+                        self.send_header('ETag', etag)
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                    else:
+                        self._send(200, stub.routes[self.path], {'ETag': etag})
+                else:
+                    self._send(404, {'error': 'not found'})
+
+            def _send(self, status, payload, headers=None):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def fake_term_routes(term=10, votings=3, members=4):
+    routes = {
+        f'/sejm/term{term}/MP': [
+            {'id': mp_id, 'firstName': f'Imię{mp_id}', 'lastName': f'Nazwisko{mp_id}',
+             'club': 'KO' if mp_id % 2 else 'PiS', 'active': True}
+            for mp_id in range(1, members + 1)
+        ],
+        f'/sejm/term{term}/votings': [
+            {'sittingDay': 1, 'votingNumber': number, 'title': f'Głosowanie {number}'}
+            for number in range(1, votings + 1)
+        ],
+    }
+    for number in range(1, votings + 1):
+        routes[f'/sejm/term{term}/votings/1/{number}'] = {
+            'date': '2024-01-10T10:00:00', 'title': f'Głosowanie {number}', 'sitting': 1,
+            'yes': members, 'no': 0, 'abstain': 0,
+            'votes': [
+                {'MP': mp_id, 'firstName': f'Imię{mp_id}', 'lastName': f'Nazwisko{mp_id}',
+                 'club': 'KO' if mp_id % 2 else 'PiS', 'vote': 'YES'}
+                for mp_id in range(1, members + 1)
+            ],
+        }
+    return routes
+
+
+class SejmApiClientTests(SimpleTestCase):
+    def test_fetch_many_keeps_input_order(self):
+        routes = {f'/item/{i}': {'n': i} for i in range(20)}
+        with StubSejmApi(routes) as stub:
+            client = SejmApiClient(concurrency=4)
+            urls = [f'{stub.base_url}/item/{i}' for i in range(20)]
+            results = list(client.fetch_many(urls))
+            client.close()
+        self.assertEqual([url for url, _ in results], urls)
+        self.assertEqual([data['n'] for _, data in results], list(range(20)))
+
+    def test_retries_server_errors(self):
+        with StubSejmApi({'/flaky': {'ok': True}}) as stub:
+            stub.failures['/flaky'] = [503, 503]
+            client = SejmApiClient(max_retries=3, backoff_factor=0)
+            self.assertEqual(client.get_json(f'{stub.base_url}/flaky'), {'ok': True})
+        self.assertEqual(stub.requests.count('/flaky'), 3)
+
+    def test_truncated_stream_is_marked_incomplete(self):
+        client = SejmApiClient(on_error=lambda url, message: None)
+        with mock.patch.object(SejmApiClient, '_iter_body_chunks', lambda self, url: iter([b'[{"a": 1}, {"b"'])):
+            items = client.iter_json_items('http://example.invalid/votings')
+            self.assertEqual(list(items), [{'a': 1}])
+        self.assertFalse(items.complete)
+
+    def test_reports_errors_instead_of_raising(self):
+        errors = []
+        with StubSejmApi({}) as stub:
+            client = SejmApiClient(on_error=lambda url, message: errors.append(url))
+            self.assertIsNone(client.get_json(f'{stub.base_url}/missing'))
+        self.assertEqual(errors, [f'{stub.base_url}/missing'])
+
+
+class JsonStreamTests(SimpleTestCase):
+    def split(self, text, size):
+        data = text.encode('utf-8')
+        return (data[i:i + size] for i in range(0, len(data), size))
+
+    def test_items_across_chunk_boundaries(self):
+        payload = [{'title': 'Ustawa o zmianie ustawy – żółć', 'n': 1}, 12345, 'tekst', None, [1, 2]]
+        for size in (1, 3, 7, 1024):
+            with self.subTest(size=size):
+                self.assertEqual(list(iter_json_array(self.split(json.dumps(payload, ensure_ascii=False), size))), payload)
+
+    def test_empty_array(self):
+        self.assertEqual(list(iter_json_array(self.split(' [ ] ', 1))), [])
+
+    def test_truncated_or_invalid_stream_raises(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array(self.split('[1, 2', 1)))
+        with self.assertRaises(ValueError):
+            list(iter_json_array(self.split('{"a": 1}', 4)))
+
+    def test_streaming_client_caches_and_replays(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ResponseCache(cache_dir, ttl=0)
+            with StubSejmApi({'/list': [{'n': i} for i in range(100)]}) as stub:
+                url = f'{stub.base_url}/list'
+                self.assertEqual(len(list(SejmApiClient(cache=cache).iter_json_items(url))), 100)
+            replayed = list(SejmApiClient(cache=cache, offline=True).iter_json_items(url))
+        self.assertEqual(replayed[-1], {'n': 99})
+
+
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+
+    def test_fresh_entries_skip_the_network(self):
+        with StubSejmApi({'/data': [1, 2, 3]}) as stub:
+            client = SejmApiClient(cache=ResponseCache(self.cache_dir.name, ttl=3600))
+            url = f'{stub.base_url}/data'
+            self.assertEqual(client.get_json(url), [1, 2, 3])
+            self.assertEqual(client.get_json(url), [1, 2, 3])
+        self.assertEqual(stub.requests, ['/data'])
+
+    def test_stale_entries_are_revalidated_with_etag(self):
+        with StubSejmApi({'/data': {'a': 1}}) as stub:
+            client = SejmApiClient(cache=ResponseCache(self.cache_dir.name, ttl=0))
+            url = f'{stub.base_url}/data'
+            client.get_json(url)
+            self.assertEqual(client.get_json(url), {'a': 1})
+            stub.routes['/data'] = {'a': 2}
+            self.assertEqual(client.get_json(url), {'a': 2})
+        self.assertEqual(stub.not_modified, 1)
+
+    def test_offline_replay(self):
+        cache = ResponseCache(self.cache_dir.name, ttl=0)
+        with StubSejmApi({'/data': {'a': 1}}) as stub:
+            url = f'{stub.base_url}/data'
+            SejmApiClient(cache=cache).get_json(url)
+        errors = []
+        offline_client = SejmApiClient(cache=cache, offline=True, on_error=lambda url, message: errors.append(message))
+        self.assertEqual(offline_client.get_json(url), {'a': 1})
+        self.assertIsNone(offline_client.get_json(f'{stub.base_url}/other'))
+        self.assertEqual(len(errors), 1)
+        with self.assertRaises(ValueError):
+            SejmApiClient(offline=True)
+
+
+class ImportBenchmarkTests(TestCase):
+    def test_fake_api_serves_consistent_synthetic_term(self):
+        fake_term = FakeTerm(members=7, votings=60, votes_per_voting=5, seed=3)
+        self.assertEqual(fake_term.voting_payload(1, 7), fake_term.voting_payload(1, 7))
+        self.assertIsNone(fake_term.voting_payload(3, 1))
+        with FakeSejmApi(fake_term, subprocess=False) as fake_api:
+            client = SejmApiClient()
+            summaries = list(client.iter_json_items(f'{fake_api.base_url}/sejm/term10/votings'))
+            last = summaries[-1]
+            detail = client.get_json(f"{fake_api.base_url}/sejm/term10/votings/{last['sittingDay']}/{last['votingNumber']}")
+            result = run_import_benchmark(fake_api.base_url, import_args=['--skip-analysis'])
+        self.assertEqual((len(summaries), last['sittingDay'], last['votingNumber']), (60, 2, 10))
+        self.assertEqual(len(detail['votes']), 5)
+        self.assertEqual((result.members, result.votings, result.votes), (7, 60, 60 * 5))
+        self.assertGreater(result.queries, 0)
+
+
+class LoadTestTests(SimpleTestCase):
+    def test_percentiles_and_throughput(self):
+        self.assertEqual(percentile_ms([0.003, 0.001, 0.002, 0.004], 50), 2.0)
+        self.assertEqual(percentile_ms([0.001] * 99 + [0.5], 99), 1.0)
+        self.assertEqual(percentile_ms([0.001] * 99 + [0.5], 100), 500.0)
+        with StubSejmApi({'/ok': {'ok': True}}) as stub:
+            result = run_load(f'{stub.base_url}/ok', total_requests=20, concurrency=4)
+            failing = run_load(f'{stub.base_url}/missing', total_requests=3, concurrency=1)
+        self.assertEqual((len(result.latencies), result.errors), (20, 0))
+        self.assertGreater(result.requests_per_second, 0)
+        self.assertEqual(failing.errors, 3)
+
+
+class ParallelImportTests(SimpleTestCase):
+    def test_parse_terms(self):
+        self.assertEqual(parse_terms('1-3'), [1, 2, 3])
+        self.assertEqual(parse_terms('10, 7,8-9'), [7, 8, 9, 10])
+        for value in ('0-2', '5-3', 'x', '1-'):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                parse_terms(value)
+
+    def test_queue_writer_sends_whole_lines(self):
+        output = []
+
+        class ListQueue:
+            put = output.append
+
+        writer = QueueWriter(ListQueue(), 9, 'stdout')
+        writer.write('Imported ')
+        writer.write('3 votings\nNext line\nPartial')
+        writer.flush()
+        self.assertEqual(output, [(9, 'stdout', 'Imported 3 votings'), (9, 'stdout', 'Next line'), (9, 'stdout', 'Partial')])
+
+
+class RollCallPackingTests(SimpleTestCase):
+    def test_round_trip(self):
+        choices = {1: VoteChoice.YES, 3: VoteChoice.ABSTAIN, 460: VoteChoice.ABSENT}
+        packed = pack_roll_call(choices)
+        self.assertEqual(len(packed), 460)
+        self.assertEqual(unpack_roll_call(packed), choices)
+
+    def test_rejects_out_of_range_ids(self):
+        self.assertIsNone(pack_roll_call({}))
+        with self.assertRaises(ValueError):
+            pack_roll_call({0: VoteChoice.YES})
+
+    def test_choice_from_api(self):
+        self.assertEqual(VoteChoice.from_api('VOTE_VALID'), VoteChoice.VOTE_VALID)
+        self.assertIsNone(VoteChoice.from_api('MAYBE'))
+
+
+class MemberResolverTests(TestCase):
+    def test_normalize_sejm_id(self):
+        self.assertEqual(normalize_sejm_id(7), '7')
+        self.assertEqual(normalize_sejm_id(' 007 '), '7')
+        self.assertIsNone(normalize_sejm_id(''))
+
+    def test_resolves_without_queries(self):
+        member = Member.objects.create(sejm_id='12', first_name='Anna')
+        resolver = MemberResolver().refresh()
+        with self.assertNumQueries(0):
+            self.assertEqual(resolver.resolve(12), member)
+            self.assertIsNone(resolver.resolve(99))
+            self.assertIsNone(resolver.resolve(99))
+        self.assertEqual((resolver.hits, resolver.misses), (1, 2))
+        self.assertEqual(resolver.missing_ids, {'99'})
+
+    def test_refresh_picks_up_new_members(self):
+        resolver = MemberResolver().refresh()
+        member = Member.objects.create(sejm_id='5')
+        self.assertIsNone(resolver.resolve(5))
+        self.assertEqual(resolver.refresh().resolve(5), member)
+
+
+class MemberSyncTests(TestCase):
+    def member_row(self, sejm_id, **fields):
+        row = {'sejm_id': sejm_id, 'first_name': f'Imię{sejm_id}', 'last_name': 'Kowalski',
+               'club': 'KO', 'district_name': None, 'district_num': None,
+               'voivodeship': None, 'email': None, 'active': True}
+        row.update(fields)
+        return row
+
+    def test_upsert_skips_unchanged_and_deactivates_missing(self):
+        sync_members(10, [self.member_row('1'), self.member_row('2'), self.member_row('3')])
+        unchanged_ctid = self.row_version('1')
+
+        with self.assertNumQueries(2):
+            result = sync_members(10, [self.member_row('1'), self.member_row('2', club='PiS'), self.member_row('4')])
+
+        self.assertEqual((result.created, result.updated, result.unchanged, result.deactivated), (['4'], ['2'], 1, 1))
+        self.assertEqual(result.names, {'2': ('Imię2', 'Kowalski'), '4': ('Imię4', 'Kowalski')})
+        self.assertEqual(self.row_version('1'), unchanged_ctid)
+        self.assertEqual(Member.objects.get(sejm_id='2').club, 'PiS')
+        self.assertFalse(Member.objects.get(sejm_id='3').active)
+
+    def test_members_are_scoped_to_their_term(self):
+        sync_members(9, [self.member_row('1', last_name='Dawny')])
+        sync_members(10, [self.member_row('2')])
+        # Synchronizacja kadencji 10 nie dezaktywuje ani nie nadpisuje posłów kadencji 9
+        self.assertEqual(
+            list(Member.objects.order_by('term').values_list('term', 'sejm_id', 'last_name', 'active')),
+            [(9, '1', 'Dawny', True), (10, '2', 'Kowalski', True)],
+        )
+
+    def row_version(self, sejm_id):
+        # ctid zmienia się przy każdym UPDATE, także tym bez zmiany wartości
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT ctid::text FROM parliament.members WHERE sejm_id = %s', [sejm_id])
+            return cursor.fetchone()[0]
+
+
+class ImportSejmDataTests(TestCase):
+    def run_import(self, stub, *args):
+        with mock.patch.dict('os.environ', {'PARLIAMENT_API_BASE_URL': stub.base_url}):
+            call_command('import_sejm_data', '--term', '10', *args, stdout=StringIO(), stderr=StringIO())
+
+    def test_concurrent_import(self):
+        with StubSejmApi(fake_term_routes(votings=5)) as stub:
+            self.run_import(stub, '--concurrency', '4')
+        self.assertEqual(Member.objects.count(), 4)
+        self.assertEqual(Voting.objects.filter(term=10).count(), 5)
+        self.assertEqual(Vote.objects.count(), 5 * 4)
+        self.assertEqual(
+            list(Voting.objects.order_by('id').values_list('voting_number', flat=True)),
+            [1, 2, 3, 4, 5],
+        )
+
+    def test_same_mp_id_in_two_terms_links_different_members(self):
+        routes = {**fake_term_routes(term=9, votings=1), **fake_term_routes(term=10, votings=1)}
+        routes['/sejm/term9/MP'][0]['lastName'] = 'Dawny'
+        routes['/sejm/term9/votings/1/1']['votes'][0]['lastName'] = 'Dawny'
+        with StubSejmApi(routes) as stub:
+            with mock.patch.dict('os.environ', {'PARLIAMENT_API_BASE_URL': stub.base_url}):
+                for term in ('10', '9'):
+                    call_command('import_sejm_data', '--term', term, stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(Member.objects.filter(sejm_id='1').count(), 2)
+        old_vote = Vote.objects.select_related('member').get(term=9, mp_id_api=1)
+        new_vote = Vote.objects.select_related('member').get(term=10, mp_id_api=1)
+        self.assertEqual((old_vote.member.term, old_vote.member.last_name), (9, 'Dawny'))
+        self.assertEqual((new_vote.member.term, new_vote.member.last_name), (10, 'Nazwisko1'))
+        # Kadencja 10 zachowuje aktywnych posłów mimo importu listy kadencji 9
+        self.assertEqual(Member.objects.filter(term=10, active=True).count(), 4)
+
+    def test_compact_vote_storage(self):
+        routes = fake_term_routes(votings=1)
+        routes['/sejm/term10/votings/1/1']['votes'][1]['vote'] = 'ABSENT'
+        routes['/sejm/term10/votings/1/1']['votes'].append(
+            {'MP': 40, 'firstName': 'Jan', 'lastName': 'Spoza', 'club': 'KO', 'vote': 'NO'})
+        with StubSejmApi(routes) as stub:
+            self.run_import(stub)
+        voting = Voting.objects.get()
+        self.assertEqual(
+            unpack_roll_call(voting.roll_call),
+            {1: VoteChoice.YES, 2: VoteChoice.ABSENT, 3: VoteChoice.YES, 4: VoteChoice.YES, 40: VoteChoice.NO},
+        )
+        self.assertEqual(sorted(voting.individual_votes.values_list('club__code', flat=True).distinct()), ['KO', 'PiS'])
+        linked = voting.individual_votes.get(mp_id_api=1)
+        unlinked = voting.individual_votes.get(mp_id_api=40)
+        self.assertEqual((linked.first_name, linked.vote_choice), (None, VoteChoice.YES))
+        self.assertEqual((unlinked.first_name, unlinked.member), ('Jan', None))
+
+    def test_reimport_upserts_votes(self):
+        routes = fake_term_routes(votings=2)
+        with StubSejmApi(routes) as stub:
+            self.run_import(stub)
+            routes['/sejm/term10/votings/1/1']['votes'][0]['vote'] = 'NO'
+            self.run_import(stub, '--import-votings', '--vote-batch-size', '3')
+        self.assertEqual(Vote.objects.count(), 2 * 4)
+        vote = Vote.objects.get(voting__voting_number=1, member__sejm_id='1')
+        self.assertEqual(vote.vote_choice, VoteChoice.NO)
+
+    def test_reimport_removes_votes_missing_from_payload(self):
+        routes = fake_term_routes(votings=2)
+        with StubSejmApi(routes) as stub:
+            self.run_import(stub)
+            del routes['/sejm/term10/votings/1/1']['votes'][1]
+            self.run_import(stub, '--import-votings')
+        voting = Voting.objects.get(voting_number=1)
+        self.assertEqual(sorted(voting.individual_votes.values_list('mp_id_api', flat=True)), [1, 3, 4])
+        self.assertEqual(Vote.objects.count(), 2 * 4 - 1)
+
+    def test_incremental_import_fetches_only_new_or_changed(self):
+        routes = fake_term_routes(votings=3)
+        with StubSejmApi(routes) as stub:
+            self.run_import(stub)
+            routes['/sejm/term10/votings'][1]['title'] = 'Głosowanie 2 (poprawka)'
+            routes['/sejm/term10/votings'].append({'sittingDay': 1, 'votingNumber': 4, 'title': 'Nowe'})
+            routes['/sejm/term10/votings/1/4'] = routes['/sejm/term10/votings/1/1']
+            stub.requests.clear()
+            self.run_import(stub, '--import-votings', '--incremental')
+        detail_requests = [path for path in stub.requests if path.startswith('/sejm/term10/votings/')]
+        self.assertEqual(detail_requests, ['/sejm/term10/votings/1/2', '/sejm/term10/votings/1/4'])
+        self.assertEqual(Voting.objects.filter(term=10).count(), 4)
+
+    def test_offline_import_from_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with StubSejmApi(fake_term_routes(votings=2)) as stub:
+                self.run_import(stub, '--cache-dir', cache_dir)
+            Vote.objects.all().delete()
+            # Serwer jest już wyłączony - import musi pochodzić wyłącznie z cache
+            self.run_import(stub, '--import-votings', '--cache-dir', cache_dir, '--offline')
+        self.assertEqual(Vote.objects.count(), 2 * 4)
+
+    def test_metrics_events_and_prometheus_textfile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with StubSejmApi(fake_term_routes(votings=3)) as stub:
+                stub.failures['/sejm/term10/votings/1/2'] = [503]
+                self.run_import(stub, '--chunk-size', '2', '--metrics-file', f'{directory}/events.jsonl',
+                                '--prometheus-textfile', f'{directory}/import.prom')
+            with open(f'{directory}/events.jsonl', encoding='utf-8') as events_file:
+                events = [json.loads(line) for line in events_file]
+            with open(f'{directory}/import.prom', encoding='utf-8') as prom_file:
+                metrics = prom_file.read()
+        self.assertEqual([event['event'] for event in events][0], 'start')
+        self.assertEqual([event['votings'] for event in events if event['event'] == 'progress'], [2, 3])
+        summary = events[-1]
+        self.assertEqual(summary['event'], 'summary')
+        self.assertEqual(summary['rows'], {'members': 4, 'votings': 3, 'votes': 3 * 4})
+        self.assertEqual(summary['http']['retries'], 1)
+        self.assertTrue({'members', 'votings_summary', 'votings_fetch', 'votings_write', 'analysis'} <= set(summary['phases']))
+        self.assertIn('sejm_import_rows_total{term="10",kind="votes"} 12', metrics)
+        # Lista posłów, lista głosowań i trzy szczegóły
+        self.assertIn('sejm_import_http_request_duration_seconds_count{term="10"} 5', metrics)
+        self.assertIn('sejm_import_http_request_duration_seconds_bucket{term="10",le="+Inf"} 5', metrics)
+
+    def test_resume_after_failure_continues_from_checkpoint(self):
+        original = ImportCommand._import_voting_detail
+
+        def failing_detail(command, term, sitting_day, voting_number, *args):
+            if voting_number == 3:
+                raise RuntimeError('connection lost')
+            return original(command, term, sitting_day, voting_number, *args)
+
+        with StubSejmApi(fake_term_routes(votings=5)) as stub:
+            with mock.patch.object(ImportCommand, '_import_voting_detail', failing_detail):
+                with self.assertRaises(RuntimeError):
+                    self.run_import(stub, '--chunk-size', '2')
+            # Pierwsza paczka (głosowania 1-2) została zatwierdzona, druga cofnięta
+            self.assertEqual(sorted(Voting.objects.values_list('voting_number', flat=True)), [1, 2])
+            checkpoint = ImportCheckpoint.objects.get(term=10)
+            self.assertEqual((checkpoint.last_voting_number, checkpoint.completed), (2, False))
+
+            stub.requests.clear()
+            self.run_import(stub, '--import-votings', '--resume', '--chunk-size', '2')
+        detail_requests = [path for path in stub.requests if path.startswith('/sejm/term10/votings/')]
+        self.assertEqual(detail_requests, [f'/sejm/term10/votings/1/{number}' for number in (3, 4, 5)])
+        self.assertEqual(Voting.objects.count(), 5)
+        self.assertTrue(ImportCheckpoint.objects.get(term=10).completed)
+
+    def test_replace_truncates_term_partitions(self):
+        routes = fake_term_routes(votings=3)
+        other_term = Voting.objects.create(term=9, sitting=1, sitting_day=1, voting_number=1)
+        Vote.objects.create(voting=other_term, mp_id_api=1, vote_choice=VoteChoice.YES)
+        with StubSejmApi(routes) as stub:
+            self.run_import(stub)
+            routes['/sejm/term10/votings'] = routes['/sejm/term10/votings'][:1]
+            self.run_import(stub, '--import-votings', '--replace')
+        self.assertEqual(list(Voting.objects.filter(term=10).values_list('voting_number', flat=True)), [1])
+        self.assertEqual(Vote.objects.filter(term=10).count(), 4)
+        self.assertEqual(AnalyzedVoting.objects.filter(voting__term=10).count(), 1)
+        # Inne kadencje zostają nietknięte
+        self.assertEqual(Vote.objects.get(term=9).voting, other_term)
+
+    def test_destructive_modes_abort_on_truncated_summary(self):
+        def truncated(chunks):
+            items = iter_json_array(chunks)
+            yield next(items)
+            raise ValueError('unexpected end of data')
+
+        with StubSejmApi(fake_term_routes(votings=3)) as stub:
+            self.run_import(stub)
+            with mock.patch('sejm_app.sejm_api.iter_json_array', truncated):
+                for mode in ('--replace', '--rebuild'):
+                    with self.assertRaisesMessage(CommandError, 'cut off after 1 entries'):
+                        self.run_import(stub, '--import-votings', mode)
+        self.assertEqual(Voting.objects.filter(term=10).count(), 3)
+        self.assertEqual(Vote.objects.filter(term=10).count(), 3 * 4)
+
+    def test_rebuild_aborts_when_a_voting_cannot_be_loaded(self):
+        with StubSejmApi(fake_term_routes(votings=3)) as stub:
+            self.run_import(stub)
+            stub.failures['/sejm/term10/votings/1/2'] = [404]
+            with self.assertRaisesMessage(CommandError, 'Could not load 1 votings of Term 10 (first: 1/2)'):
+                self.run_import(stub, '--import-votings', '--rebuild')
+        self.assertEqual(Voting.objects.filter(term=10).count(), 3)
+        self.assertEqual(Vote.objects.filter(term=10).count(), 3 * 4)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('parliament.votings_term_10_rebuild')")
+            self.assertIsNone(cursor.fetchone()[0])
+
+    def test_rebuild_swaps_in_shadow_partitions(self):
+        routes = fake_term_routes(votings=3)
+        with StubSejmApi(routes) as stub:
+            self.run_import(stub)
+            ids = dict(Voting.objects.values_list('voting_number', 'id'))
+            routes['/sejm/term10/votings'] = routes['/sejm/term10/votings'][:2]
+            routes['/sejm/term10/votings/1/1']['votes'][0]['vote'] = 'NO'
+            routes['/sejm/term10/votings/1/2']['title'] = 'Ustawa o rebuildzie'
+            # Druga przebudowa używa tych samych nazw tabel-cieni i indeksów
+            self.run_import(stub, '--import-votings', '--rebuild')
+            self.run_import(stub, '--import-votings', '--rebuild', '--vote-batch-size', '3')
+
+        self.assertEqual(dict(Voting.objects.values_list('voting_number', 'id')), {1: ids[1], 2: ids[2]})
+        self.assertEqual(Vote.objects.filter(term=10).count(), 2 * 4)
+        self.assertEqual(Vote.objects.get(voting_id=ids[1], member__sejm_id='1').vote_choice, VoteChoice.NO)
+        self.assertEqual(list(search_votings('rebuildzie', term=10).values_list('id', flat=True)), [ids[2]])
+        self.assertEqual(Voting.objects.get(pk=ids[2]).date.isoformat(), '2024-01-10T10:00:00+00:00')
+        # Agregaty usuniętego głosowania znikają razem z nim
+        self.assertEqual(sorted(AnalyzedVoting.objects.values_list('voting_id', flat=True)), [ids[1], ids[2]])
+        self.assertFalse(ClubCohesion.objects.filter(voting_id=ids[3]).exists())
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('parliament.votings_term_10_rebuild'), to_regclass('parliament.votings_term_10_votings_pkey')")
+            self.assertEqual(cursor.fetchone(), (None, 'parliament.votings_term_10_votings_pkey'))
+        # Nowe głosowania dostają id z sekwencji tabeli
+        self.assertGreater(Voting.objects.create(term=10, sitting=1, sitting_day=2, voting_number=1).id, ids[3])
+
+
+class PartitionTests(TestCase):
+    def partition_rows(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM parliament.{table}')
+            return cursor.fetchone()[0]
+
+    def test_rows_are_routed_to_term_partitions(self):
+        voting = Voting.objects.create(term=10, sitting=1, sitting_day=1, voting_number=1)
+        vote = Vote.objects.create(voting=voting, mp_id_api=1, vote_choice=VoteChoice.YES)
+        self.assertEqual(vote.term, 10)
+        self.assertEqual((self.partition_rows('votings_term_10'), self.partition_rows('individual_votes_term_10')), (1, 1))
+        self.assertEqual(term_partitions(Voting), list(range(1, 11)))
+        plan = Vote.objects.filter(term=10, member_id=1).explain()
+        self.assertIn('individual_votes_term_10', plan)
+        self.assertNotIn('individual_votes_term_9', plan)
+
+    def test_roll_call_endpoints_read_one_term_partition(self):
+        voting = Voting.objects.create(term=10, sitting=1, sitting_day=1, voting_number=1)
+        Vote.objects.create(voting=voting, mp_id_api=1, vote_choice=VoteChoice.YES)
+        for url in (f'/api/votings/{voting.id}/votes', f'/api/live/votings/{voting.id}/roll-call'):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            vote_queries = [query['sql'] for query in queries if 'individual_votes' in query['sql']]
+            self.assertTrue(vote_queries)
+            self.assertTrue(all('"term" = 10' in sql for sql in vote_queries), vote_queries)
+
+    def test_new_term_partition_takes_rows_from_default(self):
+        voting = Voting.objects.create(term=42, sitting=1, sitting_day=1, voting_number=1, title='Ustawa')
+        Vote.objects.create(voting=voting, mp_id_api=1, vote_choice=VoteChoice.NO)
+        self.assertEqual(self.partition_rows('votings_default'), 1)
+
+        self.assertEqual(ensure_term_partitions(42), ['individual_votes_term_42', 'votings_term_42'])
+        self.assertEqual(ensure_term_partitions(42), [])
+        self.assertEqual((self.partition_rows('votings_default'), self.partition_rows('individual_votes_default')), (0, 0))
+        self.assertEqual((self.partition_rows('votings_term_42'), self.partition_rows('individual_votes_term_42')), (1, 1))
+        self.assertEqual(Voting.objects.get(term=42).individual_votes.get().vote_choice, VoteChoice.NO)
+        self.assertEqual(list(search_votings('ustawa', term=42)), [voting])
+
+
+class ChangeLogTests(TestCase):
+    run_import = ImportSejmDataTests.run_import
+
+    def changes_after(self, seq):
+        # Numery seq nadaje trigger odroczony do zatwierdzenia, którego w TestCase nie ma
+        connection.check_constraints()
+        return list(ChangeLogEntry.objects.filter(seq__gt=seq).order_by('seq').values_list('kind', 'object_id'))
+
+    def last_seq(self):
+        connection.check_constraints()
+        return ChangeLogEntry.objects.order_by('-seq').values_list('seq', flat=True).first() or 0
+
+    def test_import_records_only_real_changes(self):
+        routes = fake_term_routes(votings=3)
+        with StubSejmApi(routes) as stub:
+            self.run_import(stub)
+            ids = dict(Voting.objects.values_list('voting_number', 'id'))
+            members = sorted(Member.objects.values_list('id', flat=True))
+            self.assertEqual(
+                sorted(self.changes_after(0)),
+                sorted([('member.created', pk) for pk in members] + [('voting.created', pk) for pk in ids.values()]),
+            )
+            seq = self.last_seq()
+            # Ponowny import bez zmian w danych nie dopisuje nic
+            self.run_import(stub)
+            self.assertEqual(self.changes_after(seq), [])
+            routes['/sejm/term10/votings/1/1']['votes'][0]['vote'] = 'NO'
+            routes['/sejm/term10/MP'][1]['club'] = 'Lewica'
+            self.run_import(stub)
+        self.assertEqual(
+            sorted(self.changes_after(seq)),
+            [('member.updated', Member.objects.get(sejm_id='2').id), ('voting.updated', ids[1])],
+        )
+
+    def test_rebuild_and_replace_record_changes(self):
+        routes = fake_term_routes(votings=3)
+        with StubSejmApi(routes) as stub:
+            self.run_import(stub)
+            ids = dict(Voting.objects.values_list('voting_number', 'id'))
+            seq = self.last_seq()
+            routes['/sejm/term10/votings'] = routes['/sejm/term10/votings'][:2]
+            routes['/sejm/term10/votings/1/2']['title'] = 'Głosowanie 2 (poprawka)'
+            self.run_import(stub, '--import-votings', '--rebuild')
+            self.assertEqual(self.changes_after(seq), [('voting.updated', ids[2]), ('voting.deleted', ids[3])])
+            seq = self.last_seq()
+            self.run_import(stub, '--import-votings', '--replace')
+        new_ids = sorted(Voting.objects.values_list('id', flat=True))
+        self.assertEqual(
+            self.changes_after(seq),
+            [('voting.deleted', ids[1]), ('voting.deleted', ids[2])] + [('voting.created', pk) for pk in new_ids],
+        )
+
+    def test_moving_rows_out_of_default_partition_is_not_a_change(self):
+        Voting.objects.create(term=42, sitting=1, sitting_day=1, voting_number=1)
+        seq = self.last_seq()
+        ensure_term_partitions(42)
+        self.assertEqual(self.changes_after(seq), [])
+
+
+class AnalysisTests(TestCase):
+    def run_import(self, stub, *args):
+        with mock.patch.dict('os.environ', {'PARLIAMENT_API_BASE_URL': stub.base_url}):
+            call_command('import_sejm_data', '--term', '10', *args, stdout=StringIO(), stderr=StringIO())
+
+    def set_vote(self, routes, number, mp_id, vote):
+        routes[f'/sejm/term10/votings/1/{number}']['votes'][mp_id - 1]['vote'] = vote
+
+    def test_aggregates_are_added_incrementally_and_rebuilt_on_change(self):
+        # KO: posłowie 1, 3, 5; PiS: 2, 4, 6
+        routes = fake_term_routes(votings=4, members=6)
+        self.set_vote(routes, 1, 1, 'NO')
+        self.set_vote(routes, 2, 5, 'ABSENT')
+        new_voting_summary = routes['/sejm/term10/votings'].pop()
+        with StubSejmApi(routes) as stub:
+            self.run_import(stub)
+            cohesion = ClubCohesion.objects.get(voting__voting_number=1, club__code='KO')
+            self.assertEqual((cohesion.yes, cohesion.no, cohesion.majority_choice), (2, 1, VoteChoice.YES))
+            self.assertAlmostEqual(cohesion.rice_index, 1 / 3)
+            self.assertEqual(ClubCohesion.objects.get(voting__voting_number=2, club__code='KO').not_voting, 1)
+            stats = MemberStats.objects.get(member__sejm_id='1', term=10)
+            self.assertEqual((stats.votings, stats.votes_with_club_majority), (3, 2))
+            self.assertAlmostEqual(stats.loyalty_rate, 2 / 3)
+            self.assertAlmostEqual(MemberStats.objects.get(member__sejm_id='5').attendance_rate, 2 / 3)
+
+            routes['/sejm/term10/votings'].append(new_voting_summary)
+            self.run_import(stub, '--import-votings', '--incremental')
+            self.assertEqual(MemberStats.objects.get(member__sejm_id='1').votings, 4)
+            self.assertEqual(ClubCohesion.objects.count(), 4 * 2)
+
+            # Zmiana już wliczonego głosowania przelicza kadencję od nowa
+            self.set_vote(routes, 1, 1, 'YES')
+            routes['/sejm/term10/votings'][0]['yes'] = 6
+            self.run_import(stub, '--import-votings', '--incremental')
+        stats = MemberStats.objects.get(member__sejm_id='1')
+        self.assertEqual((stats.votings, stats.loyalty_rate), (4, 1.0))
+        self.assertEqual(ClubCohesion.objects.get(voting__voting_number=1, club__code='KO').rice_index, 1.0)
+
+    def test_member_timeline_is_merged_in_date_order(self):
+        # KO: posłowie 1, 3, 5 - poseł 1 głosuje przeciw klubowi w głosowaniu 2
+        routes = fake_term_routes(votings=3, members=6)
+        self.set_vote(routes, 2, 1, 'NO')
+        self.set_vote(routes, 3, 1, 'ABSENT')
+        routes['/sejm/term10/votings/1/3']['date'] = '2024-01-09T10:00:00'
+        earlier_voting_summary = routes['/sejm/term10/votings'].pop()
+        with StubSejmApi(routes) as stub:
+            self.run_import(stub)
+            routes['/sejm/term10/votings'].append(earlier_voting_summary)
+            self.run_import(stub, '--import-votings', '--incremental')
+        ids = dict(Voting.objects.values_list('voting_number', 'id'))
+
+        timeline = MemberTimeline.objects.get(member__sejm_id='1', term=10)
+        self.assertEqual(timeline.voting_ids, [ids[3], ids[1], ids[2]])
+        self.assertEqual(timeline.choices, [VoteChoice.ABSENT, VoteChoice.YES, VoteChoice.NO])
+        self.assertEqual(timeline.against_club, [False, False, True])
+        self.assertEqual((timeline.yes, timeline.no, timeline.absent, timeline.rebellions), (1, 1, 1, 1))
+        self.assertEqual(
+            [(entry['vote'], entry['yes'], entry['rebellions']) for entry in timeline.running_counters()],
+            [('ABSENT', 0, 0), ('YES', 1, 0), ('NO', 1, 1)],
+        )
+        self.assertEqual(MemberTimeline.objects.filter(term=10).count(), 6)
+
+    def test_refresh_without_new_votings_does_nothing(self):
+        with StubSejmApi(fake_term_routes()) as stub:
+            self.run_import(stub, '--skip-analysis')
+        self.assertEqual(refresh_analysis(10).votings_added, 3)
+        # Savepoint + dwa odczyty znaczników, bez grupowania głosów
+        with self.assertNumQueries(4):
+            result = refresh_analysis(10)
+        self.assertEqual((result.votings_added, result.full_rebuild), (0, False))
+
+
+class SimilarityTests(TestCase):
+    def test_agreement_and_neighbours(self):
+        Y, N, A, X = VoteChoice.YES, VoteChoice.NO, VoteChoice.ABSTAIN, VoteChoice.ABSENT
+        matrix = np.array([
+            [Y, Y, N, X],
+            [N, N, N, Y],
+            [Y, A, Y, Y],
+            [Y, Y, N, X],
+        ], dtype=np.int8)
+        agreement, shared = agreement_matrix(matrix)
+        self.assertEqual(shared[0, 3], 2)
+        self.assertAlmostEqual(agreement[0, 1], 3 / 4)
+        self.assertAlmostEqual(agreement[0, 2], 2 / 4)
+        self.assertAlmostEqual(similarity_matrix(matrix)[0, 0], 1.0)
+        neighbours = top_neighbours(agreement, shared, k=2, min_shared=3)
+        self.assertEqual(neighbours[0].tolist(), [1, 2])
+        # Poseł 4 ma tylko dwa wspólne głosowania z każdym - brak kandydatów
+        self.assertEqual(neighbours[3].tolist(), [-1, -1])
+
+    def test_command_stores_top_k_and_memory_mappable_matrix(self):
+        routes = fake_term_routes(votings=3, members=4)
+        routes['/sejm/term10/votings/1/1']['votes'][1]['vote'] = 'NO'
+        with StubSejmApi(routes) as stub:
+            with mock.patch.dict('os.environ', {'PARLIAMENT_API_BASE_URL': stub.base_url}):
+                call_command('import_sejm_data', '--term', '10', stdout=StringIO(), stderr=StringIO())
+        with tempfile.TemporaryDirectory() as matrix_dir:
+            call_command('compute_similarity', '--term', '10', '--top-k', '2', '--min-shared', '1',
+                         '--matrix-dir', matrix_dir, stdout=StringIO())
+            roll_calls = RollCallMatrix.load(matrix_dir, 10)
+            self.assertIsInstance(roll_calls.matrix, np.memmap)
+            self.assertEqual(roll_calls.matrix.shape, (3, 4))
+            self.assertEqual(roll_calls.mp_ids.tolist(), [1, 2, 3, 4])
+            del roll_calls
+        top = MemberSimilarity.objects.filter(term=10, member__sejm_id='2').order_by('rank')
+        self.assertEqual(len(top), 2)
+        self.assertAlmostEqual(top[0].agreement, 2 / 3)
+        self.assertEqual(MemberSimilarity.objects.filter(term=10, member__sejm_id='1').first().agreement, 1.0)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        with StubSejmApi(fake_term_routes(votings=2, members=3)) as stub:
+            with mock.patch.dict('os.environ', {'PARLIAMENT_API_BASE_URL': stub.base_url}):
+                call_command('import_sejm_data', '--term', '10', stdout=StringIO(), stderr=StringIO())
+        Voting.objects.filter(voting_number=2).update(date='2024-02-01T10:00:00Z')
+
+    def export(self, *args):
+        stdout = StringIO()
+        call_command('export_sejm_data', *args, stdout=stdout, stderr=StringIO())
+        return stdout.getvalue()
+
+    def test_csv_and_jsonl(self):
+        rows = list(csv.DictReader(StringIO(self.export('--term', '10', '--chunk-size', '2'))))
+        self.assertEqual(len(rows), 2 * 3)
+        self.assertEqual(
+            (rows[0]['voting_number'], rows[0]['mp_id_api'], rows[0]['first_name'], rows[0]['club'], rows[0]['vote']),
+            ('1', '1', 'Imię1', 'KO', 'YES'),
+        )
+        lines = self.export('--format', 'jsonl', '--date-to', '2024-01-31').splitlines()
+        self.assertEqual({json.loads(line)['voting_number'] for line in lines}, {1})
+        self.assertEqual(self.export('--term', '9').splitlines(), [','.join(EXPORT_COLUMNS)])
+
+    def test_parquet(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest('pyarrow is not installed')
+        with tempfile.TemporaryDirectory() as directory:
+            path = f'{directory}/votes.parquet'
+            self.export('--format', 'parquet', '--output', path, '--date-from', '2024-02-01')
+            table = pq.read_table(path)
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(set(table.column('vote').to_pylist()), {'YES'})
+
+    def test_streaming_endpoint(self):
+        response = self.client.get('/api/export/votes.jsonl?term=10&sitting=1')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2 * 3)
+        self.assertEqual(self.client.get('/api/export/votes.xml').status_code, 400)
+        self.assertEqual(self.client.get('/api/export/votes.csv?date_from=yesterday').status_code, 400)
+
+
+class ApiTestCase(TestCase):
+    """Każdy test ma własny plik generacji i pusty cache odpowiedzi API."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(SEJM_DATA_GENERATION_FILE=f'{directory.name}/generation.json')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        caches['api'].clear()
+
+
+class ApiTests(ApiTestCase):
+    def walk_pages(self, url, queries_per_page):
+        # Przechodzi wszystkie strony, sprawdzając stałą liczbę zapytań na stronę
+        results = []
+        while url:
+            with self.assertNumQueries(queries_per_page):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            results.extend(response.json()['results'])
+            url = response.json()['next']
+        return results
+
+    def test_votings_keyset_pagination_on_date_and_id(self):
+        dates = ['2024-01-10T10:00:00Z', '2024-01-09T10:00:00Z', '2024-01-10T10:00:00Z', None, '2024-01-11T09:00:00Z']
+        votings = [
+            Voting.objects.create(term=10, sitting=1, sitting_day=1, voting_number=number, date=date)
+            for number, date in enumerate(dates, start=1)
+        ]
+        Voting.objects.create(term=9, sitting=1, sitting_day=1, voting_number=1, date='2020-01-01T10:00:00Z')
+
+        # Pierwsze żądanie czyta numer generacji z bazy i odtwarza plik generacji
+        current_generation()
+        results = self.walk_pages('/api/votings?term=10&page_size=2', queries_per_page=1)
+        expected = [votings[1], votings[0], votings[2], votings[4], votings[3]]
+        self.assertEqual([row['id'] for row in results], [voting.id for voting in expected])
+        self.assertEqual(self.client.get('/api/votings?cursor=garbage').status_code, 404)
+
+    def test_voting_votes_without_n_plus_one(self):
+        voting = Voting.objects.create(term=10, sitting=1, sitting_day=1, voting_number=1)
+        club = Club.objects.create(code='KO')
+        for number in range(1, 8):
+            member = Member.objects.create(sejm_id=str(number), first_name=f'Imię{number}', last_name='Kowalski')
+            Vote.objects.create(voting=voting, member=member, mp_id_api=number, club=club, vote_choice=VoteChoice.YES)
+        Vote.objects.create(voting=voting, mp_id_api=99, first_name='Jan', last_name='Spoza', vote_choice=VoteChoice.NO)
+
+        # Sprawdzenie głosowania + jedna strona głosów, niezależnie od liczby wierszy
+        current_generation()
+        results = self.walk_pages(f'/api/votings/{voting.id}/votes?page_size=3', queries_per_page=2)
+        self.assertEqual(len(results), 8)
+        self.assertEqual(results[0], {
+            'id': results[0]['id'], 'member': Member.objects.get(sejm_id='1').id, 'mp_id_api': 1,
+            'first_name': 'Imię1', 'last_name': 'Kowalski', 'club': 'KO', 'vote': 'YES', 'vote_label': 'Za',
+        })
+        self.assertEqual((results[-1]['first_name'], results[-1]['club'], results[-1]['vote']), ('Jan', None, 'NO'))
+        self.assertEqual(self.client.get('/api/votings/999999/votes').status_code, 404)
+
+    def test_members_list(self):
+        for number in range(1, 6):
+            Member.objects.create(sejm_id=str(number), active=number != 3)
+        current_generation()
+        results = self.walk_pages('/api/members?active=true&page_size=2', queries_per_page=1)
+        self.assertEqual([row['sejm_id'] for row in results], ['1', '2', '4', '5'])
+
+
+class VotingSearchTests(ApiTestCase):
+    def test_ranked_fuzzy_search(self):
+        topic_match = Voting.objects.create(term=10, sitting=1, sitting_day=1, voting_number=1,
+                                            title='Projekt ustawy o podatku dochodowym', topic='Ustawa budżetowa')
+        title_match = Voting.objects.create(term=10, sitting=1, sitting_day=1, voting_number=2,
+                                            title='Ustawa budżetowa na rok 2025')
+        tribunal = Voting.objects.create(term=10, sitting=1, sitting_day=1, voting_number=3,
+                                         title='Wybór członków Trybunału Stanu')
+        Voting.objects.create(term=9, sitting=1, sitting_day=1, voting_number=1, title='Ustawa budżetowa na rok 2020')
+
+        # Bez polskich znaków, tytuł (waga A) przed tematem (waga B)
+        results = []
+        url = '/api/votings/search?q=budzetowa&term=10&page_size=1'
+        while url:
+            response = self.client.get(url)
+            results.extend(response.json()['results'])
+            url = response.json()['next']
+        self.assertEqual([row['id'] for row in results], [title_match.id, topic_match.id])
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+
+        # Literówki łapie podobieństwo trygramowe
+        response = self.client.get('/api/votings/search?q=Trybunału Stanuu')
+        self.assertEqual([row['id'] for row in response.json()['results']], [tribunal.id])
+        self.assertEqual(self.client.get('/api/votings/search').status_code, 400)
+
+    def test_search_vector_follows_updates(self):
+        voting = Voting.objects.create(term=10, sitting=1, sitting_day=1, voting_number=1, title='Wniosek formalny')
+        voting.title = 'Ustawa o ochronie zwierząt'
+        voting.save()
+        self.assertEqual(list(search_votings('zwierzat')), [voting])
+        self.assertEqual(list(search_votings('formalny')), [])
+
+
+class LiveApiTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        club = Club.objects.create(code='KO')
+        self.member = Member.objects.create(sejm_id='1', first_name='Anna', last_name='Nowak', club='KO')
+        self.votings = [
+            Voting.objects.create(term=10, sitting=1, sitting_day=1, voting_number=number,
+                                  date=f'2024-01-{10 + number}T10:00:00Z', title=f'Głosowanie {number}')
+            for number in range(1, 4)
+        ]
+        for voting in self.votings:
+            Vote.objects.create(voting=voting, member=self.member, mp_id_api=1, club=club, vote_choice=VoteChoice.YES)
+        Vote.objects.create(voting=self.votings[0], mp_id_api=99, first_name='Jan', last_name='Spoza', vote_choice=VoteChoice.NO)
+        MemberStats.objects.create(member=self.member, term=10, votings=3, attendance_rate=1.0, loyalty_rate=1.0)
+        current_generation()
+
+    async def test_latest_votings_and_roll_call(self):
+        response = await self.async_client.get('/api/live/votings/latest?term=10&limit=2')
+        self.assertEqual([row['voting_number'] for row in response.json()['results']], [3, 2])
+
+        response = await self.async_client.get(f'/api/live/votings/{self.votings[0].id}/roll-call')
+        self.assertEqual(response.json()['title'], 'Głosowanie 1')
+        self.assertEqual(
+            [(vote['mp_id_api'], vote['last_name'], vote['vote']) for vote in response.json()['votes']],
+            [(1, 'Nowak', 'YES'), (99, 'Spoza', 'NO')],
+        )
+        not_modified = await self.async_client.get(
+            f'/api/live/votings/{self.votings[0].id}/roll-call', headers={'If-None-Match': response['ETag']})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual((await self.async_client.get('/api/live/votings/999999/roll-call')).status_code, 404)
+        self.assertEqual((await self.async_client.post('/api/live/votings/latest')).status_code, 405)
+
+    async def test_member_profile(self):
+        response = await self.async_client.get(f'/api/live/members/{self.member.id}?term=10')
+        data = response.json()
+        self.assertEqual((data['last_name'], data['stats']['loyalty_rate']), ('Nowak', 1.0))
+        self.assertEqual([vote['voting'] for vote in data['recent_votes']], [voting.id for voting in reversed(self.votings)])
+        self.assertEqual((await self.async_client.get('/api/live/members/999999')).status_code, 404)
+
+    def test_changes_feed(self):
+        connection.check_constraints()
+        response = self.client.get('/api/changes?limit=2')
+        data = response.json()
+        self.assertEqual([row['kind'] for row in data['results']], ['member.created', 'voting.created'])
+        self.assertTrue(data['has_more'])
+        rest = self.client.get(f"/api/changes?since={data['next_since']}&limit=2").json()
+        self.assertEqual([row['object_id'] for row in rest['results']], [voting.id for voting in self.votings[1:]])
+        self.assertFalse(rest['has_more'])
+        self.assertEqual(self.client.get('/api/changes/stream').status_code, 501)
+
+    async def test_change_stream(self):
+        await sync_to_async(connection.check_constraints)()
+        first_page = (await self.async_client.get('/api/changes?limit=2')).json()
+        rest = (await self.async_client.get(f"/api/changes?since={first_page['next_since']}")).json()
+        with mock.patch('sejm_app.views.CHANGE_STREAM_MAX_SECONDS', 0):
+            response = await self.async_client.get('/api/changes/stream', headers={'Last-Event-ID': str(first_page['next_since'])})
+            body = ''.join([chunk.decode() async for chunk in response.streaming_content])
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = [json.loads(line[len('data: '):]) for line in body.splitlines() if line.startswith('data: ')]
+        self.assertEqual([event['seq'] for event in events], [row['seq'] for row in rest['results']])
+        self.assertIn(f"id: {rest['next_since']}\nevent: change\n", body)
+
+    def test_cached_member_timeline_follows_analysis_refresh(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_analysis(10)
+        url = f'/api/live/members/{self.member.id}/timeline'
+        self.assertEqual(self.client.get(url).json()['totals']['votings'], 3)
+        voting = Voting.objects.create(term=10, sitting=1, sitting_day=1, voting_number=4,
+                                       date='2024-01-20T10:00:00Z', title='Głosowanie 4')
+        Vote.objects.create(voting=voting, member=self.member, mp_id_api=1, vote_choice=VoteChoice.NO)
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_analysis(10)
+        data = self.client.get(url).json()
+        self.assertEqual((data['totals']['votings'], data['totals']['no']), (4, 1))
+
+    def test_member_timeline(self):
+        refresh_analysis(10)
+        response = self.client.get(f'/api/live/members/{self.member.id}/timeline')
+        data = response.json()
+        self.assertEqual((data['term'], data['totals']['votings'], data['totals']['yes']), (10, 3, 3))
+        self.assertEqual([entry['voting'] for entry in data['results']], [voting.id for voting in self.votings])
+        self.assertEqual([entry['yes'] for entry in data['results']], [1, 2, 3])
+        self.assertEqual(self.client.get(f'/api/live/members/{self.member.id}/timeline?term=9').status_code, 404)
+
+
+class ApiResponseCacheTests(ApiTestCase):
+    def test_repeat_reads_hit_cache_until_next_generation(self):
+        Voting.objects.create(term=10, sitting=1, sitting_day=1, voting_number=1, title='Pierwsze')
+        first = self.client.get('/api/votings')
+        etag = first['ETag']
+        self.assertTrue(etag.startswith('"'))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/votings').content, first.content)
+            self.assertEqual(self.client.get('/api/votings', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Voting.objects.create(term=10, sitting=1, sitting_day=1, voting_number=2, title='Drugie')
+            generation = bump_generation(10, 'votings')
+        response = self.client.get('/api/votings', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertEqual(current_generation().number, generation.pk)
+        self.assertEqual(response['Last-Modified'], http_date(generation.created_at.timestamp()))
+        with self.assertNumQueries(0):
+            not_modified = self.client.get('/api/votings', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_import_bumps_generation(self):
+        with StubSejmApi(fake_term_routes(votings=3)) as stub:
+            with self.captureOnCommitCallbacks(execute=True):
+                with mock.patch.dict('os.environ', {'PARLIAMENT_API_BASE_URL': stub.base_url}):
+                    call_command('import_sejm_data', '--term', '10', '--chunk-size', '2', stdout=StringIO(), stderr=StringIO())
+        # Posłowie + dwie paczki głosowań + agregaty
+        self.assertEqual(
+            list(DataGeneration.objects.values_list('source', flat=True).order_by('pk')),
+            ['members', 'votings', 'votings', 'analysis'],
+        )
+        self.assertEqual(current_generation().number, DataGeneration.objects.latest('pk').pk)
+
+    def test_cached_member_profile_follows_analysis_refresh(self):
+        with StubSejmApi(fake_term_routes(votings=3)) as stub:
+            with self.captureOnCommitCallbacks(execute=True):
+                with mock.patch.dict('os.environ', {'PARLIAMENT_API_BASE_URL': stub.base_url}):
+                    call_command('import_sejm_data', '--term', '10', '--skip-analysis', stdout=StringIO(), stderr=StringIO())
+        url = f"/api/live/members/{Member.objects.get(sejm_id='1').id}?term=10"
+        self.assertIsNone(self.client.get(url).json()['stats'])
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_analysis(10)
+        self.assertEqual(self.client.get(url).json()['stats']['votings'], 3)
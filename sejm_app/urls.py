@@ -0,0 +1,19 @@
+from django.urls import path
+
+from sejm_app import views
+
+urlpatterns = [
+    path('members', views.MemberList.as_view(), name='member-list'),
+    path('votings', views.VotingList.as_view(), name='voting-list'),
+    path('votings/search', views.VotingSearch.as_view(), name='voting-search'),
+    path('votings/<int:pk>', views.VotingDetail.as_view(), name='voting-detail'),
+    path('votings/<int:pk>/votes', views.VotingVoteList.as_view(), name='voting-votes'),
+    # Widoki asynchroniczne - pełną przepustowość dają pod ASGI (gunicorn.conf.py)
+    path('live/votings/latest', views.latest_votings, name='live-latest-votings'),
+    path('live/votings/<int:pk>/roll-call', views.voting_roll_call, name='live-voting-roll-call'),
+    path('live/members/<int:pk>', views.member_profile, name='live-member-profile'),
+    path('live/members/<int:pk>/timeline', views.member_timeline, name='live-member-timeline'),
+    path('changes', views.changes, name='changes'),
+    path('changes/stream', views.change_stream, name='change-stream'),
+    path('export/votes.<str:export_format>', views.export_votes, name='export-votes'),
+]
@@ -1,3 +1,366 @@
-from django.shortcuts import render
+import asyncio
+import functools
+import json
+import time
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.db.models import F
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse,
+)
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_GET
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+
+from sejm_app.api_cache import CachedResponseMixin, cached_json_response
+from sejm_app.changes import CHANGE_FEED_LIMIT, MAX_CHANGE_FEED_LIMIT, changes_since, serialize_change
+from sejm_app.export import TEXT_FORMATS, export_queryset, iter_export_rows, iter_text
+from sejm_app.models import Member, MemberStats, MemberTimeline, Vote, VoteChoice, Voting
+from sejm_app.pagination import KeysetPagination
+from sejm_app.search import search_votings
+from sejm_app.serializers import MemberSerializer, VoteSerializer, VotingSearchSerializer, VotingSerializer
+
+# Kolumny czytane przez VotingSerializer - bez roll_call i summary_hash
+VOTING_FIELDS = [
+    'id', 'term', 'sitting', 'sitting_day', 'voting_number', 'date', 'title', 'topic',
+    'kind', 'majority_type', 'majority_votes', 'yes', 'no', 'abstain',
+    'not_participating', 'present', 'total_voted', 'links',
+]
+
+
+def _int_param(request, name):
+    # request.GET działa także dla Request z DRF (przekazuje go do HttpRequest)
+    value = request.GET.get(name)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class MemberList(CachedResponseMixin, generics.ListAPIView):
+    """Posłowie; ``?term=``, ``?active=true|false`` i ``?club=`` zawężają listę."""
+    serializer_class = MemberSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        queryset = Member.objects.all()
+        term = _int_param(self.request, 'term')
+        if term is not None:
+            queryset = queryset.filter(term=term)
+        active = self.request.query_params.get('active')
+        if active in ('true', 'false'):
+            queryset = queryset.filter(active=active == 'true')
+        club = self.request.query_params.get('club')
+        if club:
+            queryset = queryset.filter(club=club)
+        return queryset
+
+
+class VotingList(CachedResponseMixin, generics.ListAPIView):
+    """Głosowania w kolejności (date, id); ``?term=`` i ``?sitting=`` zawężają listę."""
+    serializer_class = VotingSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('date', 'id')
+
+    def get_queryset(self):
+        queryset = Voting.objects.only(*VOTING_FIELDS)
+        term = _int_param(self.request, 'term')
+        if term is not None:
+            queryset = queryset.filter(term=term)
+        sitting = _int_param(self.request, 'sitting')
+        if sitting is not None:
+            queryset = queryset.filter(sitting=sitting)
+        return queryset
+
+
+class VotingSearch(CachedResponseMixin, generics.ListAPIView):
+    """Głosowania pasujące do ``?q=`` od najlepiej dopasowanych; ``?term=`` zawęża wyniki."""
+    serializer_class = VotingSearchSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-rank', 'id')
+
+    def get_queryset(self):
+        text = self.request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': 'This query parameter is required.'})
+        return search_votings(text, term=_int_param(self.request, 'term')).only(*VOTING_FIELDS)
+
+
+class VotingDetail(CachedResponseMixin, generics.RetrieveAPIView):
+    serializer_class = VotingSerializer
+    queryset = Voting.objects.only(*VOTING_FIELDS)
+
+
+class VotingVoteList(CachedResponseMixin, generics.ListAPIView):
+    """Głosy imienne jednego głosowania; 404, jeśli głosowania nie ma."""
+    serializer_class = VoteSerializer
+    pagination_class = KeysetPagination
+
+    def list(self, request, *args, **kwargs):
+        self.voting = generics.get_object_or_404(Voting.objects.only('id', 'term'), pk=self.kwargs['pk'])
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        # Kadencja głosowania zawęża odczyt do jednej partycji individual_votes
+        return (
+            Vote.objects.filter(term=self.voting.term, voting_id=self.kwargs['pk'])
+            .select_related('member', 'club')
+            .only(
+                'id', 'member', 'mp_id_api', 'first_name', 'last_name', 'club', 'vote_choice',
+                'member__first_name', 'member__last_name', 'club__code',
+            )
+        )
+
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+@require_GET
+def export_votes(request, export_format):
+    """Strumieniowy eksport głosów imiennych (CSV/JSONL) z filtrami ``term``, ``sitting``, ``date_from``, ``date_to``.
+
+    Wiersze idą prosto z kursora po stronie serwera do odpowiedzi, więc
+    pamięć nie rośnie z rozmiarem eksportu. Parquet jest dostępny tylko
+    przez ``export_sejm_data``.
+    """
+    if export_format not in TEXT_FORMATS:
+        return HttpResponseBadRequest(f'Unsupported export format: {export_format}')
+    filters = {}
+    try:
+        for name in ('term', 'sitting'):
+            if request.GET.get(name):
+                filters[name] = int(request.GET[name])
+        for name in ('date_from', 'date_to'):
+            if request.GET.get(name):
+                filters[name] = parse_date(request.GET[name])
+                if filters[name] is None:
+                    raise ValueError(name)
+    except ValueError:
+        return HttpResponseBadRequest('Invalid export filter.')
+
+    rows = iter_export_rows(export_queryset(**filters))
+    response = StreamingHttpResponse(iter_text(export_format, rows), content_type=EXPORT_CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="votes.{export_format}"'
+    return response
+
+
+# Widoki asynchroniczne (ASGI) dla najczęściej czytanych danych. Zapytania idą
+# przez asynchroniczne API ORM, a trafienia w cache nie zajmują żadnego wątku.
+
+LATEST_VOTINGS_LIMIT = 20
+MAX_LATEST_VOTINGS_LIMIT = 200
+PROFILE_RECENT_VOTES = 20
+
+
+def _async_require_get(view):
+    # require_GET z Django 4.2 nie obsługuje widoków asynchronicznych
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+@_async_require_get
+async def latest_votings(request):
+    """Najnowsze głosowania (``?term=``, ``?limit=`` do 200) od najpóźniejszego."""
+    term = _int_param(request, 'term')
+    limit = min(max(_int_param(request, 'limit') or LATEST_VOTINGS_LIMIT, 1), MAX_LATEST_VOTINGS_LIMIT)
+
+    async def build():
+        queryset = Voting.objects.only(*VOTING_FIELDS).order_by(F('date').desc(nulls_last=True), '-id')
+        if term is not None:
+            queryset = queryset.filter(term=term)
+        votings = [voting async for voting in queryset[:limit]]
+        return {'results': VotingSerializer(votings, many=True).data}
+
+    return await cached_json_response(request, build)
+
+
+@_async_require_get
+async def voting_roll_call(request, pk):
+    """Głosowanie z kompletem głosów imiennych w jednej odpowiedzi (bez stronicowania)."""
+    async def build():
+        try:
+            voting = await Voting.objects.only(*VOTING_FIELDS).aget(pk=pk)
+        except Voting.DoesNotExist:
+            raise Http404('Voting not found.')
+        votes = [
+            vote async for vote in Vote.objects.filter(term=voting.term, voting_id=pk)
+            .select_related('member', 'club')
+            .only(
+                'id', 'member', 'mp_id_api', 'first_name', 'last_name', 'club', 'vote_choice',
+                'member__first_name', 'member__last_name', 'club__code',
+            )
+            .order_by('mp_id_api', 'id')
+        ]
+        data = VotingSerializer(voting).data
+        data['votes'] = VoteSerializer(votes, many=True).data
+        return data
+
+    return await cached_json_response(request, build)
+
+
+@_async_require_get
+async def member_profile(request, pk):
+    """Poseł ze statystykami z ``analysis.member_stats`` i ostatnimi głosami; ``?term=`` wybiera kadencję."""
+    term = _int_param(request, 'term')
+
+    async def build():
+        try:
+            member = await Member.objects.aget(pk=pk)
+        except Member.DoesNotExist:
+            raise Http404('Member not found.')
+        stats_queryset = MemberStats.objects.filter(member_id=pk)
+        if term is not None:
+            stats_queryset = stats_queryset.filter(term=term)
+        stats = await stats_queryset.order_by('-term').afirst()
+        recent_votes = Vote.objects.filter(member_id=pk)
+        if term is not None:
+            recent_votes = recent_votes.filter(term=term, voting__term=term)
+        recent_votes = recent_votes.order_by(F('voting__date').desc(nulls_last=True), '-voting_id').values_list(
+            'voting_id', 'voting__date', 'voting__title', 'vote_choice',
+        )[:PROFILE_RECENT_VOTES]
+
+        data = MemberSerializer(member).data
+        data['stats'] = None if stats is None else {
+            'term': stats.term,
+            'votings': stats.votings,
+            'absent': stats.absent,
+            'attendance_rate': stats.attendance_rate,
+            'loyalty_rate': stats.loyalty_rate,
+        }
+        data['recent_votes'] = [
+            {'voting': voting_id, 'date': date, 'title': title, 'vote': VoteChoice(vote_choice).name}
+            async for voting_id, date, title, vote_choice in recent_votes
+        ]
+        return data
+
+    return await cached_json_response(request, build)
+
+
+@_async_require_get
+async def member_timeline(request, pk):
+    """Cała historia głosów posła w kadencji (``?term=``, domyślnie ostatnia) z licznikami narastającymi.
+
+    Czyta jeden wiersz ``analysis.member_timeline`` po indeksie (member, term)
+    zamiast łączyć i sortować głosy z głosowaniami.
+    """
+    term = _int_param(request, 'term')
+
+    async def build():
+        queryset = MemberTimeline.objects.filter(member_id=pk)
+        if term is not None:
+            queryset = queryset.filter(term=term)
+        timeline = await queryset.order_by('-term').afirst()
+        if timeline is None:
+            raise Http404('No voting history for this member.')
+        return {
+            'member': pk,
+            'term': timeline.term,
+            'totals': {
+                'votings': len(timeline.voting_ids),
+                'yes': timeline.yes,
+                'no': timeline.no,
+                'abstain': timeline.abstain,
+                'absent': timeline.absent,
+                'rebellions': timeline.rebellions,
+            },
+            'results': timeline.running_counters(),
+        }
+
+    return await cached_json_response(request, build)
+
+
+# Dziennik zmian (sejm_app.changes) - bez cache, bo odbiorcy pytają o coraz nowsze numery
+CHANGE_STREAM_POLL_SECONDS = 2.0
+CHANGE_STREAM_HEARTBEAT_SECONDS = 15.0
+# Po tym czasie strumień się kończy; EventSource łączy się ponownie z Last-Event-ID
+CHANGE_STREAM_MAX_SECONDS = 300.0
+
+
+@_async_require_get
+async def changes(request):
+    """Wpisy dziennika zmian po numerze ``?since=`` (domyślnie 0), najwyżej ``?limit=`` (do 5000).
+
+    ``next_since`` to numer do przekazania w następnym zapytaniu; ``has_more``
+    mówi, że kolejna strona jest już dostępna.
+    """
+    since = max(_int_param(request, 'since') or 0, 0)
+    limit = min(max(_int_param(request, 'limit') or CHANGE_FEED_LIMIT, 1), MAX_CHANGE_FEED_LIMIT)
+    # Jeden wiersz ponad limit rozstrzyga has_more, jak w KeysetPagination
+    entries = [entry async for entry in changes_since(since)[:limit + 1]]
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    return JsonResponse({
+        'results': [serialize_change(entry) for entry in entries],
+        'next_since': entries[-1].seq if entries else since,
+        'has_more': has_more,
+    })
+
+
+def _change_event(entry):
+    data = json.dumps(serialize_change(entry), cls=DjangoJSONEncoder)
+    return f'id: {entry.seq}\nevent: change\ndata: {data}\n\n'
+
+
+def _release_connection():
+    # Na czas oczekiwania połączenie wraca do PostgreSQL/pgbouncera;
+    # następne odpytanie dziennika otworzy nowe
+    if not connection.in_atomic_block:
+        connection.close()
+
+
+@_async_require_get
+async def change_stream(request):
+    """Dziennik zmian jako server-sent events od numeru ``?since=`` albo nagłówka ``Last-Event-ID``.
+
+    Nowe wpisy są odpytywane co ``CHANGE_STREAM_POLL_SECONDS``; w przerwach
+    idą komentarze podtrzymujące połączenie, a połączenie z bazą jest między
+    odpytaniami zwalniane. Pod WSGI strumień zajmowałby wątek przez cały czas
+    trwania, więc poza ASGI widok odpowiada 501.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse('The change stream is served only by the ASGI application.', status=501)
+    since = _int_param(request, 'since')
+    if since is None:
+        try:
+            since = int(request.headers.get('Last-Event-ID', 0))
+        except ValueError:
+            since = 0
+
+    async def events():
+        position = max(since, 0)
+        started = last_sent = time.monotonic()
+        yield f'retry: {int(CHANGE_STREAM_POLL_SECONDS * 1000)}\n\n'
+        while True:
+            entries = [entry async for entry in changes_since(position)[:CHANGE_FEED_LIMIT]]
+            for entry in entries:
+                position = entry.seq
+                yield _change_event(entry)
+            now = time.monotonic()
+            if entries:
+                last_sent = now
+                if len(entries) == CHANGE_FEED_LIMIT:
+                    continue
+            if now - started >= CHANGE_STREAM_MAX_SECONDS:
+                return
+            if now - last_sent >= CHANGE_STREAM_HEARTBEAT_SECONDS:
+                last_sent = now
+                yield ': keep-alive\n\n'
+            await sync_to_async(_release_connection)()
+            await asyncio.sleep(CHANGE_STREAM_POLL_SECONDS)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx nie buforuje odpowiedzi z tym nagłówkiem
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -20,6 +21,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'corsheaders',
     'sejm_app',  # Your app
@@ -57,16 +59,59 @@ TEMPLATES = [
 WSGI_APPLICATION = 'sejm_project.wsgi.application'
 
 # Database
+# POSTGRES_HOST/POSTGRES_PORT mogą wskazywać na pgbouncer zamiast serwera bazy.
+# DB_CONN_MAX_AGE - ile sekund połączenie żyje między żądaniami (0 - nowe na każde
+# żądanie, pusty - bez limitu); DB_CONN_HEALTH_CHECKS sprawdza je przed ponownym użyciem.
+# Pod ASGI musi być 0 (docker-compose.yml, usługa web-asgi): Django 4.2 nie używa tam
+# ponownie połączeń trwałych (#33497), więc pulą połączeń może być tylko pgbouncer.
+# DB_POOL_MODE=transaction - tryb zgodny z pgbouncer pool_mode=transaction: bez
+# kursorów po stronie serwera (WITH HOLD nie przetrwa zmiany połączenia serwera).
+# Baza musi mieć strefę czasową UTC (ALTER DATABASE ... SET timezone TO 'UTC'),
+# inaczej Django ustawia ją poleceniem SET na poziomie sesji.
+# Długie odczyty strumieniowe (eksport) idą wtedy aliasem 'direct' na
+# POSTGRES_DIRECT_HOST/POSTGRES_DIRECT_PORT z pominięciem poolera - w tym trybie
+# jest on wymagany, bo bez kursorów po stronie serwera eksport wczytałby cały wynik.
+DB_POOL_MODE = os.getenv('DB_POOL_MODE', 'session')
+if DB_POOL_MODE not in ('session', 'transaction'):
+    raise ImproperlyConfigured(f'Unknown DB_POOL_MODE: {DB_POOL_MODE!r}')
+_conn_max_age = os.getenv('DB_CONN_MAX_AGE', '60')
+
+DATABASE_BASE = {
+    'ENGINE': 'django.db.backends.postgresql',
+    'NAME': os.getenv('POSTGRES_DB'),
+    'USER': os.getenv('POSTGRES_USER'),
+    'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
+    'CONN_MAX_AGE': int(_conn_max_age) if _conn_max_age else None,
+    'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'true').lower() == 'true',
+    'OPTIONS': {
+        'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 10)),
+        'application_name': os.getenv('DB_APPLICATION_NAME', 'sejm_app'),
+    },
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.getenv('POSTGRES_DB'),
-        'USER': os.getenv('POSTGRES_USER'),
-        'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
-        'HOST': 'db',
-        'PORT': '5432',
+        **DATABASE_BASE,
+        'HOST': os.getenv('POSTGRES_HOST', 'db'),
+        'PORT': os.getenv('POSTGRES_PORT', '5432'),
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOL_MODE == 'transaction',
     }
 }
+if DB_POOL_MODE == 'transaction':
+    if not os.getenv('POSTGRES_DIRECT_HOST'):
+        raise ImproperlyConfigured(
+            'DB_POOL_MODE=transaction requires POSTGRES_DIRECT_HOST: streaming exports need '
+            'server-side cursors on a connection that bypasses the pooler.'
+        )
+    DATABASES['direct'] = {
+        **DATABASE_BASE,
+        'HOST': os.getenv('POSTGRES_DIRECT_HOST'),
+        'PORT': os.getenv('POSTGRES_DIRECT_PORT', '5432'),
+        'CONN_MAX_AGE': 0,
+        'TEST': {'MIRROR': 'default'},
+    }
+# Alias bazy dla zapytań czytanych kursorem po stronie serwera (sejm_app.export)
+SEJM_STREAMING_DATABASE = 'direct' if 'direct' in DATABASES else 'default'
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -104,6 +149,35 @@ REST_FRAMEWORK = {
     ]
 }
 
+# Cache odpowiedzi API (sejm_app.api_cache), wersjonowany generacją danych z importu.
+# API_RESPONSE_CACHE=locmem - LRU w pamięci procesu, file - katalog współdzielony przez procesy
+SEJM_DATA_GENERATION_FILE = os.getenv('SEJM_DATA_GENERATION_FILE', os.path.join(BASE_DIR, 'var', 'data_generation.json'))
+API_RESPONSE_CACHE = os.getenv('API_RESPONSE_CACHE', 'locmem')
+if API_RESPONSE_CACHE == 'file':
+    API_CACHE_BACKEND = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('API_RESPONSE_CACHE_DIR', os.path.join(BASE_DIR, 'var', 'api_cache')),
+    }
+elif API_RESPONSE_CACHE == 'locmem':
+    API_CACHE_BACKEND = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sejm-api-responses',
+    }
+else:
+    raise ImproperlyConfigured(f'Unknown API_RESPONSE_CACHE backend: {API_RESPONSE_CACHE!r}')
+API_CACHE_BACKEND['TIMEOUT'] = int(os.getenv('API_RESPONSE_CACHE_TIMEOUT', 24 * 60 * 60))
+API_CACHE_BACKEND['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('API_RESPONSE_CACHE_MAX_ENTRIES', 1000))}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': API_CACHE_BACKEND,
+}
+
+# Katalog na wyniki analiz zapisywane w plikach (np. macierze głosowań .npy)
+SEJM_ANALYSIS_DIR = os.getenv('SEJM_ANALYSIS_DIR', os.path.join(BASE_DIR, 'var', 'analysis'))
+
 # CORS
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",